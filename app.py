@@ -8,7 +8,7 @@ from PyQt6.QtGui import QIcon
 from PyQt6.QtCore import Qt
 
 import motorlib
-from motorlib import simResult
+from motorlib import simResult, resultFile
 from uilib import preferencesManager, propellantManager, simulationManager, fileManager, toolManager
 from uilib import importExportManager
 import uilib.widgets.mainWindow
@@ -67,10 +67,14 @@ class App(QApplication):
                         alert.description))
                 print()
                 if '-o' in args:
-                    with open(args[args.index('-o') + 1], 'w') as outputFile:
-                        outputFile.write(simulationResult.getCSV(self.preferencesManager.preferences))
+                    outputPath = args[args.index('-o') + 1]
+                    if outputPath.endswith(resultFile.fileExtension):
+                        resultFile.saveResult(simulationResult, outputPath)
+                    else:
+                        with open(outputPath, 'w') as outputFile:
+                            simulationResult.writeCSV(outputFile, self.preferencesManager.preferences)
                 else:
-                    print(simulationResult.getCSV(self.preferencesManager.preferences))
+                    simulationResult.writeCSV(sys.stdout, self.preferencesManager.preferences)
             sys.exit(0)
 
         else:
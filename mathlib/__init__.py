@@ -1 +1,2 @@
-from ._find_perimeter import find_perimeter
\ No newline at end of file
+from ._find_perimeter import find_perimeter, find_perimeters, TileIndex
+from ._distance import distance_transform
@@ -0,0 +1,52 @@
+import os
+import numpy as np
+from ._distance_cy import _distance_transform
+
+def distance_transform(image, *, scale=1.0, dtype=np.float64, num_threads=None):
+    """Find the exact euclidean distance from each nonzero element of a 2D array to the nearest zero element.
+
+    This gives the same distances as ``scipy.ndimage.distance_transform_edt``,
+    but only allocates the output array and a few rows of scratch space, so it
+    can be used on images that are too large to hold several copies of in memory.
+    The distances are found with the separable algorithm of Felzenszwalb and
+    Huttenlocher [1]_, first down each column and then across each row.
+
+    Parameters
+    ----------
+    image : 2D array
+        Input image. The distances are measured to the elements that are 0.
+    scale : float, optional
+        Distance between two adjacent elements, which every distance is
+        multiplied by.
+    dtype : numpy dtype, optional
+        Type of the returned distances, either float32 or float64.
+    num_threads : int, optional
+        Number of threads to find the distances with. Defaults to the number
+        of CPUs.
+
+    Returns
+    -------
+    distances : 2D ndarray
+        The distance from each element to the nearest zero, which is 0 for the
+        zeros themselves. If there are no zeros, every distance is infinite.
+
+    References
+    ----------
+    .. [1] Felzenszwalb, Pedro F. and Daniel P. Huttenlocher. Distance
+           Transforms of Sampled Functions. Theory of Computing 8(19),
+           2012, p. 415-428. :DOI:`10.4086/toc.2012.v008a019`
+    """
+    image = np.asarray(image)
+    if image.ndim != 2:
+        raise ValueError('Only 2D arrays are supported.')
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError('Distances must be float32 or float64.')
+    if num_threads is None:
+        num_threads = os.cpu_count() or 1
+    if num_threads < 1:
+        raise ValueError('Number of threads must be at least 1.')
+    features = np.ascontiguousarray(image != 0).view(np.uint8)
+    distances = np.empty(image.shape, dtype=dtype)
+    _distance_transform(features, distances, float(scale), num_threads)
+    return distances
@@ -0,0 +1,113 @@
+# cython: cdivision=True
+# cython: boundscheck=False
+# cython: nonecheck=False
+# cython: wraparound=False
+cimport numpy as cnp
+from cython.parallel cimport prange, threadid
+from libc.math cimport sqrt, INFINITY
+import numpy as np
+
+ctypedef fused distance_t:
+    float
+    double
+
+
+# fills in column c of distances with the number of rows to the nearest zero of features in the column
+cdef void _column_distances(cnp.uint8_t[:, :] features, distance_t[:, :] distances,
+                            Py_ssize_t c) noexcept nogil:
+    cdef Py_ssize_t r
+    cdef Py_ssize_t rows = features.shape[0]
+    cdef double distance = INFINITY
+
+    for r in range(rows):
+        if features[r, c] == 0:
+            distance = 0
+        else:
+            distance += 1
+        distances[r, c] = <distance_t> distance
+
+    distance = INFINITY
+    for r in range(rows - 1, -1, -1):
+        if features[r, c] == 0:
+            distance = 0
+        else:
+            distance += 1
+        if distance < distances[r, c]:
+            distances[r, c] = <distance_t> distance
+
+
+# replaces row r of distances, which holds the column distances from _column_distances, with the euclidean distance
+# to the nearest zero, scaled by 'scale'. This finds the lower envelope of the parabolas (c - q)^2 + f(q), where f(q)
+# is the squared column distance at q, as in Felzenszwalb and Huttenlocher's algorithm. 'f', 'z' and 'v' are buffers
+# with room for a row, plus one more element in 'z'.
+cdef void _row_distances(distance_t[:, :] distances, Py_ssize_t r, double scale,
+                         double[:] f, double[:] z, Py_ssize_t[:] v) noexcept nogil:
+    cdef Py_ssize_t q, k
+    cdef Py_ssize_t cols = distances.shape[1]
+    cdef double s
+
+    for q in range(cols):
+        f[q] = (<double> distances[r, q]) * distances[r, q]
+
+    # find the first column that has a zero anywhere in it
+    q = 0
+    while q < cols and f[q] == INFINITY:
+        q += 1
+    if q == cols:
+        for q in range(cols):
+            distances[r, q] = <distance_t> INFINITY
+        return
+
+    k = 0
+    v[0] = q
+    z[0] = -INFINITY
+    z[1] = INFINITY
+    for q in range(v[0] + 1, cols):
+        if f[q] == INFINITY:
+            continue
+        while True:
+            s = ((f[q] + (<double> q * q)) - (f[v[k]] + (<double> v[k] * v[k]))) / (2.0 * (q - v[k]))
+            if s > z[k]:
+                break
+            k -= 1
+        k += 1
+        v[k] = q
+        z[k] = s
+        z[k + 1] = INFINITY
+
+    k = 0
+    for q in range(cols):
+        while z[k + 1] < q:
+            k += 1
+        distances[r, q] = <distance_t> (sqrt(((<double> q - v[k]) * (q - v[k])) + f[v[k]]) * scale)
+
+
+def _distance_transform(cnp.uint8_t[:, :] features, distance_t[:, :] distances, double scale, int num_threads):
+
+    """Finds the exact euclidean distance from each element of 'features'
+    to the nearest element that is 0, and stores it in 'distances'
+    multiplied by 'scale'. The distance to a zero in the same column is
+    found first, and then each row is swept to find the closest of those
+    column distances. Both passes work in place in 'distances', so the
+    only other memory used is a buffer for each thread with room for a
+    row. Rows that are too far from any zero to be reached are set to
+    infinity.
+    """
+
+    cdef Py_ssize_t rows = features.shape[0]
+    cdef Py_ssize_t cols = features.shape[1]
+    cdef Py_ssize_t r, c, thread
+
+    f_buffers = np.zeros((num_threads, cols))
+    z_buffers = np.zeros((num_threads, cols + 1))
+    v_buffers = np.zeros((num_threads, cols), dtype=np.intp)
+    cdef double[:, :] f_view = f_buffers
+    cdef double[:, :] z_view = z_buffers
+    cdef Py_ssize_t[:, :] v_view = v_buffers
+
+    for c in prange(cols, nogil=True, schedule='static', num_threads=num_threads):
+        _column_distances(features, distances, c)
+
+    for r in prange(rows, nogil=True, schedule='static', num_threads=num_threads):
+        thread = threadid()
+        _row_distances(distances, r, scale, f_view[thread], z_view[thread], v_view[thread])
@@ -1,11 +1,56 @@
+import os
 import numpy as np
-from ._find_perimeter_cy import _get_perimeter
+from ._find_perimeter_cy import _get_perimeter, _get_perimeters, _get_tile_range
 from collections import deque
 
+class TileIndex():
+    """Stores the lowest and highest value in each square tile of a 2D array.
+
+    A contour can only cross the squares of a tile if its level is at least the
+    lowest value in the tile and less than the highest, so ``find_perimeter`` and
+    ``find_perimeters`` can skip every other tile without looking at its squares.
+    On a regression map, the contour at a level only passes through the tiles
+    along a thin band, so most of the array is skipped. The index is built with a
+    single pass over the array and can be reused for any number of levels, as long
+    as the array isn't changed.
+
+    Parameters
+    ----------
+    image : 2D ndarray of double
+        Array to build the index of.
+    tile_size : int, optional
+        Width and height of the tiles, in squares.
+    """
+    def __init__(self, image, tile_size=16):
+        if image.ndim != 2:
+            raise ValueError('Only 2D arrays are supported.')
+        if tile_size < 1:
+            raise ValueError('Tile size must be at least 1.')
+        self.shape = image.shape
+        self.tile_size = tile_size
+        # not simulating 3 closest pixels to the edge
+        rows = max(-(-(image.shape[0] - 7) // tile_size), 0)
+        cols = max(-(-(image.shape[1] - 7) // tile_size), 0)
+        self.tile_min = np.zeros((rows, cols))
+        self.tile_max = np.zeros((rows, cols))
+        _get_tile_range(image, tile_size, self.tile_min, self.tile_max)
+
+
+def _get_tile_args(image, tile_index):
+    """Returns the tile arguments of the marching squares functions for an optional TileIndex of 'image'."""
+    if tile_index is None:
+        return 0, np.zeros((0, 0)), np.zeros((0, 0))
+    if tile_index.shape != image.shape:
+        raise ValueError('Tile index was built for an array of a different shape.')
+    return tile_index.tile_size, tile_index.tile_min, tile_index.tile_max
+
+
 def find_perimeter(image, level,
                   *,
                   including_contours=False,
-                  fully_connected='low'):
+                  fully_connected='low',
+                  num_threads=None,
+                  tile_index=None):
     """Find the perimeter of the iso-valued contours in a 2D array for a given level value.
 
     Uses the "marching squares" method to compute the iso-valued contours of
@@ -18,6 +63,12 @@ def find_perimeter(image, level,
         Input image in which to find contours.
     level : float
         Value along which to find contours in the array.
+    num_threads : int, optional
+        Number of threads to sweep the array with when ``including_contours``
+        is False. Defaults to the number of CPUs.
+    tile_index : TileIndex, optional
+        Index of the tiles of ``image``, used to skip the tiles that the
+        contour can't pass through. The result is the same with or without it.
 
     Returns
     -------
@@ -77,14 +128,70 @@ def find_perimeter(image, level,
         raise ValueError("Input array must be at least 2x2.")
     if image.ndim != 2:
         raise ValueError('Only 2D arrays are supported.')
-    (perimeter,segments) = _get_perimeter(image, float(level), fully_connected == 'high', including_contours)
-    contours = []
-    if including_contours:
-        contours = _assemble_contours(segments)
+    if not including_contours:
+        return find_perimeters(image, [level], num_threads=num_threads, tile_index=tile_index)[0], []
+    tile_size, tile_min, tile_max = _get_tile_args(image, tile_index)
+    (perimeter,segments) = _get_perimeter(image, float(level), fully_connected == 'high', including_contours,
+                                          tile_size, tile_min, tile_max)
+    contours = _assemble_contours(segments)
     return perimeter, contours
 
 
 
+def find_perimeters(image, levels, *, num_threads=None, tile_index=None):
+    """Find the perimeters of the iso-valued contours in a 2D array for many level values at once.
+
+    The result is the same as calling ``find_perimeter`` for each level, but the
+    array is only swept once. Each square of the array only visits the levels
+    that pass through it, so the cost grows with the size of the array rather
+    than with the size of the array times the number of levels.
+
+    The sweep is split into bands of rows that run in parallel. Every band sums
+    into its own accumulators and the bands are added up in a fixed order, so
+    the result is bit-for-bit the same for any number of threads. Summing the
+    whole array into a single accumulator, as ``find_perimeter`` used to, gives
+    results that differ from these by rounding error only (below 1e-13 relative).
+
+    Parameters
+    ----------
+    image : 2D ndarray of double
+        Input image in which to find contours.
+    levels : 1D array of float
+        Values along which to find contours in the array, sorted in ascending order.
+    num_threads : int, optional
+        Number of threads to sweep the array with. Defaults to the number of CPUs.
+    tile_index : TileIndex, optional
+        Index of the tiles of ``image``, used to skip the tiles that none of the
+        contours pass through. The result is the same with or without it.
+
+    Returns
+    -------
+    perimeters : 1D ndarray of double
+        The perimeter of the computed contours for each level, using the distance
+        between two adjacent image array points as the base unit.
+
+    See Also
+    --------
+    find_perimeter
+    """
+    if image.shape[0] < 2 or image.shape[1] < 2:
+        raise ValueError("Input array must be at least 2x2.")
+    if image.ndim != 2:
+        raise ValueError('Only 2D arrays are supported.')
+    levels = np.ascontiguousarray(levels, dtype=np.float64)
+    if levels.ndim != 1:
+        raise ValueError('Levels must be a 1D array.')
+    if np.any(np.diff(levels) < 0):
+        raise ValueError('Levels must be sorted in ascending order.')
+    if num_threads is None:
+        num_threads = os.cpu_count() or 1
+    if num_threads < 1:
+        raise ValueError('Number of threads must be at least 1.')
+    tile_size, tile_min, tile_max = _get_tile_args(image, tile_index)
+    return _get_perimeters(image, levels, num_threads, tile_size, tile_min, tile_max)
+
+
+
 def _assemble_contours(segments):
     current_index = 0
     contours = {}
@@ -3,7 +3,17 @@
 # cython: nonecheck=False
 # cython: wraparound=False
 cimport numpy as cnp
-from libc.math cimport sqrt
+from cython.parallel cimport prange
+from libc.math cimport sqrt, INFINITY
+import numpy as np
+
+# maps can be stored in single precision to save memory, but all of the math is done in double precision
+ctypedef fused map_t:
+    float
+    double
+
+# number of rows of the array that are swept together as a band by _get_perimeters
+cdef Py_ssize_t BAND_ROWS = 16
 
 # helper function to calculate length of diagonals without python
 cdef inline cnp.float64_t hypot(cnp.float64_t x, cnp.float64_t y) nogil:
@@ -18,8 +28,10 @@ cdef inline cnp.float64_t _get_fraction(cnp.float64_t from_value,
     return ((level - from_value) / (to_value - from_value))
 
 
-def _get_perimeter(cnp.float64_t[:, :] array, cnp.float64_t level,
-                   bint vertex_connect_high, bint returning_contours):
+def _get_perimeter(const map_t[:, :] array, cnp.float64_t level,
+                   bint vertex_connect_high, bint returning_contours,
+                   Py_ssize_t tile_size, cnp.float64_t[:, :] tile_min,
+                   cnp.float64_t[:, :] tile_max):
 
     """Iterate across the given array in a marching-squares fashion,
     looking for segments that cross 'level'. If such a segment is
@@ -27,6 +39,9 @@ def _get_perimeter(cnp.float64_t[:, :] array, cnp.float64_t level,
     which is returned by the function.  if vertex_connect_high is
     nonzero, high-values pixels are considered to be face+vertex
     connected into objects; otherwise low-valued pixels are.
+    If tile_size is nonzero, tile_min and tile_max hold the range of
+    each tile built by _get_tile_range, and tiles that 'level' falls
+    outside of are skipped without looking at their squares.
     """
 
     # The plan is to iterate a 2x2 square across the input array. This means
@@ -68,132 +83,330 @@ def _get_perimeter(cnp.float64_t[:, :] array, cnp.float64_t level,
     cdef cnp.float64_t top, bottom, left, right
     cdef cnp.float64_t ul, ur, ll, lr
     cdef Py_ssize_t r0, r1, c0, c1
+    cdef Py_ssize_t tile_row, tile_col, span, num_tile_cols
 
     perimeter = 0
 
+    # without a tile index, each row is swept as a single tile
+    span = tile_size if tile_size > 0 else max(array.shape[1] - 7, 1)
+    num_tile_cols = (array.shape[1] - 7 + span - 1) // span
+
     # not simulating 3 closest pixels to the edge
     for r0 in range(3, array.shape[0] - 4):
-        for c0 in range(3, array.shape[1] - 4):
-
-            r1, c1 = r0 + 1, c0 + 1
-
-            ul = array[r0, c0]
-            ur = array[r0, c1]
-            ll = array[r1, c0]
-            lr = array[r1, c1]
-
-            square_case = (
-                (ul > level)
-                + ((ur > level) *2)
-                + ((ll > level) * 4)
-                + ((lr > level) * 8))
-
-            if square_case in [0, 15]:
-                # only do anything if there's a line passing through the
-                # square. Cases 0 and 15 are entirely below/above the contour.
-                continue
-
-            if ((array.shape[0]/2) - 3
-                    < hypot(
-                        r0 + 0.5 - (array.shape[0]/2),
-                        c0 + 0.5 - (array.shape[1]/2)
-                    ) and not c_returning_contours):
-
-                # skips this square if outside the motor radius
-                # tolerance of 3 adapted from geometry.length function
-                continue
-
-            top = _get_fraction(ul, ur, level)
-            bottom = _get_fraction(ll, lr, level)
-            left = _get_fraction(ll, ul, level)
-            right = _get_fraction(lr, ur, level)
-
-            # calculating coordinates incase they are needed for contours
-            if c_returning_contours:
-                top_tuple = r0, c0 + _get_fraction(ul, ur, level)
-                bottom_tuple = r1, c0 + _get_fraction(ll, lr, level)
-                left_tuple = r0 + _get_fraction(ul, ll, level), c0
-                right_tuple = r0 + _get_fraction(ur, lr, level), c1
-
-            addVar = 0
-
-            if (square_case == 1):
-                # top to left
-                if c_returning_contours:
-                    segments.append((top_tuple, left_tuple))
-                addVar = hypot(top, 1-left)
-            elif (square_case == 2):
-                # right to top
-                if c_returning_contours:
-                    segments.append((right_tuple, top_tuple))
-                addVar = hypot(1-top, 1-right)
-            elif (square_case == 3):
-                # right to left
-                if c_returning_contours:
-                    segments.append((right_tuple, left_tuple))
-                addVar = hypot(right-left, 1)
-            elif (square_case == 4):
-                # left to bottom
-                if c_returning_contours:
-                    segments.append((left_tuple, bottom_tuple))
-                addVar = hypot(left, bottom)
-            elif (square_case == 5):
-                # top to bottom
-                if c_returning_contours:
-                    segments.append((top_tuple, bottom_tuple))
-                addVar = hypot(top-bottom, 1)
-            elif (square_case == 6):
+        for tile_col in range(num_tile_cols):
+            if tile_size > 0:
+                tile_row = (r0 - 3) // tile_size
+                if not (tile_min[tile_row, tile_col] <= level < tile_max[tile_row, tile_col]):
+                    # the contour doesn't pass through any square of this tile
+                    continue
+            for c0 in range(3 + (tile_col * span), min(3 + ((tile_col + 1) * span), array.shape[1] - 4)):
+
+                r1, c1 = r0 + 1, c0 + 1
+
+                ul = array[r0, c0]
+                ur = array[r0, c1]
+                ll = array[r1, c0]
+                lr = array[r1, c1]
+
+                square_case = (
+                    (ul > level)
+                    + ((ur > level) *2)
+                    + ((ll > level) * 4)
+                    + ((lr > level) * 8))
+
+                if square_case in [0, 15]:
+                    # only do anything if there's a line passing through the
+                    # square. Cases 0 and 15 are entirely below/above the contour.
+                    continue
+
+                if ((array.shape[0]/2) - 3
+                        < hypot(
+                            r0 + 0.5 - (array.shape[0]/2),
+                            c0 + 0.5 - (array.shape[1]/2)
+                        ) and not c_returning_contours):
+
+                    # skips this square if outside the motor radius
+                    # tolerance of 3 adapted from geometry.length function
+                    continue
+
+                top = _get_fraction(ul, ur, level)
+                bottom = _get_fraction(ll, lr, level)
+                left = _get_fraction(ll, ul, level)
+                right = _get_fraction(lr, ur, level)
+
+                # calculating coordinates incase they are needed for contours
                 if c_returning_contours:
-                    if vertex_connect_high:
-                        segments.append((left_tuple, top_tuple))
-                        segments.append((right_tuple, bottom_tuple))
-                    else:
+                    top_tuple = r0, c0 + _get_fraction(ul, ur, level)
+                    bottom_tuple = r1, c0 + _get_fraction(ll, lr, level)
+                    left_tuple = r0 + _get_fraction(ul, ll, level), c0
+                    right_tuple = r0 + _get_fraction(ur, lr, level), c1
+
+                addVar = 0
+
+                if (square_case == 1):
+                    # top to left
+                    if c_returning_contours:
+                        segments.append((top_tuple, left_tuple))
+                    addVar = hypot(top, 1-left)
+                elif (square_case == 2):
+                    # right to top
+                    if c_returning_contours:
                         segments.append((right_tuple, top_tuple))
+                    addVar = hypot(1-top, 1-right)
+                elif (square_case == 3):
+                    # right to left
+                    if c_returning_contours:
+                        segments.append((right_tuple, left_tuple))
+                    addVar = hypot(right-left, 1)
+                elif (square_case == 4):
+                    # left to bottom
+                    if c_returning_contours:
                         segments.append((left_tuple, bottom_tuple))
-                addVar = hypot(1-top, 1-right) + hypot(left, bottom)
-            elif (square_case == 7):
-                # right to bottom
-                if c_returning_contours:
-                    segments.append((right_tuple, bottom_tuple))
-                addVar = hypot(1-bottom, right)
-            elif (square_case == 8):
-                # bottom to right
-                if c_returning_contours:
-                    segments.append((bottom_tuple, right_tuple))
-                addVar = hypot(1-bottom, right)
-            elif (square_case == 9):
-                if c_returning_contours:
-                    if vertex_connect_high:
-                        segments.append((top_tuple, right_tuple))
-                        segments.append((bottom_tuple, left_tuple))
-                    else:
-                        segments.append((top_tuple, left_tuple))
+                    addVar = hypot(left, bottom)
+                elif (square_case == 5):
+                    # top to bottom
+                    if c_returning_contours:
+                        segments.append((top_tuple, bottom_tuple))
+                    addVar = hypot(top-bottom, 1)
+                elif (square_case == 6):
+                    if c_returning_contours:
+                        if vertex_connect_high:
+                            segments.append((left_tuple, top_tuple))
+                            segments.append((right_tuple, bottom_tuple))
+                        else:
+                            segments.append((right_tuple, top_tuple))
+                            segments.append((left_tuple, bottom_tuple))
+                    addVar = hypot(1-top, 1-right) + hypot(left, bottom)
+                elif (square_case == 7):
+                    # right to bottom
+                    if c_returning_contours:
+                        segments.append((right_tuple, bottom_tuple))
+                    addVar = hypot(1-bottom, right)
+                elif (square_case == 8):
+                    # bottom to right
+                    if c_returning_contours:
                         segments.append((bottom_tuple, right_tuple))
-                addVar = hypot(top, 1-left) + hypot(1-bottom, right)
-            elif (square_case == 10):
-                # bottom to top
-                if c_returning_contours:
-                    segments.append((bottom_tuple, top_tuple))
-                addVar = hypot(top-bottom, 1)
-            elif (square_case == 11):
-                # bottom to left
-                if c_returning_contours:
-                    segments.append((bottom_tuple, left_tuple))
-                addVar = hypot(left, bottom)
-            elif (square_case == 12):
-                # lef to right
-                if c_returning_contours:
-                    segments.append((left_tuple, right_tuple))
-                addVar = hypot(right-left, 1)
-            elif (square_case == 13):
-                # top to right
-                if c_returning_contours:
-                    segments.append((top_tuple, right_tuple))
-                addVar = hypot(1-top, 1-right)
-            elif (square_case == 14):
-                # left to top
-                if c_returning_contours:
-                    segments.append((left_tuple, top_tuple))
-                addVar = hypot(top, 1-left)
-            perimeter += addVar
+                    addVar = hypot(1-bottom, right)
+                elif (square_case == 9):
+                    if c_returning_contours:
+                        if vertex_connect_high:
+                            segments.append((top_tuple, right_tuple))
+                            segments.append((bottom_tuple, left_tuple))
+                        else:
+                            segments.append((top_tuple, left_tuple))
+                            segments.append((bottom_tuple, right_tuple))
+                    addVar = hypot(top, 1-left) + hypot(1-bottom, right)
+                elif (square_case == 10):
+                    # bottom to top
+                    if c_returning_contours:
+                        segments.append((bottom_tuple, top_tuple))
+                    addVar = hypot(top-bottom, 1)
+                elif (square_case == 11):
+                    # bottom to left
+                    if c_returning_contours:
+                        segments.append((bottom_tuple, left_tuple))
+                    addVar = hypot(left, bottom)
+                elif (square_case == 12):
+                    # lef to right
+                    if c_returning_contours:
+                        segments.append((left_tuple, right_tuple))
+                    addVar = hypot(right-left, 1)
+                elif (square_case == 13):
+                    # top to right
+                    if c_returning_contours:
+                        segments.append((top_tuple, right_tuple))
+                    addVar = hypot(1-top, 1-right)
+                elif (square_case == 14):
+                    # left to top
+                    if c_returning_contours:
+                        segments.append((left_tuple, top_tuple))
+                    addVar = hypot(top, 1-left)
+                perimeter += addVar
     return perimeter, segments
+
+
+# length of the segment that crosses a single square, using the same cases as _get_perimeter
+cdef inline cnp.float64_t _get_square_perimeter(cnp.float64_t ul, cnp.float64_t ur,
+                                                cnp.float64_t ll, cnp.float64_t lr,
+                                                cnp.float64_t level) nogil:
+    cdef unsigned char square_case
+    cdef cnp.float64_t top, bottom, left, right
+
+    square_case = (
+        (ul > level)
+        + ((ur > level) *2)
+        + ((ll > level) * 4)
+        + ((lr > level) * 8))
+
+    if square_case == 0 or square_case == 15:
+        return 0
+
+    top = _get_fraction(ul, ur, level)
+    bottom = _get_fraction(ll, lr, level)
+    left = _get_fraction(ll, ul, level)
+    right = _get_fraction(lr, ur, level)
+
+    if square_case == 1 or square_case == 14:
+        return hypot(top, 1-left)
+    if square_case == 2 or square_case == 13:
+        return hypot(1-top, 1-right)
+    if square_case == 3 or square_case == 12:
+        return hypot(right-left, 1)
+    if square_case == 4 or square_case == 11:
+        return hypot(left, bottom)
+    if square_case == 5 or square_case == 10:
+        return hypot(top-bottom, 1)
+    if square_case == 6:
+        return hypot(1-top, 1-right) + hypot(left, bottom)
+    if square_case == 7 or square_case == 8:
+        return hypot(1-bottom, right)
+    # square_case == 9
+    return hypot(top, 1-left) + hypot(1-bottom, right)
+
+
+# index of the first level that is not below value, levels must be sorted
+cdef inline Py_ssize_t _first_level_at_or_above(cnp.float64_t[:] levels,
+                                                cnp.float64_t value) nogil:
+    cdef Py_ssize_t low = 0
+    cdef Py_ssize_t high = levels.shape[0]
+    cdef Py_ssize_t mid
+    while low < high:
+        mid = (low + high) // 2
+        if levels[mid] < value:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+# adds the perimeters for the rows from start_row up to (not including) end_row to perimeters
+cdef void _sweep_band(const map_t[:, :] array, cnp.float64_t[:] levels,
+                      cnp.float64_t[:] perimeters, Py_ssize_t start_row,
+                      Py_ssize_t end_row, Py_ssize_t tile_size,
+                      cnp.float64_t[:, :] tile_min,
+                      cnp.float64_t[:, :] tile_max) noexcept nogil:
+    cdef cnp.float64_t ul, ur, ll, lr
+    cdef cnp.float64_t low, high
+    cdef Py_ssize_t r0, r1, c0, c1, i
+    cdef Py_ssize_t tile_row, tile_col, span, num_tile_cols
+
+    # without a tile index, each row is swept as a single tile
+    span = tile_size if tile_size > 0 else max(array.shape[1] - 7, 1)
+    num_tile_cols = (array.shape[1] - 7 + span - 1) // span
+
+    for r0 in range(start_row, end_row):
+        for tile_col in range(num_tile_cols):
+            if tile_size > 0:
+                tile_row = (r0 - 3) // tile_size
+                i = _first_level_at_or_above(levels, tile_min[tile_row, tile_col])
+                if i == levels.shape[0] or levels[i] >= tile_max[tile_row, tile_col]:
+                    # no level passes through any square of this tile
+                    continue
+            for c0 in range(3 + (tile_col * span), min(3 + ((tile_col + 1) * span), array.shape[1] - 4)):
+
+                r1, c1 = r0 + 1, c0 + 1
+
+                ul = array[r0, c0]
+                ur = array[r0, c1]
+                ll = array[r1, c0]
+                lr = array[r1, c1]
+
+                low = min(min(ul, ur), min(ll, lr))
+                high = max(max(ul, ur), max(ll, lr))
+
+                i = _first_level_at_or_above(levels, low)
+                if i == levels.shape[0] or levels[i] >= high:
+                    # no level passes through this square
+                    continue
+
+                if ((array.shape[0]/2) - 3
+                        < hypot(
+                            r0 + 0.5 - (array.shape[0]/2),
+                            c0 + 0.5 - (array.shape[1]/2)
+                        )):
+                    # skips this square if outside the motor radius
+                    # tolerance of 3 adapted from geometry.length function
+                    continue
+
+                while i < levels.shape[0] and levels[i] < high:
+                    perimeters[i] += _get_square_perimeter(ul, ur, ll, lr, levels[i])
+                    i += 1
+
+
+def _get_perimeters(const map_t[:, :] array, cnp.float64_t[:] levels,
+                    int num_threads, Py_ssize_t tile_size,
+                    cnp.float64_t[:, :] tile_min, cnp.float64_t[:, :] tile_max):
+
+    """Finds the perimeter of the contours at each value in 'levels'
+    (which must be sorted in ascending order) with a single sweep across
+    the array. A segment only crosses a square for the levels that are at
+    least the lowest of its four corners and less than the highest, so
+    each square only visits those levels.
+
+    The array is split into bands of BAND_ROWS rows that are swept in
+    parallel by up to num_threads threads, each band into its own row of
+    accumulators. The bands are then added together in order, so the
+    result is the same for any number of threads. It can differ from the
+    perimeter found by _get_perimeter in the last few bits, as that sums
+    every square into a single accumulator. Tiles are skipped the same way
+    as in _get_perimeter when none of the levels fall in their range.
+    """
+
+    # not simulating 3 closest pixels to the edge
+    cdef Py_ssize_t first_row = 3
+    cdef Py_ssize_t end_row = array.shape[0] - 4
+    cdef Py_ssize_t num_bands = 0
+    cdef Py_ssize_t band
+    if end_row > first_row:
+        num_bands = (end_row - first_row + BAND_ROWS - 1) // BAND_ROWS
+
+    band_perimeters = np.zeros((num_bands, levels.shape[0]))
+    cdef cnp.float64_t[:, :] band_view = band_perimeters
+
+    for band in prange(num_bands, nogil=True, schedule='dynamic', num_threads=num_threads):
+        _sweep_band(array, levels, band_view[band],
+                    first_row + (band * BAND_ROWS),
+                    min(first_row + ((band + 1) * BAND_ROWS), end_row),
+                    tile_size, tile_min, tile_max)
+
+    perimeters = np.zeros(levels.shape[0])
+    for band in range(num_bands):
+        perimeters += band_perimeters[band]
+    return perimeters
+
+
+def _get_tile_range(const map_t[:, :] array, Py_ssize_t tile_size,
+                    cnp.float64_t[:, :] tile_min, cnp.float64_t[:, :] tile_max):
+
+    """Splits the squares swept by _get_perimeter into tiles of
+    tile_size by tile_size squares, starting from the first square that
+    is simulated, and stores the lowest and highest value of the pixels
+    that make up each tile's squares in tile_min and tile_max. These
+    include the row and column shared with the next tile, as the squares
+    on the edge of the tile use them. A contour at a level outside of
+    [tile_min, tile_max) can't cross any of the tile's squares.
+    """
+
+    cdef Py_ssize_t tile_row, tile_col, r, c, end_row, end_col
+    cdef cnp.float64_t low, high, value
+
+    with nogil:
+        for tile_row in range(tile_min.shape[0]):
+            end_row = min(3 + ((tile_row + 1) * tile_size), array.shape[0] - 4)
+            for tile_col in range(tile_min.shape[1]):
+                end_col = min(3 + ((tile_col + 1) * tile_size), array.shape[1] - 4)
+                low = INFINITY
+                high = -INFINITY
+                for r in range(3 + (tile_row * tile_size), end_row + 1):
+                    for c in range(3 + (tile_col * tile_size), end_col + 1):
+                        value = array[r, c]
+                        if value != value:
+                            # NaN corners make square cases that don't follow the range, so never skip the tile
+                            low = -INFINITY
+                            high = INFINITY
+                        if value < low:
+                            low = value
+                        if value > high:
+                            high = value
+                tile_min[tile_row, tile_col] = low
+                tile_max[tile_row, tile_col] = high
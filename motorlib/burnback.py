@@ -0,0 +1,168 @@
+"""This module contains the burnback table, which stores a grain's geometry as a function of regression depth."""
+
+import numpy as np
+
+class BurnbackTable():
+    """A burnback table samples a grain's surface area, volume, web left, port area, face area and core perimeter at
+    evenly spaced regression depths between ignition and burnout. The geometry of a grain doesn't change between
+    timesteps or simulations, so the table is built once during simulation setup and the simulation reads values back
+    out of it by linear interpolation instead of re-deriving them every step. Columns that don't apply to the grain
+    (the port of an end burner, for instance) are stored as None."""
+    def __init__(self, grain, regStep):
+        web = grain.getWebLeft(0)
+        numSamples = max(int(np.ceil(web / regStep)), 1) + 1
+        self.regression = np.linspace(0, web, numSamples)
+
+        self.acceptsArrays = grain.acceptsArrays
+        self.surfaceArea = self.sample(grain.getSurfaceAreaAtRegression)
+        self.volume = self.sample(grain.getVolumeAtRegression)
+        self.webLeft = self.sample(grain.getWebLeft)
+        self.portArea = None
+        if grain.getPortArea(0) is not None:
+            self.portArea = self.sample(grain.getPortArea)
+        self.faceArea = None
+        self.corePerimeter = None
+        if hasattr(grain, 'getCorePerimeter'):
+            self.faceArea = self.sample(grain.getFaceArea)
+            self.corePerimeter = self.sample(grain.getCorePerimeter)
+
+    def sample(self, func):
+        """Evaluates a function of regression depth at each of the table's regression depths and returns the results
+        as an array. Grains that accept arrays are evaluated at all of the depths in one call."""
+        if self.acceptsArrays:
+            return np.broadcast_to(func(self.regression), self.regression.shape).astype(float)
+        return np.array([float(func(reg)) for reg in self.regression])
+
+    def lookup(self, column, regDist):
+        """Linearly interpolates a column of the table at a regression depth. Depths past the end of the table return
+        the value at burnout."""
+        return np.interp(regDist, self.regression, column)
+
+    def getBurnoutDepth(self, webThres):
+        """Returns the regression depth at which the web left in the grain drops to 'webThres', which is where the
+        simulation considers the grain burned out."""
+        return float(np.interp(-webThres, -self.webLeft, self.regression))
+
+    def getSurfaceArea(self, regDist):
+        """Returns the surface area of the grain after it has regressed a distance of 'regDist'"""
+        return self.lookup(self.surfaceArea, regDist)
+
+    def getVolume(self, regDist):
+        """Returns the volume of propellant in the grain after it has regressed a distance of 'regDist'"""
+        return self.lookup(self.volume, regDist)
+
+    def getWebLeft(self, regDist):
+        """Returns the web left in the grain after it has regressed a distance of 'regDist'"""
+        return self.lookup(self.webLeft, regDist)
+
+    def getPortArea(self, regDist):
+        """Returns the port area of the grain after it has regressed a distance of 'regDist', or None if the grain
+        doesn't have a port"""
+        if self.portArea is None:
+            return None
+        return self.lookup(self.portArea, regDist)
+
+    def getFaceArea(self, regDist):
+        """Returns the face area of the grain after it has regressed a distance of 'regDist', or None if the grain
+        isn't perforated"""
+        if self.faceArea is None:
+            return None
+        return self.lookup(self.faceArea, regDist)
+
+    def getCorePerimeter(self, regDist):
+        """Returns the core perimeter of the grain after it has regressed a distance of 'regDist', or None if the grain
+        isn't perforated"""
+        if self.corePerimeter is None:
+            return None
+        return self.lookup(self.corePerimeter, regDist)
+
+class BurnbackTableStack():
+    """Holds the burnback tables of several grains end to end in flat arrays, so a column can be looked up for all of
+    the grains at once with a few array operations instead of a call to np.interp for each grain. Lookups take an array
+    of regression depths whose first axis has an element for each grain, and return an array of the same shape with
+    the same values that looking each depth up in its grain's table would. Columns that any of the grains don't have
+    are None."""
+    def __init__(self, tables):
+        self.tables = tables
+        lengths = np.array([len(table.regression) for table in tables], dtype=np.intp)
+        self.start = np.cumsum(lengths) - lengths
+        self.lastSample = lengths - 1
+        steps = np.array([table.regression[-1] for table in tables]) / (lengths - 1)
+        self.regStep = np.where(steps > 0, steps, 1) # Grains with no web have every sample at a depth of 0
+
+        self.regression = self.stack([table.regression for table in tables])
+        # The depth at the end of each interval, which is infinite past the end of each table
+        self.nextRegression = self.stack([np.append(table.regression[1:], np.inf) for table in tables])
+        # Each column is stored with the slope of each interval, and the slope past the end of the table is zero so
+        # depths past burnout get the value at the end of the table
+        self.columns = {}
+        for name in ('surfaceArea', 'volume', 'webLeft', 'portArea', 'faceArea', 'corePerimeter'):
+            columns = [getattr(table, name) for table in tables]
+            if len(columns) == 0 or any(column is None for column in columns):
+                self.columns[name] = None
+                continue
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slopes = [np.append(np.diff(column) / np.diff(table.regression), 0)
+                    for column, table in zip(columns, tables)]
+            self.columns[name] = (self.stack(columns), self.stack(slopes))
+
+    @staticmethod
+    def stack(arrays):
+        """Concatenates a list of arrays with one for each table into a single flat array."""
+        if len(arrays) == 0:
+            return np.zeros(0)
+        return np.concatenate(arrays)
+
+    def locate(self, regDist):
+        """Returns where each depth in 'regDist' falls in the tables, as a tuple of the index of the interval it is in
+        and how far into the interval it is. These can be passed to interpolate to look up several columns at the
+        same depths without locating them again."""
+        regDist = np.maximum(regDist, 0.0)
+        start, lastSample, regStep = self.start, self.lastSample, self.regStep
+        if regDist.ndim > 1:
+            shape = (-1,) + ((1,) * (regDist.ndim - 1))
+            start, lastSample, regStep = start.reshape(shape), lastSample.reshape(shape), regStep.reshape(shape)
+        # The tables are evenly spaced, so the interval each depth is in can be found directly. Rounding can put the
+        # guess one interval off, which the comparisons correct.
+        ind = start + np.minimum((regDist / regStep).astype(np.intp), lastSample)
+        ind -= self.regression[ind] > regDist
+        ind += self.nextRegression[ind] <= regDist
+        return ind, regDist - self.regression[ind]
+
+    def interpolate(self, name, location):
+        """Linearly interpolates the column called 'name' at depths found by locate, or returns None if any of the
+        tables are missing it."""
+        if self.columns[name] is None:
+            return None
+        column, slopes = self.columns[name]
+        ind, offset = location
+        return (slopes[ind] * offset) + column[ind]
+
+    def lookup(self, name, regDist):
+        """Linearly interpolates the column called 'name' at a regression depth for each grain. Depths past the end of
+        a grain's table return its value at burnout."""
+        return self.interpolate(name, self.locate(regDist))
+
+    def getBurnoutDepths(self, webThres):
+        """Returns an array of the regression depth at which each grain burns out, as in BurnbackTable."""
+        return np.array([table.getBurnoutDepth(webThres) for table in self.tables])
+
+    def getSurfaceArea(self, regDist):
+        """Returns the surface area of each grain after it has regressed a distance of 'regDist'"""
+        return self.lookup('surfaceArea', regDist)
+
+    def getVolume(self, regDist):
+        """Returns the volume of propellant in each grain after it has regressed a distance of 'regDist'"""
+        return self.lookup('volume', regDist)
+
+    def getWebLeft(self, regDist):
+        """Returns the web left in each grain after it has regressed a distance of 'regDist'"""
+        return self.lookup('webLeft', regDist)
+
+    def getPortArea(self, regDist):
+        """Returns the port area of each grain after it has regressed a distance of 'regDist'"""
+        return self.lookup('portArea', regDist)
+
+    def getFaceArea(self, regDist):
+        """Returns the face area of each grain after it has regressed a distance of 'regDist'"""
+        return self.lookup('faceArea', regDist)
@@ -1,4 +1,5 @@
-"""This module includes the geometry methods that openMotor uses in its calculations"""
+"""This module includes the geometry methods that openMotor uses in its calculations. The methods that take lengths
+work elementwise on arrays of them as well as on single values, so a whole burnback curve can be found at once."""
 
 import math
 from typing import Union
@@ -6,38 +7,42 @@ from typing import Union
 import numpy as np
 from numpy.typing import NDArray
 
+# A single value or an array of values, which the methods below handle elementwise
+FloatOrArray = Union[float, NDArray[np.float64]]
 
-def circleArea(dia: float) -> float:
+
+def circleArea(dia: FloatOrArray) -> FloatOrArray:
     """Returns the area of a circle with diameter dia"""
     return ((dia / 2) ** 2) * math.pi
 
 
-def circlePerimeter(dia: float) -> float:
+def circlePerimeter(dia: FloatOrArray) -> FloatOrArray:
     """Returns the perimeter (circumference) of a circle with diameter dia"""
     return dia * math.pi
 
 
-def circleDiameterFromArea(area: float) -> float:
+def circleDiameterFromArea(area: FloatOrArray) -> FloatOrArray:
     """Returns the diameter of a circle with area 'area'"""
     return 2 * ((area / math.pi) ** 0.5)
 
 
-def tubeArea(dia: float, height: int) -> float:
+def tubeArea(dia: FloatOrArray, height: FloatOrArray) -> FloatOrArray:
     """Returns the surface area of a tube (cylinder without endcaps) with diameter 'dia' and height 'height'"""
     return dia * math.pi * height
 
 
-def cylinderArea(dia: float, height: int) -> float:
+def cylinderArea(dia: FloatOrArray, height: FloatOrArray) -> FloatOrArray:
     """Returns the surface area of a cylinder with diameter 'dia' and height 'height'"""
     return (2 * circleArea(dia)) + (tubeArea(dia, height))
 
 
-def cylinderVolume(dia: float, height: int) -> float:
+def cylinderVolume(dia: FloatOrArray, height: FloatOrArray) -> FloatOrArray:
     """Returns the volume of a cylinder with diameter 'dia' and height 'height'"""
     return height * circleArea(dia)
 
 
-def frustumLateralSurfaceArea(diameterA: int, diameterB: int, length: int) -> float:
+def frustumLateralSurfaceArea(diameterA: FloatOrArray, diameterB: FloatOrArray,
+                              length: FloatOrArray) -> FloatOrArray:
     """Returns the surface area of a frustum (truncated cone) with end diameters A and B and length 'length'"""
     radiusA = diameterA / 2
     radiusB = diameterB / 2
@@ -46,7 +51,7 @@ def frustumLateralSurfaceArea(diameterA: int, diameterB: int, length: int) -> fl
     )
 
 
-def frustumVolume(diameterA: int, diameterB: int, length: int) -> float:
+def frustumVolume(diameterA: FloatOrArray, diameterB: FloatOrArray, length: FloatOrArray) -> FloatOrArray:
     """Returns the volume of a frustum (truncated cone) with end diameters A and B and length 'length'"""
     radiusA = diameterA / 2
     radiusB = diameterB / 2
@@ -54,13 +59,13 @@ def frustumVolume(diameterA: int, diameterB: int, length: int) -> float:
 
 
 def splitFrustum(
-    diameterA: int, diameterB: int, length: int, splitPosition: int
-) -> tuple[tuple[int, float, int], tuple[float, int, int]]:
+    diameterA: FloatOrArray, diameterB: FloatOrArray, length: FloatOrArray, splitPosition: FloatOrArray
+) -> tuple[tuple[FloatOrArray, FloatOrArray, FloatOrArray], tuple[FloatOrArray, FloatOrArray, FloatOrArray]]:
     """Takes in info about a frustum (truncated cone) and a position measured from the "diameterA" and returns
     a tuple of frustums representing the two halves of the original frustum if it were split on the plane at
     distance "position" from the face with diameter "diameterA"
     """
-    splitDiameter: float = diameterA + (diameterB - diameterA) * (
+    splitDiameter: FloatOrArray = diameterA + (diameterB - diameterA) * (
         splitPosition / length
     )
     return (diameterA, splitDiameter, splitPosition), (
@@ -1,6 +1,8 @@
 """This module includes the base classes from which all grain classes should inherit. None of these objects
 should be instantiated directly."""
 
+import threading
+import weakref
 from abc import abstractmethod
 
 import numpy as np
@@ -10,17 +12,73 @@ from scipy.signal import savgol_filter
 from scipy import interpolate
 
 from . import geometry
+from .burnback import BurnbackTable
+from . import mapCache
 from .simResult import SimAlert, SimAlertLevel, SimAlertType
 from .properties import FloatProperty, EnumProperty, PropertyCollection
 
+def fastMarchingDistance(image, cellSize, dtype):
+    """Returns the distance from each unmasked pixel of 'image' to the nearest pixel with a value of 0, found with the
+    fast marching method. The distances are returned as 'dtype', but skfmm always works in double precision."""
+    return skfmm.distance(image, dx=cellSize).astype(dtype, copy=False)
+
+def distanceTransform(image, cellSize, dtype):
+    """Returns the exact euclidean distance from the center of each unmasked pixel of 'image' to the center of the
+    nearest pixel with a value of 0, as 'dtype'. The grain is a disk, which is convex, so the shortest path to the core
+    never leaves it and the masked area outside of the casting tube doesn't have to be routed around."""
+    # Masked pixels aren't part of the grain, so they can't be part of the core either
+    mask = np.ma.getmaskarray(image)
+    propellant = np.logical_or(np.ma.getdata(image) != 0, mask)
+    if np.all(propellant):
+        raise ValueError('The core map contains no core')
+    return np.ma.MaskedArray(mathlib.distance_transform(propellant, scale=cellSize, dtype=dtype), mask)
+
+# The methods that regression maps can be generated with, keyed by the names in the motor config
+distanceMethods = {
+    'Fast Marching': fastMarchingDistance,
+    'Distance Transform': distanceTransform
+}
+
+class MapGrid():
+    """The coordinates and casting tube mask of a regression map with a dimension of 'mapDim'. These only depend on the
+    dimension of the map, so every FMM grain of that size shares one instance from getMapGrid rather than building its
+    own. The arrays are read-only so no grain can change them out from under the others."""
+    def __init__(self, mapDim):
+        self.mapDim = mapDim
+        # Averaging with the reversed coordinates makes them exactly symmetric about 0, so symmetric cores give
+        # symmetric maps
+        coords = np.linspace(-1, 1, mapDim)
+        coords = (coords - coords[::-1]) / 2
+        self.mapX, self.mapY = np.meshgrid(coords, coords, sparse=True)
+        self.mask = self.mapX**2 + self.mapY**2 > 1
+        for array in (self.mapX, self.mapY, self.mask):
+            array.setflags(write=False)
+
+_mapGrids = weakref.WeakValueDictionary()
+_mapGridLock = threading.Lock()
+
+def getMapGrid(mapDim):
+    """Returns the MapGrid for maps with a dimension of 'mapDim', building it if no grain is holding on to one. Grids are
+    only kept alive by the grains that reference them, so they are freed once the last grain of that size goes away."""
+    with _mapGridLock:
+        grid = _mapGrids.get(mapDim)
+        if grid is None:
+            grid = MapGrid(mapDim)
+            _mapGrids[mapDim] = grid
+        return grid
+
 class Grain(PropertyCollection):
     """A basic propellant grain. This is the class that all grains inherit from. It provides a few properties and
     composed methods but otherwise it is up to the subclass to make a functional grain."""
     geomName = None
+    # Grains that set this take arrays of regression depths in their geometry methods and return arrays of the results,
+    # so a whole curve can be found in one call instead of one call per depth
+    acceptsArrays = False
     def __init__(self):
         super().__init__()
         self.props['diameter'] = FloatProperty('Diameter', 'm', 0, 1)
         self.props['length'] = FloatProperty('Length', 'm', 0, 3)
+        self.burnbackTable = None
 
     def getVolumeSlice(self, regDist, dRegDist):
         """Returns the amount of propellant volume consumed as the grain regresses from a distance of 'regDist' to
@@ -53,6 +111,19 @@ class Grain(PropertyCollection):
         """Uses the grain's mass flux method to return the max. Assumes that it will be at the port of the grain!"""
         return self.getMassFlux(massIn, dTime, regDist, dRegDist, self.getEndPositions(regDist)[1], density)
 
+    @classmethod
+    def getPeakMassFluxFunction(cls, grains, tables):
+        """Returns a function that finds the peak mass flux through each of 'grains', which are all instances of this
+        class, during a step of a simulation. 'tables' is a BurnbackTableStack of their burnback tables. The function
+        takes the mass flow into each grain, the timestep, the distance each grain has regressed and the additional
+        distance it will regress during the step, with arrays holding an element for each grain, and the density of the
+        propellant. It returns an array of the mass fluxes. By default it calls getPeakMassFlux on each grain, and grain
+        types that can find the mass flux of many grains at once override this."""
+        def getPeakMassFluxes(massIn, dTime, regDist, dRegDist, density):
+            return np.array([grain.getPeakMassFlux(grainMassIn, dTime, reg, dReg, density)
+                for grain, grainMassIn, reg, dReg in zip(grains, massIn, regDist, dRegDist)], dtype=float)
+        return getPeakMassFluxes
+
     @abstractmethod
     def getEndPositions(self, regDist):
         """Returns the positions of the grain ends relative to the original (unburned) grain top"""
@@ -71,9 +142,26 @@ class Grain(PropertyCollection):
         """Returns a short string describing the grain, formatted using the units that is passed in"""
         return 'Length: {}'.format(self.props['length'].dispFormat(lengthUnit))
 
-    @abstractmethod
     def simulationSetup(self, config):
-        """Do anything needed to prepare this grain for simulation"""
+        """Do anything needed to prepare this grain for simulation. Subclasses should do their own preparation and then
+        call the superclass method, which samples the prepared geometry into the grain's burnback table. The table has
+        one sample per half pixel of the grain's regression map."""
+        regStep = 0.5 * self.props['diameter'].getValue() / config.getProperty('mapDim')
+        self.burnbackTable = BurnbackTable(self, regStep)
+
+    def getSetupKey(self):
+        """Returns a key that is equal for two grains exactly when they are the same type with the same properties, so
+        the geometry that simulationSetup prepares for one of them is also correct for the other."""
+        return (type(self), repr(sorted(self.getProperties().items())))
+
+    def shareSimulationSetup(self, grain):
+        """Makes this grain use the geometry that simulationSetup prepared for 'grain', which must have the same setup
+        key, instead of preparing its own. The arrays and burnback table are shared rather than copied, which is safe
+        because nothing changes them during a simulation. Regression state isn't stored on grains, so each grain still
+        regresses separately."""
+        for name, value in vars(grain).items():
+            if name != 'props':
+                setattr(self, name, value)
 
     def getGeometryErrors(self):
         """Returns a list of simAlerts that detail any issues with the geometry of the grain. Errors should be
@@ -138,7 +226,7 @@ class PerforatedGrain(Grain):
         if self.props['inhibitedEnds'].getValue() == 'Both':
             return wallLeft
         lengthLeft = self.getRegressedLength(regDist)
-        return min(lengthLeft, wallLeft)
+        return np.minimum(lengthLeft, wallLeft)
 
     def getSurfaceAreaAtRegression(self, regDist):
         faceArea = self.getFaceArea(regDist)
@@ -190,6 +278,30 @@ class PerforatedGrain(Grain):
         massFlow = massIn + (self.getVolumeSlice(regDist, dRegDist) * density / dTime)
         return massFlow / geometry.circleArea(diameter)
 
+    @classmethod
+    def getPeakMassFluxFunction(cls, grains, tables):
+        # Subclasses that change how the mass flux is calculated fall back on calling their own methods for each grain
+        if (cls.getPeakMassFlux is not Grain.getPeakMassFlux or cls.getMassFlux is not PerforatedGrain.getMassFlux
+                or cls.getEndPositions is not PerforatedGrain.getEndPositions):
+            return super().getPeakMassFluxFunction(grains, tables)
+
+        inhibitedEnds = [grain.props['inhibitedEnds'].getValue() for grain in grains]
+        length = np.array([grain.props['length'].getValue() for grain in grains])
+        topExposed = np.array([ends in ('Neither', 'Bottom') for ends in inhibitedEnds])
+        bottomExposed = np.array([ends in ('Neither', 'Top') for ends in inhibitedEnds])
+
+        # This is getMassFlux at the aft end of each grain, with the areas read from the burnback tables
+        def getPeakMassFluxes(massIn, dTime, regDist, dRegDist, density):
+            forwardEnd = regDist * topExposed
+            aftEnd = length - (regDist * bottomExposed)
+            location = tables.locate(regDist + dRegDist)
+            top = np.where(topExposed, tables.interpolate('faceArea', location) * dRegDist * density, 0)
+            countedCoreLength = np.where(topExposed, aftEnd - (forwardEnd + dRegDist), aftEnd)
+            portArea = tables.interpolate('portArea', location)
+            core = ((portArea * countedCoreLength) - (tables.getPortArea(regDist) * countedCoreLength)) * density
+            return (massIn + ((top + core) / dTime)) / portArea
+        return getPeakMassFluxes
+
     @abstractmethod
     def getFaceImage(self, mapDim):
         """Returns an image of the grain's cross section, with resolution (mapDim, mapDim)."""
@@ -206,14 +318,22 @@ class FmmGrain(PerforatedGrain):
     """A grain that uses the fast marching method to calculate its regression. All a subclass has to do is
     provide an implementation of generateCoreMap that makes an image of a cross section of the grain."""
     geomName = 'fmmGrain'
+    # Properties that don't change the core map, so grains that only differ in them can share a cached regression map
+    mapIndependentProps = ('length', 'inhibitedEnds')
+    # Regression maps with a dimension past this are stored in single precision to keep them from using gigabytes of
+    # memory. Smaller maps are stored in double precision, as they always have been.
+    singlePrecisionMapDim = 2000
     def __init__(self):
         super().__init__()
         self.mapDim = 1001
+        self.mapGrid = None
         self.mapX, self.mapY = None, None
         self.mask = None
         self.coreMap = None
         self.regressionMap = None
+        self.regressionTiles = None
         self.faceArea = None
+        self.corePerimeter = None
 
     def normalize(self, value):
         """Transforms real unit quantities into self.mapX, self.mapY coordinates. For use in indexing into the
@@ -242,14 +362,50 @@ class FmmGrain(PerforatedGrain):
         return (self.props['diameter'].getValue() ** 2) * (value / (self.mapDim ** 2))
 
     def initGeometry(self, mapDim):
-        """Set up an empty core map and reset the regression map. Takes in the dimension of both maps."""
+        """Set up an empty core map and reset the regression map. Takes in the dimension of both maps. self.mapX is a
+        single row and self.mapY is a single column, which broadcast against each other to cover the whole map without
+        storing a full copy of each coordinate. They and self.mask come from the MapGrid shared by all grains with the
+        same map dimension, so they are read-only. The core map is stored as one byte per pixel."""
         if mapDim < 64:
             raise ValueError('Map dimension must be 64 or larger to get good results')
         self.mapDim = mapDim
-        self.mapX, self.mapY = np.meshgrid(np.linspace(-1, 1, self.mapDim), np.linspace(-1, 1, self.mapDim))
-        self.mask = self.mapX**2 + self.mapY**2 > 1
-        self.coreMap = np.ones_like(self.mapX)
+        self.mapGrid = getMapGrid(self.mapDim)
+        self.mapX, self.mapY = self.mapGrid.mapX, self.mapGrid.mapY
+        self.mask = self.mapGrid.mask
+        self.coreMap = np.ones((self.mapDim, self.mapDim), dtype=np.uint8)
         self.regressionMap = None
+        self.regressionTiles = None
+
+    def getMapSymmetry(self):
+        """Returns a tuple of two bools, which are true if the core map is mirror symmetric from top to bottom (across
+        the X axis) and from left to right (across the Y axis) respectively. Subclasses with symmetric cores should
+        override this, as the fast marching method then only has to be run on the half or quarter of the map that
+        isn't a reflection of the rest."""
+        return (False, False)
+
+    def getSymmetricRegion(self, image):
+        """Returns the part of 'image' that the rest of it can be mirrored from, which is the bottom half and/or the
+        right half if the core map is symmetric across the X and/or Y axis. The middle row or column is included when
+        the map dimension is odd."""
+        mirrorRows, mirrorCols = self.getMapSymmetry()
+        if mirrorRows:
+            image = image[self.mapDim // 2:, :]
+        if mirrorCols:
+            image = image[:, self.mapDim // 2:]
+        # skfmm gives wrong distances for arrays that aren't contiguous, which slicing off columns leaves
+        return image.copy()
+
+    def mirrorSymmetricRegion(self, region):
+        """Rebuilds a full map from a region returned by getSymmetricRegion by mirroring it across the axes that the
+        core map is symmetric across."""
+        mirrorRows, mirrorCols = self.getMapSymmetry()
+        # With an odd map dimension, the axis runs through the middle row or column, so it isn't repeated
+        skip = self.mapDim % 2
+        if mirrorRows:
+            region = np.ma.concatenate((region[skip:, :][::-1, :], region), axis=0)
+        if mirrorCols:
+            region = np.ma.concatenate((region[:, skip:][:, ::-1], region), axis=1)
+        return region
 
     @abstractmethod
     def generateCoreMap(self):
@@ -258,32 +414,101 @@ class FmmGrain(PerforatedGrain):
 
     def simulationSetup(self, config):
         mapSize = config.getProperty("mapDim")
+        distanceMethod = config.getProperty('distanceMethod')
 
         self.initGeometry(mapSize)
         self.generateCoreMap()
-        self.generateRegressionMap()
-
-    def generateRegressionMap(self):
-        """Uses the fast marching method to generate an image of how the grain regresses from the core map. The map
-        is stored under self.regressionMap."""
+        # The regression map is only generated if the same cross section hasn't been simulated before
+        cacheKey = mapCache.regressionMapCache.getKey(self, mapSize, distanceMethod)
+        cached = mapCache.regressionMapCache.get(cacheKey)
+        if cached is not None:
+            try:
+                self.setRegressionMapArrays(cached)
+            except KeyError: # Entries that are missing arrays are replaced with a newly generated map
+                cached = None
+        if cached is None:
+            self.generateRegressionMap(distanceMethod)
+            self.generateCorePerimeter()
+            mapCache.regressionMapCache.put(cacheKey, self.getRegressionMapArrays())
+        super().simulationSetup(config)
+
+    def generateRegressionMap(self, distanceMethod='Fast Marching'):
+        """Generates an image of how the grain regresses from the core map, using the method in 'distanceMethods' with
+        the name 'distanceMethod' to find the distance from each pixel to the core. The map is stored under
+        self.regressionMap, along with an index of the range of regression depths in each tile of it under
+        self.regressionTiles, which lets contours of the map skip the tiles they can't pass through. If the core is
+        symmetric, the distances are only found on the part of the map that the rest is a reflection of. The edges of
+        the array don't let the front through, just like the axes of symmetry, so this finds the same distances."""
         masked = np.ma.MaskedArray(self.coreMap, self.mask)
         cellSize = 1 / self.mapDim
-        self.regressionMap = skfmm.distance(masked, dx=cellSize) * 2
-        maxDist = np.amax(self.regressionMap)
+        dtype = np.float64 if self.mapDim <= self.singlePrecisionMapDim else np.float32
+        region = distanceMethods[distanceMethod](self.getSymmetricRegion(masked), cellSize, dtype)
+        region *= 2
+        self.regressionMap = self.mirrorSymmetricRegion(region)
+        self.regressionTiles = mathlib.TileIndex(self.regressionMap)
+        maxDist = float(np.amax(self.regressionMap))
         self.wallWeb = self.unNormalize(maxDist)
-        faceArea = []
-        polled = []
-        valid = np.logical_not(self.mask)
-        for i in range(int(maxDist * self.mapDim) + 2):
-            polled.append(i / self.mapDim)
-            faceArea.append(self.mapToArea(np.count_nonzero(np.logical_and(self.regressionMap > (i / self.mapDim), valid))))
-        self.faceArea = savgol_filter(faceArea, 31, 5)
+        polled = np.arange(int(maxDist * self.mapDim) + 2) / self.mapDim
+        self.faceArea = savgol_filter(self.mapToArea(self.countPixelsPast(polled)), 31, 5)
+        self.faceAreaFunc = interpolate.interp1d(polled, self.faceArea)
+
+    def countPixelsPast(self, depths):
+        """Returns the number of valid pixels in the regression map that regress further than each of 'depths', which
+        must be sorted. Each pixel is binned by how many of the depths it is past, and the bins are then summed from the
+        deepest down, so the map is only read once. This is done a few rows at a time to avoid making copies of the
+        whole map."""
+        counts = np.zeros(len(depths) + 1, dtype=np.int64)
+        data = np.ma.getdata(self.regressionMap)
+        # Pixels a whole number of pixels from the core land exactly on the depths, so they have to be compared at the
+        # precision of the map to be rounded the same way
+        depths = np.asarray(depths, dtype=data.dtype)
+        for start in range(0, self.mapDim, 256):
+            rows = data[start:start + 256][np.logical_not(self.mask[start:start + 256])]
+            counts += np.bincount(np.searchsorted(depths, rows, side='left'), minlength=len(depths) + 1)
+        return np.cumsum(counts[::-1])[::-1][1:]
+
+    def generateCorePerimeter(self):
+        """Finds the perimeter of the core at each of the regression depths that the face area was polled at, so the
+        regression map doesn't have to be contoured again during the simulation. All depths are found in a single sweep
+        over the regression map. Must be called after the regression map has been generated."""
+        polled = np.arange(len(self.faceArea)) / self.mapDim
+        # As with the face area, the depths are rounded to the precision of the map so pixels that land on them do so
+        # in either precision
+        levels = polled.astype(self.regressionMap.dtype)
+        perimeters = mathlib.find_perimeters(self.regressionMap, levels, tile_index=self.regressionTiles)
+        self.corePerimeter = self.mapToLength(perimeters)
+        self.corePerimeterFunc = interpolate.interp1d(polled, self.corePerimeter)
+
+    def getRegressionMapArrays(self):
+        """Returns a dictionary of the arrays generated from the regression map, for storing in the regression map
+        cache."""
+        return {
+            'regressionMap': np.ma.getdata(self.regressionMap),
+            'regressionMask': np.ma.getmaskarray(self.regressionMap),
+            'wallWeb': np.array(self.wallWeb),
+            'faceArea': self.faceArea,
+            'corePerimeter': self.corePerimeter
+        }
+
+    def setRegressionMapArrays(self, arrays):
+        """Restores the regression map and the values generated from it from a dictionary returned by
+        getRegressionMapArrays, in place of generating them."""
+        self.regressionMap = np.ma.MaskedArray(arrays['regressionMap'], arrays['regressionMask'])
+        self.regressionTiles = mathlib.TileIndex(self.regressionMap)
+        self.wallWeb = float(arrays['wallWeb'])
+        polled = np.arange(len(arrays['faceArea'])) / self.mapDim
+        self.faceArea = arrays['faceArea']
         self.faceAreaFunc = interpolate.interp1d(polled, self.faceArea)
+        self.corePerimeter = arrays['corePerimeter']
+        self.corePerimeterFunc = interpolate.interp1d(polled, self.corePerimeter)
 
     def getCorePerimeter(self, regDist):
         mapDist = self.normalize(regDist)
-        return self.mapToLength(mathlib.find_perimeter(self.regressionMap, mapDist)[0])
-    
+        index = int(mapDist * self.mapDim)
+        if index >= len(self.corePerimeter) - 1:
+            return 0 # Past burnout
+        return self.corePerimeterFunc(mapDist)
+
     def getFaceArea(self, regDist):
         mapDist = self.normalize(regDist)
         index = int(mapDist * self.mapDim)
@@ -321,7 +546,8 @@ class FmmGrain(PerforatedGrain):
                 contourLengths[dist] = 0
                 layerContours = mathlib.find_perimeter(self.regressionMap, dist,
                                                        fully_connected='low',
-                                                       including_contours=True)[1]
+                                                       including_contours=True,
+                                                       tile_index=self.regressionTiles)[1]
                 for contour in layerContours:
                     contours[-1].append(geometry.clean(contour, self.mapDim, 3))
                     contourLengths[dist] += geometry.length(contour, self.mapDim)
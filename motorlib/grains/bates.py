@@ -4,7 +4,7 @@ import numpy as np
 import skfmm
 import mathlib
 
-from ..grain import PerforatedGrain
+from ..grain import PerforatedGrain, getMapGrid
 from .. import geometry
 from ..simResult import SimAlert, SimAlertLevel, SimAlertType
 from ..properties import FloatProperty
@@ -13,12 +13,14 @@ class BatesGrain(PerforatedGrain):
     """The BATES grain has a simple cylindrical core. This type is not an FMM grain for performance reasons, as the
     calculations are easy enough to do manually."""
     geomName = "BATES"
+    acceptsArrays = True
     def __init__(self):
         super().__init__()
         self.props['coreDiameter'] = FloatProperty('Core Diameter', 'm', 0, 1)
 
     def simulationSetup(self, config):
         self.wallWeb = (self.props['diameter'].getValue() - self.props['coreDiameter'].getValue()) / 2
+        super().simulationSetup(config)
 
     def getCorePerimeter(self, regDist):
         return geometry.circlePerimeter(self.props['coreDiameter'].getValue() + (2 * regDist))
@@ -44,9 +46,10 @@ class BatesGrain(PerforatedGrain):
     # These two functions have a lot of code reuse, but it is worth it because making BATES an fmmGrain would make it
     # signficantly way slower
     def getFaceImage(self, mapDim):
-        mapX, mapY = np.meshgrid(np.linspace(-1, 1, mapDim), np.linspace(-1, 1, mapDim))
-        mask = mapX**2 + mapY**2 > 1
-        coreMap = np.ones_like(mapX)
+        grid = getMapGrid(mapDim)
+        mapX, mapY = grid.mapX, grid.mapY
+        mask = grid.mask
+        coreMap = np.ones((mapDim, mapDim))
 
         # Normalize core diameter
         coreRadius = (self.props['coreDiameter'].getValue() / (0.5 * self.props['diameter'].getValue())) / 2
@@ -70,11 +73,13 @@ class BatesGrain(PerforatedGrain):
             regressionMap = regressionMap[:, :].copy()
             if coreBlack:
                 regressionMap[np.where(masked == 0)] = regmax # Make the core black
+            tileIndex = mathlib.TileIndex(regressionMap)
 
             for dist in np.linspace(0, regmax, numContours):
                 contours.append([])
                 contourLengths[dist] = 0
-                layerContours = mathlib.find_perimeter(regressionMap, dist, fully_connected='high', including_contours=True)[1]
+                layerContours = mathlib.find_perimeter(regressionMap, dist, fully_connected='high', including_contours=True,
+                                                       tile_index=tileIndex)[1]
                 for contour in layerContours:
                     contours[-1].append(contour)
                     contourLengths[dist] += geometry.length(contour, mapDim)
@@ -24,6 +24,9 @@ class CGrain(FmmGrain):
 
         self.coreMap[np.logical_and(np.abs(self.mapY) < slotWidth / 2, self.mapX > slotOffset)] = 0
 
+    def getMapSymmetry(self):
+        return (True, False)
+
     def getDetailsString(self, lengthUnit='m'):
         return 'Length: {}'.format(self.props['length'].dispFormat(lengthUnit))
 
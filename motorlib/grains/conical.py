@@ -2,6 +2,8 @@
 
 from math import atan, cos, tan
 
+import numpy as np
+
 from ..grain import Grain
 from .. import geometry
 from ..simResult import SimAlert, SimAlertLevel, SimAlertType
@@ -10,6 +12,7 @@ from ..properties import FloatProperty, EnumProperty
 class ConicalGrain(Grain):
     """A conical grain is similar to a BATES grain except it has different core diameters at each end."""
     geomName = "Conical"
+    acceptsArrays = True
     def __init__(self):
         super().__init__()
         self.props['forwardCoreDiameter'] = FloatProperty('Forward Core Diameter', 'm', 0, 1)
@@ -52,13 +55,9 @@ class ConicalGrain(Grain):
         # This is case where the larger core diameter has grown beyond the casting tube diameter. Once this happens,
         # the diameter of the large end of the core is clamped at the grain diameter and the length is changed to keep
         # the angle constant, which accounts for the regression of the grain at the major end.
-        if regCoreMajorDiameter >= grainDiameter:
-            majorFrustumDiameter = grainDiameter
-
         # If the large end of the core hasn't reached the casting tube, we know that the small end hasn't either. In
         # this case we just return the current core diameters, and a length calculated from the inhibitor configuration
-        else:
-            majorFrustumDiameter = regCoreMajorDiameter
+        majorFrustumDiameter = np.minimum(regCoreMajorDiameter, grainDiameter)
 
         # Minor frustum diameter is never clamped (the point when it would clamp is burnout), so we can use it to determine
         # the length of the grain at any regression depth
@@ -94,12 +93,12 @@ class ConicalGrain(Grain):
     def getWebLeft(self, regDist):
         """Returns the shortest distance the grain has to regress to burn out"""
         forwardDiameter, aftDiameter, length = self.getFrustumInfo(regDist)
-        wallLeft = (self.props['diameter'].getValue() - min(aftDiameter, forwardDiameter)) / 2
+        wallLeft = (self.props['diameter'].getValue() - np.minimum(aftDiameter, forwardDiameter)) / 2
 
         if self.props['inhibitedEnds'].getValue() == 'Both':
             return wallLeft
 
-        return min(wallLeft, length)
+        return np.minimum(wallLeft, length)
 
     def getMassFlow(self, massIn, dTime, regDist, dRegDist, position, density):
         """Returns the mass flow at a point along the grain. Takes in the mass flow into the grain, a timestep, the
@@ -166,15 +165,17 @@ class ConicalGrain(Grain):
             coreMajorDiameter, coreMinorDiameter = aftCoreDiameter, forwardCoreDiameter
             major_exposed, minor_exposed = aft_exposed, forward_exposed
 
-        # Un-clamped major diameter        
-        if coreMajorDiameter < grainDiameter:
-            forward_regression, aft_regression = forward_exposed * regDist, aft_exposed * regDist
-            return forward_regression, originalLength - aft_regression
-        else:
-            minor_regression = minor_exposed * regDist
-            major_regression = (originalLength - currentLength) - minor_regression
-            forward_regression, aft_regression = (major_regression, minor_regression) if self.isCoreInverted() else (minor_regression, major_regression)
-            return forward_regression, originalLength - aft_regression
+        # Clamped major diameter
+        minor_regression = minor_exposed * regDist
+        major_regression = (originalLength - currentLength) - minor_regression
+        forward_regression, aft_regression = (major_regression, minor_regression) if self.isCoreInverted() else (minor_regression, major_regression)
+
+        # Un-clamped major diameter. Both cases are found and picked between per element so this works on arrays of
+        # depths, and indexing with () turns the result back into a scalar for scalar depths.
+        unclamped = coreMajorDiameter < grainDiameter
+        forward_regression = np.where(unclamped, forward_exposed * regDist, forward_regression)[()]
+        aft_regression = np.where(unclamped, aft_exposed * regDist, aft_regression)[()]
+        return forward_regression, originalLength - aft_regression
 
     def getPortArea(self, regDist):
         """Returns the area of the grain's port when it has regressed a distance of 'regDist'"""
@@ -186,10 +187,6 @@ class ConicalGrain(Grain):
         """Returns a short string describing the grain, formatted using the units that is passed in"""
         return 'Length: {}'.format(self.props['length'].dispFormat(lengthUnit))
 
-    def simulationSetup(self, config):
-        """Do anything needed to prepare this grain for simulation"""
-        return None
-
     def getGeometryErrors(self):
         errors = super().getGeometryErrors()
         if self.props['aftCoreDiameter'].getValue() == self.props['forwardCoreDiameter'].getValue():
@@ -17,7 +17,10 @@ class DGrain(FmmGrain):
     def generateCoreMap(self):
         slotOffset = self.normalize(self.props['slotOffset'].getValue())
 
-        self.coreMap[self.mapX > slotOffset] = 0
+        self.coreMap[:, self.mapX[0] > slotOffset] = 0
+
+    def getMapSymmetry(self):
+        return (True, False)
 
     def getDetailsString(self, lengthUnit='m'):
         return 'Length: {}, Slot offset: {}'.format(self.props['length'].dispFormat(lengthUnit),
@@ -6,19 +6,18 @@ from ..import geometry
 class EndBurningGrain(Grain):
     """Defines an end-burning grain, which is a simple cylinder that burns on one end."""
     geomName = 'End Burner'
+    acceptsArrays = True
 
     def getSurfaceAreaAtRegression(self, regDist):
         diameter = self.props['diameter'].getValue()
-        return geometry.circleArea(diameter)
+        # The face doesn't change size as it regresses. Adding zero times the depth gives an array for arrays of depths.
+        return geometry.circleArea(diameter) + (0 * regDist)
 
     def getVolumeAtRegression(self, regDist):
         bLength = self.getRegressedLength(regDist)
         diameter = self.props['diameter'].getValue()
         return geometry.cylinderVolume(diameter, bLength)
 
-    def simulationSetup(self, config):
-        pass
-
     def getWebLeft(self, regDist):
         return self.getRegressedLength(regDist)
 
@@ -44,7 +44,10 @@ class Finocyl(FmmGrain):
             far = (vect1 * self.mapX) - (vect0 * self.mapY) < finEnd
             ends = np.logical_and(far, near)
             # For inverted fins, we are filling propellant back in. For regular fins, we are removing it.
-            self.coreMap[np.logical_and(vect, ends)] = invertedFins
+            self.coreMap[np.logical_and(vect, ends)] = 1 if invertedFins else 0
+
+    def getMapSymmetry(self):
+        return (self.props['numFins'].getValue() % 2 == 0, True)
 
     def getDetailsString(self, lengthUnit='m'):
         return 'Length: {}, Core: {}, Fins: {}'.format(self.props['length'].dispFormat(lengthUnit),
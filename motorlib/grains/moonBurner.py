@@ -19,6 +19,9 @@ class MoonBurner(FmmGrain):
         # Open up core
         self.coreMap[(self.mapX - coreOffset)**2 + self.mapY**2 < coreRadius**2] = 0
 
+    def getMapSymmetry(self):
+        return (True, False)
+
     def getDetailsString(self, lengthUnit='m'):
         return 'Length: {}, Core: {}'.format(self.props['length'].dispFormat(lengthUnit),
                                              self.props['coreDiameter'].dispFormat(lengthUnit))
@@ -4,7 +4,7 @@ import numpy as np
 import skfmm
 import mathlib
 
-from ..grain import PerforatedGrain
+from ..grain import PerforatedGrain, getMapGrid
 from .. import geometry
 from ..simResult import SimAlert, SimAlertLevel, SimAlertType
 from ..properties import FloatProperty
@@ -13,6 +13,7 @@ class RodTubeGrain(PerforatedGrain):
     """Tbe rod and tube grain resembles a BATES grain except that it features a fully-uninhibited rod of propellant in
     the center of the core."""
     geomName = "Rod and Tube"
+    acceptsArrays = True
     def __init__(self):
         super().__init__()
         self.props['coreDiameter'] = FloatProperty('Core Diameter', 'm', 0, 1)
@@ -25,32 +26,23 @@ class RodTubeGrain(PerforatedGrain):
         self.tubeWeb = (self.props['diameter'].getValue() - self.props['coreDiameter'].getValue()) / 2
         self.rodWeb = (self.props['rodDiameter'].getValue() - self.props['supportDiameter'].getValue()) / 2
         self.wallWeb = max(self.tubeWeb, self.rodWeb)
+        super().simulationSetup(config)
 
+    # The tube and rod each stop contributing once they burn out, which is done by multiplying by whether they are still
+    # burning so it works on each element of an array of depths
     def getCorePerimeter(self, regDist):
-        if regDist < self.tubeWeb:
-            tubePerimeter = geometry.circlePerimeter(self.props['coreDiameter'].getValue() + (2 * regDist))
-        else:
-            tubePerimeter = 0
-        if regDist < self.rodWeb:
-            rodPerimeter = geometry.circlePerimeter(self.props['rodDiameter'].getValue() - (2 * regDist))
-        else:
-            rodPerimeter = 0
-        return tubePerimeter + rodPerimeter
+        tubePerimeter = geometry.circlePerimeter(self.props['coreDiameter'].getValue() + (2 * regDist))
+        rodPerimeter = geometry.circlePerimeter(self.props['rodDiameter'].getValue() - (2 * regDist))
+        return (tubePerimeter * (regDist < self.tubeWeb)) + (rodPerimeter * (regDist < self.rodWeb))
 
     def getFaceArea(self, regDist):
-        if regDist < self.tubeWeb:
-            outer = geometry.circleArea(self.props['diameter'].getValue())
-            inner = geometry.circleArea(self.props['coreDiameter'].getValue() + (2 * regDist))
-            tubeArea = outer - inner
-        else:
-            tubeArea = 0
-        if regDist < self.rodWeb:
-            outer = geometry.circleArea(self.props['rodDiameter'].getValue() - (2 * regDist))
-            inner = geometry.circleArea(self.props['supportDiameter'].getValue())
-            rodArea = outer - inner
-        else:
-            rodArea = 0
-        return tubeArea + rodArea
+        outer = geometry.circleArea(self.props['diameter'].getValue())
+        inner = geometry.circleArea(self.props['coreDiameter'].getValue() + (2 * regDist))
+        tubeArea = outer - inner
+        outer = geometry.circleArea(self.props['rodDiameter'].getValue() - (2 * regDist))
+        inner = geometry.circleArea(self.props['supportDiameter'].getValue())
+        rodArea = outer - inner
+        return (tubeArea * (regDist < self.tubeWeb)) + (rodArea * (regDist < self.rodWeb))
 
     def getDetailsString(self, lengthUnit='m'):
         return 'Length: {}, Core: {}, Rod: {}'.format(self.props['length'].dispFormat(lengthUnit),
@@ -77,9 +69,10 @@ class RodTubeGrain(PerforatedGrain):
         rodRadius = (self.props['rodDiameter'].getValue() / (0.5 * self.props['diameter'].getValue())) / 2
         supportRadius = (self.props['supportDiameter'].getValue() / (0.5 * self.props['diameter'].getValue())) / 2
 
-        mapX, mapY = np.meshgrid(np.linspace(-1, 1, mapDim), np.linspace(-1, 1, mapDim))
-        mask = np.logical_or(mapX**2 + mapY**2 > 1, mapX**2 + mapY**2 < supportRadius ** 2)
-        coreMap = np.ones_like(mapX)
+        grid = getMapGrid(mapDim)
+        mapX, mapY = grid.mapX, grid.mapY
+        mask = np.logical_or(grid.mask, mapX**2 + mapY**2 < supportRadius ** 2)
+        coreMap = np.ones((mapDim, mapDim))
 
         # Open up core
         coreMap[mapX ** 2 + mapY ** 2 < coreRadius ** 2] = 0
@@ -103,11 +96,13 @@ class RodTubeGrain(PerforatedGrain):
             regressionMap = regressionMap[:, :].copy()
             if coreBlack:
                 regressionMap[np.where(masked == 0)] = regmax # Make the core black
+            tileIndex = mathlib.TileIndex(regressionMap)
 
             for dist in np.linspace(0, regmax, numContours):
                 contours.append([])
                 contourLengths[dist] = 0
-                layerContours = mathlib.find_perimeter(regressionMap, dist, fully_connected='high', including_contours=True)[1]
+                layerContours = mathlib.find_perimeter(regressionMap, dist, fully_connected='high', including_contours=True,
+                                                       tile_index=tileIndex)[1]
                 for contour in layerContours:
                     contours[-1].append(contour)
                     contourLengths[dist] += geometry.length(contour, mapDim)
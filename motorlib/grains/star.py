@@ -31,6 +31,9 @@ class StarGrain(FmmGrain):
             near = comp1*self.mapX - comp0*self.mapY > -0.025
             self.coreMap[np.logical_and(vect, near)] = 0
 
+    def getMapSymmetry(self):
+        return (self.props['numPoints'].getValue() % 2 == 0, True)
+
     def getDetailsString(self, lengthUnit='m'):
         return 'Length: {}, Points: {}'.format(self.props['length'].dispFormat(lengthUnit),
                                                self.props['numPoints'].getValue())
@@ -21,6 +21,9 @@ class XCore(FmmGrain):
         self.coreMap[np.logical_and(np.abs(self.mapY) < slotWidth/2, np.abs(self.mapX) < slotLength)] = 0
         self.coreMap[np.logical_and(np.abs(self.mapX) < slotWidth/2, np.abs(self.mapY) < slotLength)] = 0
 
+    def getMapSymmetry(self):
+        return (True, True)
+
     def getDetailsString(self, lengthUnit='m'):
         return 'Length: {}, Slots: {} by {}'.format(self.props['length'].dispFormat(lengthUnit),
                                                     self.props['slotWidth'].dispFormat(lengthUnit),
@@ -0,0 +1,157 @@
+"""This module contains the regression map cache, which stores the results of running the fast marching method on a
+grain so they can be reused by later simulations of the same geometry."""
+
+import hashlib
+import os
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import platformdirs
+
+class RegressionMapCache():
+    """Stores the regression map of FMM grains and the values derived from it, keyed by a hash of everything that goes
+    into generating them. Entries are kept in memory for the most recently used geometries, and are also saved as
+    compressed .npz files in a directory on disk so they survive between sessions. Each tier has a limit on the number
+    of bytes it holds, past which the least recently used entries are evicted. Entries in memory are handed to every
+    grain that uses them without being copied, so their arrays are made read-only. The cache only ever speeds
+    simulations up, so any problems reading or writing the files on disk are ignored and the map is just generated
+    again."""
+
+    # Bump this whenever the way the cached arrays are generated changes, so old files are no longer used
+    formatVersion = 3
+
+    def __init__(self, path=None, memoryLimit=512 * (2 ** 20), diskLimit=256 * (2 ** 20)):
+        if path is None:
+            path = os.path.join(platformdirs.user_data_dir('openMotor', 'openMotor'), 'regressionMaps')
+        self.path = path
+        self.memoryLimit = memoryLimit
+        self.diskLimit = diskLimit
+        self.enabled = True
+        self._memory = OrderedDict()
+        self._memorySize = 0
+        self._lock = threading.Lock()
+
+    def getKey(self, grain, mapDim, distanceMethod):
+        """Returns the key that the regression map of 'grain' is stored under, when it is generated with a map of size
+        'mapDim' using the distance method named 'distanceMethod'. Properties that don't change the cross section of
+        the grain are left out."""
+        props = grain.getProperties()
+        for prop in grain.mapIndependentProps:
+            props.pop(prop, None)
+        description = repr((self.formatVersion, grain.geomName, mapDim, distanceMethod, sorted(props.items())))
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Returns the dictionary of arrays stored under 'key', or None if there isn't one in either tier."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        entry = self._load(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        """Stores a dictionary of arrays under 'key' in both tiers."""
+        if not self.enabled:
+            return
+        self._remember(key, entry)
+        self._save(key, entry)
+
+    def clear(self):
+        """Removes all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memorySize = 0
+        for fileName, _, _ in self._listFiles():
+            try:
+                os.remove(fileName)
+            except OSError:
+                pass
+
+    def _remember(self, key, entry):
+        """Keeps an entry in memory, evicting the least recently used entries until the ones in memory fit in the size
+        limit."""
+        for array in entry.values():
+            array.setflags(write=False)
+        with self._lock:
+            if key in self._memory:
+                self._memorySize -= self._entrySize(self._memory[key])
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            self._memorySize += self._entrySize(entry)
+            while self._memorySize > self.memoryLimit:
+                _, evicted = self._memory.popitem(last=False)
+                self._memorySize -= self._entrySize(evicted)
+
+    @staticmethod
+    def _entrySize(entry):
+        return sum(array.nbytes for array in entry.values())
+
+    def _fileName(self, key):
+        return os.path.join(self.path, '{}.npz'.format(key))
+
+    def _load(self, key):
+        fileName = self._fileName(key)
+        if not os.path.isfile(fileName):
+            return None
+        try:
+            with np.load(fileName) as data:
+                entry = {name: data[name] for name in data.files}
+            os.utime(fileName) # Mark the file as recently used
+        except (OSError, ValueError, EOFError, KeyError, zipfile.BadZipFile, zlib.error):
+            # The file is damaged or was only partly written, so it is removed and the map is generated again
+            try:
+                os.remove(fileName)
+            except OSError:
+                pass
+            return None
+        return entry
+
+    def _save(self, key, entry):
+        fileName = self._fileName(key)
+        tempName = '{}.{}.tmp.npz'.format(fileName[:-len('.npz')], os.getpid())
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            np.savez_compressed(tempName, **entry)
+            os.replace(tempName, fileName) # Readers never see a partially written file
+        except OSError:
+            return
+        self._evict()
+
+    def _listFiles(self):
+        """Returns a list of (file name, size, last use time) for each entry on disk."""
+        files = []
+        if not os.path.isdir(self.path):
+            return files
+        for fileName in os.listdir(self.path):
+            if not fileName.endswith('.npz') or fileName.endswith('.tmp.npz'):
+                continue
+            fileName = os.path.join(self.path, fileName)
+            try:
+                stat = os.stat(fileName)
+            except OSError:
+                continue
+            files.append((fileName, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict(self):
+        """Deletes the least recently used files until the entries on disk fit in the size limit."""
+        files = sorted(self._listFiles(), key=lambda file: file[2])
+        totalSize = sum(size for _, size, _ in files)
+        for fileName, size, _ in files:
+            if totalSize <= self.diskLimit:
+                break
+            try:
+                os.remove(fileName)
+            except OSError:
+                continue
+            totalSize -= size
+
+regressionMapCache = RegressionMapCache()
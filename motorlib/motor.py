@@ -4,10 +4,11 @@ from .nozzle import Nozzle
 from .propellant import Propellant
 from . import geometry
 from .simResult import SimulationResult, SimAlert, SimAlertLevel, SimAlertType
+from .burnback import BurnbackTableStack
 from .grains import EndBurningGrain
-from .properties import PropertyCollection, FloatProperty, IntProperty
+from .properties import PropertyCollection, FloatProperty, IntProperty, EnumProperty
 from .constants import gasConstant
-from scipy.optimize import newton
+from scipy.optimize import brentq
 import numpy as np
 
 class MotorConfig(PropertyCollection):
@@ -26,8 +27,15 @@ class MotorConfig(PropertyCollection):
         self.props['burnoutThrustThres'] = FloatProperty('Thrust Burnout Threshold', '%', 0.01, 10)
         self.props['timestep'] = FloatProperty('Simulation Timestep', 's', 0.0001, 0.1)
         self.props['ambPressure'] = FloatProperty('Ambient Pressure', 'Pa', 0.0001, 102000)
-        self.props['mapDim'] = IntProperty('Grain Map Dimension', '', 250, 2000)
+        self.props['mapDim'] = IntProperty('Grain Map Dimension', '', 250, 8000)
         self.props['sepPressureRatio'] = FloatProperty('Separation Pressure Ratio', '', 0.001, 1)
+        self.props['solver'] = EnumProperty('Simulation Solver', ['Fixed Timestep', 'Adaptive Timestep', 'Regression Domain'])
+        self.props['maxTimestep'] = FloatProperty('Maximum Adaptive Timestep', 's', 0.0001, 1)
+        self.props['stepTolerance'] = FloatProperty('Adaptive Step Tolerance', '', 0.0001, 0.5)
+        self.props['distanceMethod'] = EnumProperty('Regression Map Method', ['Fast Marching', 'Distance Transform'])
+        # The adaptive solver needs room above the timestep to grow into
+        self.props['maxTimestep'].setValue(0.1)
+        self.props['stepTolerance'].setValue(0.01)
 
 
 
@@ -41,6 +49,11 @@ class Motor():
         self.propellant = None
         self.nozzle = Nozzle()
         self.config = MotorConfig()
+        self.burnbackTables = None
+        self.massFluxFunctions = []
+        self.grainBoundingVolumes = None
+        self.compiledPropellant = None
+        self.lastThermoState = None
 
         if propDict is not None:
             self.applyDict(propDict)
@@ -74,10 +87,50 @@ class Motor():
             self.grains[-1].setProperties(entry['properties'])
         self.config.setProperties(dictionary['config'])
 
-    def calcBurningSurfaceArea(self, regDepth):
+    def setupGrains(self):
+        """Prepares the grains for simulation. Motors often stack several copies of the same grain, so only the first
+        grain with each setup key runs its simulationSetup, and the copies of it share the geometry that it prepared.
+        The grains' burnback tables are then stacked so the solvers can look up the state of every grain at once, and
+        grains of the same type are grouped so their mass fluxes can be found together."""
+        preparedGrains = {}
+        for grain in self.grains:
+            key = grain.getSetupKey()
+            if key in preparedGrains:
+                grain.shareSimulationSetup(preparedGrains[key])
+            else:
+                grain.simulationSetup(self.config)
+                preparedGrains[key] = grain
+
+        tables = [grain.burnbackTable for grain in self.grains]
+        self.burnbackTables = BurnbackTableStack(tables)
+        self.grainBoundingVolumes = np.array([grain.getGrainBoundingVolume() for grain in self.grains])
+        self.massFluxFunctions = []
+        for grainType in dict.fromkeys(type(grain) for grain in self.grains):
+            gids = np.array([gid for gid, grain in enumerate(self.grains) if type(grain) is grainType], dtype=np.intp)
+            typeTables = BurnbackTableStack([tables[gid] for gid in gids])
+            massFluxFunction = grainType.getPeakMassFluxFunction([self.grains[gid] for gid in gids], typeTables)
+            self.massFluxFunctions.append((gids, massFluxFunction))
+
+    def getSimPropellant(self):
+        """Returns the propellant that the calculations should use. While a simulation is running this is the compiled
+        copy of the propellant made for it, which is faster to look up properties in, and otherwise it is the propellant
+        itself."""
+        if self.compiledPropellant is not None:
+            return self.compiledPropellant
+        return self.propellant
+
+    def calcBurnoutDepths(self):
+        """Returns a list of the regression depths at which each grain's web left drops to the configured burnout
+        threshold, read from the burnback tables that the grains built during simulation setup."""
         burnoutThres = self.config.getProperty('burnoutWebThres')
-        gWithReg = zip(self.grains, regDepth)
-        perGrain = [gr.getSurfaceAreaAtRegression(reg) * int(gr.isWebLeft(reg, burnoutThres)) for gr, reg in gWithReg]
+        return [grain.burnbackTable.getBurnoutDepth(burnoutThres) for grain in self.grains]
+
+    def calcBurningSurfaceArea(self, regDepth):
+        """Returns the total burning surface area of the motor's grains for a set of regression depths, read from the
+        burnback tables that the grains built during simulation setup."""
+        perGrain = []
+        for grain, reg, burnoutDepth in zip(self.grains, regDepth, self.calcBurnoutDepths()):
+            perGrain.append(grain.burnbackTable.getSurfaceArea(reg) * int(reg < burnoutDepth))
         return sum(perGrain)
 
     def calcKN(self, regDepth, dThroat):
@@ -92,66 +145,109 @@ class Motor():
         optionally be passed in to save time on motors where calculating surface area is expensive."""
         if kn is None:
             kn = self.calcKN(regDepth, dThroat)
-        return self.propellant.getPressureFromKn(kn)
+        return self.getSimPropellant().getPressureFromKn(kn)
 
-    def calcForce(self, chamberPres, dThroat, exitPres=None):
+    def calcForce(self, chamberPres, dThroat, exitPres=None, thermoState=None):
         """Calculates the force of the motor at a given regression depth per grain. Calculates exit pressure by
-        default, but can also use a value passed in."""
-        _, _, gamma, _, _ = self.propellant.getCombustionProperties(chamberPres)
+        default, but can also use a value passed in. The propellant's properties at the chamber pressure are looked up
+        unless a ThermoState for it is passed in. Arrays of nonzero chamber pressures can also be passed in along with
+        a ThermoState for them, and an array of forces is returned."""
+        if thermoState is None:
+            _, _, gamma, _, _ = self.getSimPropellant().getCombustionProperties(chamberPres)
+        else:
+            gamma = thermoState.gamma
         ambPressure = self.config.getProperty('ambPressure')
         thrustCoeff = self.nozzle.getAdjustedThrustCoeff(chamberPres, ambPressure, gamma, dThroat, exitPres)
         thrust = thrustCoeff * self.nozzle.getThroatArea(dThroat) * chamberPres
+        if isinstance(thrust, np.ndarray):
+            return np.maximum(thrust, 0)
         return max(thrust, 0)
 
     def calcFreeVolume(self, regDepth):
         """Calculates the volume inside of the motor not occupied by proppellant for a set of regression depths."""
-        return sum([grain.getFreeVolume(reg) for grain, reg in zip(self.grains, regDepth)])
+        freeVolumes = [grain.getGrainBoundingVolume() - grain.burnbackTable.getVolume(reg)
+            for grain, reg in zip(self.grains, regDepth)]
+        return float(sum(freeVolumes))
 
     def calcTotalVolume(self):
         """Calculates the bounding-cylinder volume of the combustion chamber."""
         return sum([grain.getGrainBoundingVolume() for grain in self.grains])
 
-    def calcMachNumber(self, chamberPres, massFlux):
+    def calcVolumeLoading(self, perGrainVolume):
+        """Returns the percentage of the combustion chamber filled with propellant when each grain holds its volume in
+        the array 'perGrainVolume'. This uses the bounding volumes found during setupGrains."""
+        freeVolume = float(np.sum(self.grainBoundingVolumes - perGrainVolume))
+        return 100 * (1 - (freeVolume / float(np.sum(self.grainBoundingVolumes))))
+
+    def calcMassFluxes(self, massIn, dTime, regDist, dRegDist, density):
+        """Returns an array of the peak mass flux through each grain during a step, given arrays with an element for
+        each grain of the mass flow into it, the distance it has regressed and the additional distance it regresses
+        during the step. The grains of each type are handled together by the functions from setupGrains."""
+        perGrainMassFlux = np.zeros(len(self.grains))
+        for gids, massFluxFunction in self.massFluxFunctions:
+            perGrainMassFlux[gids] = massFluxFunction(massIn[gids], dTime, regDist[gids], dRegDist[gids], density)
+        return perGrainMassFlux
+
+    def calcMachNumber(self, chamberPres, massFlux, thermoState=None):
         """Calculates the mach number in the core of a grain for a given chamber pressure and mass flux."""
-        _, _, gamma, T, molarMass = self.propellant.getCombustionProperties(chamberPres)
-
-        if chamberPres <= 1e-6:
-            return 0
-
-        def machFunc(M, chamberPres, massFlux, gamma, T, molarMass, gasConstant):
-            A = chamberPres * (gamma * molarMass / (gasConstant * T)) ** 0.5
-            B = 1.0 + ((gamma - 1.0) / 2.0) * M**2
-            C = -(gamma + 1.0) / (2.0 * (gamma - 1.0))
-            return A * M * (B ** C) - massFlux
-
-        def machFuncDerivative(M, chamberPres, massFlux, gamma, T, molarMass, gasConstant):
-            A = chamberPres * (gamma * molarMass / gasConstant / T) ** 0.5
-            B = 1.0 + ((gamma - 1.0) / 2.0) * M**2
-            C = -(gamma + 1.0) / (2.0 * (gamma - 1.0))
-            dB_dM = (gamma - 1.0) * M
-            return A * (B**C + M * C * (B**(C - 1.0)) * dB_dM)
-
-        maxMassFlux = machFunc(1.0, chamberPres, massFlux, gamma, T, molarMass, gasConstant) + massFlux
-
-        if massFlux >= maxMassFlux: # Boom
-            return 1.0
-
-        x0 = np.arcsin(massFlux / maxMassFlux) * 2 / np.pi
-        M = newton(machFunc, fprime=machFuncDerivative, x0=x0, args=(chamberPres, massFlux, gamma, T, molarMass, gasConstant))
-
-        return max(M, 0)
+        return float(self.calcMachNumbers(chamberPres, np.array([massFlux]), thermoState)[0])
+
+    def calcMachNumbers(self, chamberPres, massFlux, thermoState=None, maxIterations=50, tolerance=1e-12):
+        """Calculates the mach number in the core of each grain for a given chamber pressure and an array of the mass
+        flux through each grain. The propellant's properties at the chamber pressure are looked up unless a ThermoState
+        for it is passed in. All of the grains are solved for together with Newton's method, starting from a guess based
+        on how close the mass flux is to the largest one the core can carry, which is when the flow chokes. A grain stops
+        iterating once its step is smaller than 'tolerance', and the iterations end after 'maxIterations' either way.
+        Steps are kept on the subsonic branch, and grains with more mass flux than the core can carry return 1. Many
+        points in time can be solved for at once by passing an array of nonzero chamber pressures with a ThermoState for
+        them, and a mass flux array with a row for each grain and a column for each pressure."""
+        if thermoState is None:
+            _, _, gamma, T, molarMass = self.getSimPropellant().getCombustionProperties(chamberPres)
+        else:
+            gamma, T, molarMass = thermoState.gamma, thermoState.temp, thermoState.molarMass
+
+        if not isinstance(chamberPres, np.ndarray) and chamberPres <= 1e-6:
+            return np.zeros(len(massFlux))
+
+        A = chamberPres * (gamma * molarMass / (gasConstant * T)) ** 0.5
+        C = -(gamma + 1.0) / (2.0 * (gamma - 1.0))
+        maxMassFlux = A * ((1.0 + ((gamma - 1.0) / 2.0)) ** C)
+        choked = massFlux >= maxMassFlux # Boom
+
+        machNumber = np.arcsin(np.minimum(massFlux / maxMassFlux, 1)) * 2 / np.pi
+        machNumber[choked] = 0.5 # Keeps the derivative away from zero, the result is replaced below
+        active = ~choked
+        halfGammaMinusOne = (gamma - 1.0) / 2.0
+        for _ in range(maxIterations):
+            if not active.any():
+                break
+            machSquared = machNumber * machNumber
+            B = 1.0 + (halfGammaMinusOne * machSquared)
+            BC = B ** C
+            error = (A * machNumber * BC) - massFlux
+            derivative = A * BC * (1.0 + ((2.0 * C * halfGammaMinusOne) * machSquared / B))
+            step = error / derivative
+            step[~active] = 0
+            newMachNumber = machNumber - step
+            # Steps that leave the subsonic branch go halfway to the edge of it instead
+            outside = (newMachNumber >= 1) | (newMachNumber < 0)
+            if outside.any():
+                newMachNumber[outside] = np.where(newMachNumber[outside] >= 1, (machNumber[outside] + 1) / 2,
+                    machNumber[outside] / 2)
+            machNumber = newMachNumber
+            active &= np.abs(step) > tolerance
+
+        machNumber[choked] = 1.0
+        return machNumber
 
     def runSimulation(self, callback=None):
         """Runs a simulation of the motor and returns a simRes instance with the results. Constraints are checked,
         including the number of grains, if the motor has a propellant set, and if the grains have geometry errors. If
         all of these tests are passed, the motor's operation is simulated by calculating Kn, using this value to get
-        pressure, and using pressure to determine thrust and other statistics. The next timestep is then prepared by
-        using the pressure to determine how the motor will regress in the given timestep at the current pressure.
-        This process is repeated and regression tracked until all grains have burned out, when the results and any
-        warnings are returned."""
-        burnoutWebThres = self.config.getProperty('burnoutWebThres')
+        pressure, and using pressure to determine thrust and other statistics. The config's solver setting picks between
+        stepping through the burn with a fixed or adaptive timestep and integrating over regression depth. Either way,
+        the burn is simulated until all grains have burned out, when the results and any warnings are returned."""
         burnoutThrustThres = self.config.getProperty('burnoutThrustThres')
-        dTime = self.config.getProperty('timestep')
 
         simRes = SimulationResult(self)
 
@@ -181,33 +277,8 @@ class Motor():
         if len(simRes.getAlertsByLevel(SimAlertLevel.ERROR)) > 0:
             return simRes
 
-        # Pull the required numbers from the propellant
-        density = self.propellant.getProperty('density')
-
-        # Precalculate these are they don't change
-        motorVolume = self.calcTotalVolume()
-
-        # Generate coremaps for perforated grains
-        for grain in self.grains:
-            grain.simulationSetup(self.config)
-
-        # Setup initial values
-        perGrainReg = [0 for grain in self.grains]
-
-        # At t = 0, the motor has ignited
-        simRes.channels['time'].addData(0)
-        simRes.channels['kn'].addData(self.calcKN(perGrainReg, 0))
-        simRes.channels['pressure'].addData(self.calcIdealPressure(perGrainReg, 0, None))
-        simRes.channels['force'].addData(0)
-        simRes.channels['mass'].addData([grain.getVolumeAtRegression(0) * density for grain in self.grains])
-        simRes.channels['volumeLoading'].addData(100 * (1 - (self.calcFreeVolume(perGrainReg) / motorVolume)))
-        simRes.channels['massFlow'].addData([0 for grain in self.grains])
-        simRes.channels['massFlux'].addData([0 for grain in self.grains])
-        simRes.channels['regression'].addData([0 for grains in self.grains])
-        simRes.channels['web'].addData([grain.getWebLeft(0) for grain in self.grains])
-        simRes.channels['exitPressure'].addData(0)
-        simRes.channels['dThroat'].addData(0)
-        simRes.channels['machNumber'].addData([0 for grain in self.grains])
+        # Generate coremaps for perforated grains and burnback tables for all grains
+        self.setupGrains()
 
         # Check port/throat ratio and add a warning if it is not large enough
         aftPort = self.grains[-1].getPortArea(0)
@@ -218,76 +289,21 @@ class Motor():
                 description = 'Initial port/throat ratio of {:.3f} was less than {:.3f}'.format(ratio, minAllowed)
                 simRes.addAlert(SimAlert(SimAlertLevel.WARNING, SimAlertType.CONSTRAINT, description, 'N/A'))
 
-        # Perform timesteps
-        while simRes.shouldContinueSim(burnoutThrustThres):
-            # Calculate regression
-            massFlow = 0
-            perGrainMass = [0 for grain in self.grains]
-            perGrainMassFlow = [0 for grain in self.grains]
-            perGrainMassFlux = [0 for grain in self.grains]
-            perGrainWeb = [0 for grain in self.grains]
-            for gid, grain in enumerate(self.grains):
-                if grain.getWebLeft(perGrainReg[gid]) > burnoutWebThres:
-                    # Calculate regression at the current pressure
-                    reg = dTime * self.propellant.getBurnRate(simRes.channels['pressure'].getLast())
-                    # Find the mass flux through the grain based on the mass flow fed into from grains above it
-                    perGrainMassFlux[gid] = grain.getPeakMassFlux(massFlow, dTime, perGrainReg[gid], reg, density)
-                    # Find the mass of the grain after regression
-                    perGrainMass[gid] = grain.getVolumeAtRegression(perGrainReg[gid]) * density
-                    # Add the change in grain mass to the mass flow
-                    massFlow += (simRes.channels['mass'].getLast()[gid] - perGrainMass[gid]) / dTime
-                    # Apply the regression
-                    perGrainReg[gid] += reg
-                    perGrainWeb[gid] = grain.getWebLeft(perGrainReg[gid])
-                perGrainMassFlow[gid] = massFlow
-            simRes.channels['regression'].addData(perGrainReg[:])
-            simRes.channels['web'].addData(perGrainWeb)
-
-            simRes.channels['volumeLoading'].addData(100 * (1 - (self.calcFreeVolume(perGrainReg) / motorVolume)))
-            simRes.channels['mass'].addData(perGrainMass)
-            simRes.channels['massFlow'].addData(perGrainMassFlow)
-            simRes.channels['massFlux'].addData(perGrainMassFlux)
-
-            # Calculate KN
-            dThroat = simRes.channels['dThroat'].getLast()
-            simRes.channels['kn'].addData(self.calcKN(perGrainReg, dThroat))
-
-            # Calculate Pressure
-            lastKn = simRes.channels['kn'].getLast()
-            pressure = self.calcIdealPressure(perGrainReg, dThroat, lastKn)
-            simRes.channels['pressure'].addData(pressure)
-
-            # Calculate Mach Number
-            perGrainMachNumber = [0 for grain in self.grains]
-            for gid, grain in enumerate(self.grains):
-                perGrainMachNumber[gid] = self.calcMachNumber(pressure, perGrainMassFlux[gid])
-            simRes.channels['machNumber'].addData(perGrainMachNumber)
-
-            # Calculate Exit Pressure
-            _, _, gamma, _, _ = self.propellant.getCombustionProperties(pressure)
-            exitPressure = self.nozzle.getExitPressure(gamma, pressure)
-            simRes.channels['exitPressure'].addData(exitPressure)
-
-            # Calculate force
-            force = self.calcForce(simRes.channels['pressure'].getLast(), dThroat, exitPressure)
-            simRes.channels['force'].addData(force)
-
-            simRes.channels['time'].addData(simRes.channels['time'].getLast() + dTime)
-
-            # Calculate any slag deposition or erosion of the throat
-            if pressure == 0:
-                slagRate = 0
+        # The propellant's properties are compiled for the length of the simulation, and dropped afterwards so later
+        # changes to the propellant are never missed
+        self.compiledPropellant = self.propellant.compile()
+        try:
+            if self.config.getProperty('solver') == 'Regression Domain':
+                completed = self.simulateRegressionDomain(simRes, callback)
+            elif self.config.getProperty('solver') == 'Adaptive Timestep':
+                completed = self.simulateAdaptive(simRes, callback)
             else:
-                slagRate = (1 / pressure) * self.nozzle.getProperty('slagCoeff')
-            erosionRate = pressure * self.nozzle.getProperty('erosionCoeff')
-            change = dTime * ((-2 * slagRate) + (2 * erosionRate))
-            simRes.channels['dThroat'].addData(dThroat + change)
-
-            if callback is not None:
-                # Uses the grain with the largest percentage of its web left
-                progress = max([g.getWebLeft(r) / g.getWebLeft(0) for g, r in zip(self.grains, perGrainReg)])
-                if callback(1 - progress): # If the callback returns true, it is time to cancel
-                    return simRes
+                completed = self.simulateTimesteps(simRes, callback)
+        finally:
+            self.compiledPropellant = None
+            self.lastThermoState = None
+        if not completed: # The simulation was canceled
+            return simRes
 
         simRes.success = True
 
@@ -315,7 +331,7 @@ class Motor():
             alert = SimAlert(SimAlertLevel.WARNING, SimAlertType.VALUE, desc, 'Nozzle')
             simRes.addAlert(alert)
 
-        if simRes.getAverageForce() < burnoutThrustThres:
+        if simRes.summary.averageForce < burnoutThrustThres:
             desc = 'Motor did not generate thrust. Check chamber pressure and expansion ratio.'
             alert = SimAlert(SimAlertLevel.ERROR, SimAlertType.VALUE, desc, 'Motor')
             simRes.addAlert(alert)
@@ -331,6 +347,368 @@ class Motor():
 
         return simRes
 
+    def calcInitialState(self):
+        """Returns the state of the motor at ignition as a dict of values keyed by channel name, which can be passed to
+        logStep. Per-grain values are arrays with an element for each grain."""
+        density = self.propellant.getProperty('density')
+        perGrainReg = np.zeros(len(self.grains))
+        pressure = self.calcIdealPressure(perGrainReg, 0, None)
+        return {
+            'time': 0,
+            'kn': self.calcKN(perGrainReg, 0),
+            'pressure': pressure,
+            'force': 0,
+            'mass': self.burnbackTables.getVolume(perGrainReg) * density,
+            'volumeLoading': self.calcVolumeLoading(self.burnbackTables.getVolume(perGrainReg)),
+            'massFlow': np.zeros(len(self.grains)),
+            'massFlux': np.zeros(len(self.grains)),
+            'regression': perGrainReg,
+            'web': self.burnbackTables.getWebLeft(perGrainReg),
+            'exitPressure': 0,
+            'dThroat': 0,
+            'machNumber': np.zeros(len(self.grains)),
+            'thermoState': self.getSimPropellant().getThermoState(pressure)
+        }
+
+    def calcStep(self, simRes, dTime, burnoutDepths):
+        """Calculates the state of the motor 'dTime' seconds after the last point in simRes without logging it, so
+        solvers can try a step and throw it away. Grains that had web left at the start of the step regress at the burn
+        rate of the last pressure, but never past their depth in 'burnoutDepths'. A grain that reaches its burnout depth
+        during the step still counts towards the Kn at the end of it, so a step that ends exactly on a burnout holds the
+        state from just before the grain burns out. The grains are all handled at once with arrays that have an element
+        for each grain, so the cost of a step barely grows with the number of grains. The propellant's properties are only
+        looked up once, at the new pressure, as the ones at the last pressure were kept when it was logged. Returns a dict
+        of values keyed by channel name, which can be passed to logStep."""
+        density = self.propellant.getProperty('density')
+        lastReg = np.array(simRes.channels['regression'].getLast())
+        dThroat = simRes.channels['dThroat'].getLast()
+        tables = self.burnbackTables
+
+        # Calculate regression at the current pressure
+        reg = dTime * self.lastThermoState.burnRate
+        burning = lastReg < burnoutDepths
+        grainReg = np.where(burning, np.minimum(reg, burnoutDepths - lastReg), 0)
+        perGrainReg = lastReg + grainReg
+        location = tables.locate(perGrainReg)
+        volume = tables.interpolate('volume', location)
+        perGrainMass = np.where(burning, volume * density, 0)
+        # The mass flow out of each grain includes the change in mass of all of the grains above it
+        massFlow = np.where(burning, ((tables.getVolume(lastReg) * density) - perGrainMass) / dTime, 0)
+        perGrainMassFlow = np.cumsum(massFlow)
+        # Find the mass flux through each grain based on the mass flow fed into from grains above it
+        massIn = np.concatenate(([0], perGrainMassFlow[:-1]))
+        perGrainMassFlux = np.where(burning, self.calcMassFluxes(massIn, dTime, lastReg, grainReg, density), 0)
+        perGrainWeb = np.where(burning, tables.interpolate('webLeft', location), 0)
+        burningSurfaceArea = float(np.sum(np.where(burning, tables.interpolate('surfaceArea', location), 0)))
+
+        kn = burningSurfaceArea / self.nozzle.getThroatArea(dThroat)
+        pressure = self.calcIdealPressure(perGrainReg, dThroat, kn)
+        thermoState = self.getSimPropellant().getThermoState(pressure)
+        perGrainMachNumber = self.calcMachNumbers(pressure, perGrainMassFlux, thermoState)
+        exitPressure = self.nozzle.getExitPressure(thermoState.gamma, pressure)
+        force = self.calcForce(pressure, dThroat, exitPressure, thermoState)
+
+        # Calculate any slag deposition or erosion of the throat
+        if pressure == 0:
+            slagRate = 0
+        else:
+            slagRate = (1 / pressure) * self.nozzle.getProperty('slagCoeff')
+        erosionRate = pressure * self.nozzle.getProperty('erosionCoeff')
+        change = dTime * ((-2 * slagRate) + (2 * erosionRate))
+
+        return {
+            'time': simRes.channels['time'].getLast() + dTime,
+            'kn': kn,
+            'pressure': pressure,
+            'force': force,
+            'mass': perGrainMass,
+            'volumeLoading': self.calcVolumeLoading(volume),
+            'massFlow': perGrainMassFlow,
+            'massFlux': perGrainMassFlux,
+            'regression': perGrainReg,
+            'web': perGrainWeb,
+            'exitPressure': exitPressure,
+            'dThroat': dThroat + change,
+            'machNumber': perGrainMachNumber,
+            'thermoState': thermoState
+        }
+
+    def calcTimeToBurnout(self, simRes, burnoutDepths):
+        """Returns how long it will take the next grain to burn out if the motor stays at the last pressure in simRes,
+        or infinity if no grains are regressing. The time is padded very slightly so that calcStep clamps the grain's
+        regression exactly onto its burnout depth instead of stopping just short of it."""
+        burnRate = self.lastThermoState.burnRate
+        lastReg = np.array(simRes.channels['regression'].getLast())
+        remaining = (burnoutDepths - lastReg)[lastReg < burnoutDepths]
+        if burnRate <= 0 or len(remaining) == 0:
+            return np.inf
+        return (float(np.min(remaining)) / burnRate) * (1 + 1e-9)
+
+    def isBelowThrustThres(self, simRes, step):
+        """Returns True if the force in a step calculated by calcStep is at or below the configured thrust burnout
+        threshold, which is a percentage of the peak force. The first step is never below the threshold, as the motor
+        has no thrust at ignition to compare to."""
+        if len(simRes.channels['time'].getData()) == 1:
+            return False
+        peakForce = max(simRes.channels['force'].getMax(), step['force'])
+        return step['force'] <= self.config.getProperty('burnoutThrustThres') * 0.01 * peakForce
+
+    def calcThrustBurnoutStep(self, simRes, dTime, burnoutDepths):
+        """Returns the step that ends exactly where the thrust drops to the configured burnout threshold, for when a step
+        of 'dTime' seconds would end below it. The length of the step is solved for, which avoids needing a short
+        timestep to get an accurate burn time."""
+        lastForce = simRes.channels['force'].getLast()
+        thrustThres = self.config.getProperty('burnoutThrustThres') * 0.01 * simRes.channels['force'].getMax()
+
+        def thrustAboveThres(stepTime):
+            if stepTime == 0:
+                return lastForce - thrustThres
+            return self.calcStep(simRes, stepTime, burnoutDepths)['force'] - thrustThres
+
+        # The thrust is above the threshold at the start of the step, so the root can't be at zero
+        stepTime = max(brentq(thrustAboveThres, 0, dTime, xtol=1e-6 * dTime), 1e-9 * dTime)
+        return self.calcStep(simRes, stepTime, burnoutDepths)
+
+    def logStep(self, simRes, step):
+        """Adds a step calculated by calcInitialState or calcStep to the channels of simRes. The step's ThermoState is
+        kept for the next step to use instead."""
+        for channel, value in step.items():
+            if channel == 'thermoState':
+                self.lastThermoState = value
+                continue
+            simRes.channels[channel].addData(value)
+
+    def reportProgress(self, simRes, callback):
+        """Passes the fraction of the burn that has been simulated to the callback, based on the grain with the largest
+        percentage of its web left. Returns True if the callback canceled the simulation."""
+        perGrainReg = np.array(simRes.channels['regression'].getLast())
+        webLeft = self.burnbackTables.getWebLeft(perGrainReg)
+        progress = float(np.max(webLeft / self.burnbackTables.getWebLeft(np.zeros(len(self.grains)))))
+        return callback(1 - progress)
+
+    def simulateTimesteps(self, simRes, callback=None):
+        """Simulates the motor with a fixed timestep, logging the results into simRes. Each step calculates the
+        regression of the grains at the current pressure, and then the Kn, pressure, force and other values at the new
+        regression depths. Steps that would carry a grain past its burnout are shortened to end exactly on it, and the
+        last step ends exactly where the thrust drops below the configured threshold, so the burn time doesn't depend
+        on the timestep. If the last grain burns out first, the burn ends on the step that reaches its burnout, which
+        holds the state from just before it. Returns False if the callback canceled the simulation, and True otherwise."""
+        burnoutThrustThres = self.config.getProperty('burnoutThrustThres')
+        dTime = self.config.getProperty('timestep')
+        burnoutDepths = np.array(self.calcBurnoutDepths())
+
+        # At t = 0, the motor has ignited
+        self.logStep(simRes, self.calcInitialState())
+
+        # Perform timesteps
+        while simRes.shouldContinueSim(burnoutThrustThres):
+            timeToBurnout = self.calcTimeToBurnout(simRes, burnoutDepths)
+            if timeToBurnout == np.inf: # All grains have burned out, the last step ended on the final burnout
+                break
+
+            stepTime = dTime
+            if timeToBurnout < dTime * 1.001: # Extend steps that would end just short of a burnout
+                stepTime = timeToBurnout
+
+            step = self.calcStep(simRes, stepTime, burnoutDepths)
+            if self.isBelowThrustThres(simRes, step):
+                self.logStep(simRes, self.calcThrustBurnoutStep(simRes, stepTime, burnoutDepths))
+                break
+            self.logStep(simRes, step)
+
+            if callback is not None and self.reportProgress(simRes, callback):
+                return False # If the callback returns true, it is time to cancel
+
+        return True
+
+    def simulateAdaptive(self, simRes, callback=None):
+        """Simulates the motor with a timestep that changes during the burn, logging the results into simRes. The
+        regression over a step uses the burn rate from the start of it, so the error a step makes grows with how much
+        the pressure and Kn change across it. Steps where either changes by more than the configured tolerance, as a
+        fraction of its peak so far, are thrown away and retried with a shorter timestep. The timestep grows while they
+        change slowly, up to the configured maximum, and the configured timestep is the shortest step that will be
+        taken. As with the fixed timestep, steps end exactly on grain burnouts and where the thrust drops below the
+        configured threshold. Returns False if the callback canceled the simulation, and True otherwise."""
+        burnoutThrustThres = self.config.getProperty('burnoutThrustThres')
+        minTimestep = self.config.getProperty('timestep')
+        maxTimestep = max(self.config.getProperty('maxTimestep'), minTimestep)
+        tolerance = self.config.getProperty('stepTolerance')
+        burnoutDepths = np.array(self.calcBurnoutDepths())
+
+        # At t = 0, the motor has ignited
+        self.logStep(simRes, self.calcInitialState())
+        peakKn = simRes.channels['kn'].getLast()
+        peakPressure = simRes.channels['pressure'].getLast()
+
+        dTime = minTimestep
+        while simRes.shouldContinueSim(burnoutThrustThres):
+            timeToBurnout = self.calcTimeToBurnout(simRes, burnoutDepths)
+            if timeToBurnout == np.inf: # All grains have burned out, the last step ended on the final burnout
+                break
+
+            lastKn = simRes.channels['kn'].getLast()
+            lastPressure = simRes.channels['pressure'].getLast()
+            burnout = timeToBurnout < dTime * 1.001
+            stepTime = timeToBurnout if burnout else dTime
+
+            step = self.calcStep(simRes, stepTime, burnoutDepths)
+            knError = abs(step['kn'] - lastKn) / peakKn if peakKn > 0 else 0
+            pressureError = abs(step['pressure'] - lastPressure) / peakPressure if peakPressure > 0 else 0
+            error = max(knError, pressureError) / tolerance
+            if error > 1 and stepTime > minTimestep:
+                dTime = max(stepTime * max(0.9 / error, 0.2), minTimestep)
+                continue
+
+            if self.isBelowThrustThres(simRes, step):
+                self.logStep(simRes, self.calcThrustBurnoutStep(simRes, stepTime, burnoutDepths))
+                break
+            self.logStep(simRes, step)
+            peakKn = max(peakKn, step['kn'])
+            peakPressure = max(peakPressure, step['pressure'])
+            if not burnout:
+                growth = 2 if error < 0.45 else 0.9 / error
+                dTime = min(max(stepTime * growth, minTimestep), maxTimestep)
+
+            if callback is not None and self.reportProgress(simRes, callback):
+                return False # If the callback returns true, it is time to cancel
+
+        return True
+
+    def simulateRegressionDomain(self, simRes, callback=None):
+        """Simulates the motor by integrating over regression depth instead of time, logging the results into simRes.
+        The ballistics are quasi-steady and every burning grain regresses at the same rate, so the state of the motor
+        only depends on how far it has regressed. The Kn, pressure and burn rate are found for a grid of regression
+        depths across the whole web at once using the grains' burnback tables, and the time taken to regress between
+        neighboring depths comes from the burn rate at the middle of the interval. The regression depth is then mapped
+        back onto a time axis with the configured timestep and a point on each grain's burnout, where the rest of the
+        channels are calculated for every point at once. As in the timestep solvers, results end on the last burnout
+        or where the thrust drops below the configured threshold. The callback is passed the fraction of the work that
+        has been done as each stage finishes, and after each step of the mass flux calculation, which is the only part
+        done one step at a time. Returns False if the callback canceled the simulation, and True otherwise."""
+        burnoutThrustThres = self.config.getProperty('burnoutThrustThres')
+        timestep = self.config.getProperty('timestep')
+        propellant = self.getSimPropellant()
+        density = self.propellant.getProperty('density')
+        motorVolume = self.calcTotalVolume()
+        tables = self.burnbackTables
+
+        def canceled(progress):
+            return callback is not None and callback(progress)
+
+        # Each grain burns out at the depth where its web left drops to the threshold. These depths are added to the
+        # grid so no interval of the grid straddles a burnout.
+        burnoutDepths = np.array(self.calcBurnoutDepths())
+        maxDepth = np.max(burnoutDepths)
+        regStep = min([table.regression[1] for table in tables.tables])
+        numSamples = max(int(np.ceil(maxDepth / regStep)), 1) + 1
+        regression = np.union1d(np.linspace(0, maxDepth, numSamples), burnoutDepths)
+        midpoints = (regression[:-1] + regression[1:]) / 2
+        burningMid = midpoints < burnoutDepths[:, np.newaxis]
+        surfaceAreaMid = np.sum(tables.getSurfaceArea(np.broadcast_to(midpoints, burningMid.shape)) * burningMid, axis=0)
+        if canceled(0.1):
+            return False
+
+        # The throat changes size with time, which changes the Kn, so the pressure and throat history are iterated
+        # until they agree. Without slag or erosion, the first pass is exact.
+        slagCoeff = self.nozzle.getProperty('slagCoeff')
+        erosionCoeff = self.nozzle.getProperty('erosionCoeff')
+        dThroatMid = np.zeros(len(midpoints))
+        for _ in range(50):
+            knMid = surfaceAreaMid / self.nozzle.getThroatArea(dThroatMid)
+            pressureMid = propellant.getPressureFromKn(knMid)
+            burnRateMid = propellant.getBurnRate(pressureMid)
+            regTime = np.concatenate(([0], np.cumsum(np.diff(regression) / burnRateMid)))
+            if slagCoeff == 0 and erosionCoeff == 0:
+                regDThroat = np.zeros(len(regression))
+                break
+            changeRate = 2 * ((pressureMid * erosionCoeff) - (slagCoeff / pressureMid))
+            regDThroat = np.concatenate(([0], np.cumsum(np.diff(regTime) * changeRate)))
+            newDThroatMid = (regDThroat[:-1] + regDThroat[1:]) / 2
+            converged = np.allclose(newDThroatMid, dThroatMid, rtol=0, atol=1e-12)
+            dThroatMid = newDThroatMid
+            if converged:
+                break
+        if canceled(0.2):
+            return False
+
+        # Map the regression back onto evenly spaced times. As in the timestep solvers, there is a point exactly on each
+        # grain's burnout, which replaces any point that would fall just before or after it, and the last burnout ends
+        # the results.
+        burnoutTimes = np.interp(burnoutDepths, regression, regTime)
+        evenTimes = np.arange(0, regTime[-1], timestep)
+        nearBurnout = np.any(np.abs(evenTimes[:, np.newaxis] - burnoutTimes) < timestep * 1e-3, axis=1)
+        time = np.union1d(evenTimes[~nearBurnout], burnoutTimes)
+        motorReg = np.interp(time, regTime, regression)
+        dThroat = np.interp(time, regTime, regDThroat)
+
+        # Per-grain values are arrays with a row for each grain and a column for each point in time. A grain only
+        # contributes to a step if it had web left at the start of it, as in the timestep solvers, so the point on a
+        # burnout holds the state from just before it.
+        perGrainReg = np.minimum(motorReg, burnoutDepths[:, np.newaxis])
+        burning = motorReg < burnoutDepths[:, np.newaxis]
+        burningAtStart = np.concatenate((np.ones((len(self.grains), 1), dtype=bool), burning[:, :-1]), axis=1)
+        surfaceArea = np.sum(tables.getSurfaceArea(perGrainReg) * burningAtStart, axis=0)
+        kn = surfaceArea / self.nozzle.getThroatArea(dThroat)
+        pressure = propellant.getPressureFromKn(kn)
+        volume = tables.getVolume(perGrainReg)
+        perGrainMass = np.where(burningAtStart, volume * density, 0)
+        webLeft = tables.getWebLeft(perGrainReg)
+        perGrainWeb = np.where(burningAtStart, webLeft, 0)
+        freeVolume = np.sum(self.grainBoundingVolumes) - np.sum(volume, axis=0)
+        volumeLoading = 100 * (1 - (freeVolume / motorVolume))
+
+        # Mass flow out of each grain includes the propellant burned by the grains upstream of it
+        perGrainMassFlow = np.zeros(perGrainReg.shape)
+        perGrainMassFlow[:, 1:] = np.cumsum(-np.diff(volume, axis=1) * density / np.diff(time), axis=0)
+
+        # The motor has ignited at t = 0, but isn't producing thrust yet
+        flowing = pressure > 0
+        flowing[0] = False
+        thermoState = propellant.getThermoStates(pressure[flowing])
+        exitPressure = np.zeros(len(time))
+        force = np.zeros(len(time))
+        exitPressure[flowing] = self.nozzle.getExitPressure(thermoState.gamma, pressure[flowing])
+        force[flowing] = self.calcForce(pressure[flowing], dThroat[flowing], exitPressure[flowing], thermoState)
+
+        # The simulation ends on the first point where the thrust is below the threshold, as in shouldContinueSim
+        peakForce = np.maximum.accumulate(force)
+        belowThreshold = np.nonzero(force[1:] <= burnoutThrustThres * 0.01 * peakForce[1:])[0]
+        numPoints = belowThreshold[0] + 2 if len(belowThreshold) > 0 else len(time)
+        if canceled(0.3):
+            return False
+
+        # The mass flux functions handle one step at a time, but the Mach numbers of every point are found at once
+        perGrainMassFlux = np.zeros(perGrainReg.shape)
+        for ind in range(1, numPoints):
+            dTime = time[ind] - time[ind - 1]
+            massIn = np.concatenate(([0], perGrainMassFlow[:-1, ind]))
+            reg = perGrainReg[:, ind - 1]
+            dReg = perGrainReg[:, ind] - reg
+            massFlux = self.calcMassFluxes(massIn, dTime, reg, dReg, density)
+            perGrainMassFlux[:, ind] = np.where(burningAtStart[:, ind], massFlux, 0)
+            if canceled(0.3 + (0.6 * ind / numPoints)):
+                return False
+        perGrainMachNumber = np.zeros(perGrainReg.shape)
+        perGrainMachNumber[:, flowing] = self.calcMachNumbers(pressure[flowing], perGrainMassFlux[:, flowing],
+            thermoState)
+
+        for ind in range(numPoints):
+            simRes.channels['time'].addData(time[ind])
+            simRes.channels['kn'].addData(kn[ind])
+            simRes.channels['pressure'].addData(pressure[ind])
+            simRes.channels['force'].addData(force[ind])
+            simRes.channels['mass'].addData(perGrainMass[:, ind])
+            simRes.channels['volumeLoading'].addData(volumeLoading[ind])
+            simRes.channels['massFlow'].addData(perGrainMassFlow[:, ind])
+            simRes.channels['massFlux'].addData(perGrainMassFlux[:, ind])
+            simRes.channels['regression'].addData(perGrainReg[:, ind])
+            simRes.channels['web'].addData(perGrainWeb[:, ind])
+            simRes.channels['exitPressure'].addData(exitPressure[ind])
+            simRes.channels['dThroat'].addData(dThroat[ind])
+            simRes.channels['machNumber'].addData(perGrainMachNumber[:, ind])
+
+        return not canceled(1)
+
     def getQuickResults(self):
         results = {
             'volumeLoading': 0,
@@ -349,13 +727,13 @@ class Motor():
         if motorVolume == 0:
             return results
 
-        # Generate coremaps for perforated grains
         for grain in self.grains:
             for alert in grain.getGeometryErrors():
                 if alert.level == SimAlertLevel.ERROR:
                     return results
 
-            grain.simulationSetup(self.config)
+        # Generate coremaps for perforated grains
+        self.setupGrains()
 
         perGrainReg = [0 for grain in self.grains]
 
@@ -364,7 +742,7 @@ class Motor():
             results['initialKn'] = self.calcKN(perGrainReg, 0)
             results['portRatio'] = simRes.getPortRatio()
         if density is not None:
-            results['propellantMass'] = sum([grain.getVolumeAtRegression(0) * density for grain in self.grains])
+            results['propellantMass'] = sum([grain.burnbackTable.getVolume(0) * density for grain in self.grains])
         results['length'] = simRes.getPropellantLength()
 
         return results
@@ -1,7 +1,8 @@
 """This submodule houses the nozzle object and functions related to isentropic flow"""
 import math
+from functools import lru_cache
 
-from scipy.optimize import fsolve
+import numpy as np
 
 from .properties import FloatProperty, PropertyCollection
 from . import geometry
@@ -12,6 +13,53 @@ def eRatioFromPRatio(k, pRatio):
     """Returns the expansion ratio of a nozzle given the pressure ratio it causes."""
     return (((k+1)/2)**(1/(k-1))) * (pRatio ** (1/k)) * ((((k+1)/(k-1))*(1-(pRatio**((k-1)/k))))**0.5)
 
+def criticalPRatio(k):
+    """Returns the pressure ratio at which the flow is sonic, which is where the expansion ratio is at its peak of 1."""
+    return (2 / (k + 1)) ** (k / (k - 1))
+
+@lru_cache(maxsize=64)
+def _supersonicTable(k):
+    """Returns arrays of the log of the inverse expansion ratio and the log of the pressure ratio along the supersonic
+    branch, from the sonic point down to very large expansion ratios. The inverse expansion ratio increases
+    monotonically with the pressure ratio on this branch, so the table can be used to interpolate in either direction.
+    Tables are cached by gamma, as it only changes between propellant tabs."""
+    logPRatios = np.linspace(math.log(1e-12), math.log(criticalPRatio(k)), 256)
+    logERatios = np.log(eRatioFromPRatio(k, np.exp(logPRatios)))
+    logERatios[-1] = 0 # The sonic point, without any rounding error
+    return logERatios, logPRatios
+
+@lru_cache(maxsize=256)
+def pRatioFromERatio(k, eRatio):
+    """Returns the ratio of exit pressure to chamber pressure for a nozzle with an inverse expansion ratio (throat area
+    over exit area) of 'eRatio', on the supersonic branch of the solutions. Both the subsonic and supersonic branches
+    meet at the sonic point, so nozzles without any expansion (or invalid ones with exits smaller than their throats)
+    return the critical pressure ratio. The initial guess comes from interpolating a table of the supersonic branch and
+    is polished with Newton's method in log space, where the curve is close to a straight line. Results are cached, as
+    they only depend on the nozzle and gamma."""
+    if eRatio >= 1:
+        return criticalPRatio(k)
+    if eRatio <= 0:
+        return 0
+    logERatios, logPRatios = _supersonicTable(k)
+    target = math.log(eRatio)
+    logPRatio = float(np.interp(target, logERatios, logPRatios))
+    maxLogPRatio = logPRatios[-1]
+    exponent = (k - 1) / k
+    for _ in range(20):
+        pRatio = math.exp(logPRatio)
+        error = math.log(eRatioFromPRatio(k, pRatio)) - target
+        # The derivative of the log of the inverse expansion ratio with respect to the log of the pressure ratio
+        power = pRatio ** exponent
+        slope = (1 / k) - ((0.5 * exponent * power) / (1 - power))
+        if slope <= 0: # At the sonic point
+            break
+        step = error / slope
+        # Stay on the supersonic branch
+        logPRatio = min(logPRatio - step, maxLogPRatio)
+        if abs(step) < 1e-14:
+            break
+    return math.exp(logPRatio)
+
 class Nozzle(PropertyCollection):
     """An object that contains the details about a motor's nozzle."""
     def __init__(self):
@@ -43,8 +91,15 @@ class Nozzle(PropertyCollection):
         return geometry.circleArea(self.props['exit'].getValue())
 
     def getExitPressure(self, k, inputPressure):
-        """Solves for the nozzle's exit pressure, given an input pressure and the gas's specific heat ratio."""
-        return fsolve(lambda x: (1/self.calcExpansion()) - eRatioFromPRatio(k, x / inputPressure), 0)[0]
+        """Solves for the nozzle's exit pressure, given an input pressure and the gas's specific heat ratio. The flow is
+        assumed to be supersonic in the diverging section. Both arguments can also be arrays, in which case the
+        pressure ratio is only solved for once per distinct specific heat ratio."""
+        eRatio = 1 / self.calcExpansion()
+        if not isinstance(k, np.ndarray):
+            return inputPressure * pRatioFromERatio(k, eRatio)
+        uniqueK, inverse = np.unique(k, return_inverse=True)
+        pRatios = np.array([pRatioFromERatio(float(gamma), eRatio) for gamma in uniqueK])
+        return inputPressure * pRatios[inverse.reshape(k.shape)]
 
     def getDivergenceLosses(self):
         """Returns nozzle efficiency losses due to divergence angle"""
@@ -55,6 +110,8 @@ class Nozzle(PropertyCollection):
         """Returns the losses caused by the throat aspect ratio as described in this document:
         http://rasaero.com/dloads/Departures%20from%20Ideal%20Performance.pdf"""
         throatAspect = self.props['throatLength'].getValue() / (self.props['throat'].getValue() + dThroat)
+        if isinstance(throatAspect, np.ndarray):
+            return np.where(throatAspect > 0.45, 0.95, 0.99 - (0.0333 * throatAspect))
         if throatAspect > 0.45:
             return 0.95
         return 0.99 - (0.0333 * throatAspect)
@@ -68,8 +125,9 @@ class Nozzle(PropertyCollection):
     def getIdealThrustCoeff(self, chamberPres, ambPres, gamma, dThroat, exitPres=None):
         """Calculates C_f, the ideal thrust coefficient for the nozzle, given the propellant's specific heat ratio, the
         ambient and chamber pressures. If nozzle exit presure isn't provided, it will be calculated. dThroat is the 
-        change in throat diameter due to erosion or slag accumulation."""
-        if chamberPres == 0:
+        change in throat diameter due to erosion or slag accumulation. The pressures, gamma and dThroat can also be
+        arrays, as long as none of the chamber pressures are 0."""
+        if not isinstance(chamberPres, np.ndarray) and chamberPres == 0:
             return 0
 
         if exitPres is None:
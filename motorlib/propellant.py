@@ -1,5 +1,8 @@
 """Propellant submodule that contains the propellant class."""
 
+from bisect import bisect_right
+
+import numpy as np
 from scipy.optimize import fsolve
 
 from .properties import PropertyCollection, FloatProperty, StringProperty, TabularProperty
@@ -129,3 +132,159 @@ class Propellant(PropertyCollection):
     def addTab(self, tab):
         """Adds a set of combustion properties to the propellant"""
         self.props['tabs'].addTab(tab)
+
+    def compile(self):
+        """Returns a CompiledPropellant with the propellant's current properties, for use while simulating."""
+        return CompiledPropellant(self)
+
+
+class CompiledPropellant():
+    """A snapshot of a propellant's properties that is built once per simulation, so lookups don't have to go through
+    the property collections on every step. The tabs' pressure ranges are sorted so the tab that a pressure falls in can
+    be found with a bisection, and the constants each tab uses in the burn rate and Kn-pressure relations are found up
+    front. It answers the same questions about combustion properties as the Propellant it was built from, with the same
+    results, and getBurnRate and getPressureFromKn also accept arrays. It is not updated if the propellant changes. The
+    number of times a tab has been looked up for a single pressure is counted in lookupCount, to check that the
+    simulation doesn't repeat lookups."""
+    def __init__(self, propellant):
+        self.lookupCount = 0
+        self.density = propellant.getProperty('density')
+        tabs = propellant.getProperty('tabs')
+        # Tabs are kept in their original order so pressures outside of all ranges pick the same tab as the propellant
+        self.combustionProperties = tuple((tab['a'], tab['n'], tab['k'], tab['t'], tab['m']) for tab in tabs)
+        self.minPressures = np.array([tab['minPressure'] for tab in tabs], dtype=float)
+        self.maxPressures = np.array([tab['maxPressure'] for tab in tabs], dtype=float)
+        self.minValidPressure = min(tab['minPressure'] for tab in tabs)
+        self.maxValidPressure = max(tab['maxPressure'] for tab in tabs)
+
+        self.sortedTabs = tuple(sorted(range(len(tabs)), key=lambda tabId: tabs[tabId]['minPressure']))
+        self.sortedMinPressures = tuple(tabs[tabId]['minPressure'] for tabId in self.sortedTabs)
+
+        ballA, ballN, gamma, temp, molarMass = (np.array(values, dtype=float)
+            for values in zip(*self.combustionProperties))
+        self.ballA = ballA
+        self.ballN = ballN
+        self.gamma = gamma
+        self.temp = temp
+        self.molarMass = molarMass
+        # The inverse of each tab's characteristic velocity, and the exponent that Kn is raised to to get pressure
+        self.cStarDenominators = ((gamma / ((gasConstant / molarMass) * temp))
+            * ((2 / (gamma + 1)) ** ((gamma + 1) / (gamma - 1)))) ** 0.5
+        self.pressureExponents = 1 / (1 - ballN)
+        cStarNum = (gamma * gasConstant / molarMass * temp)**0.5
+        cStarDenom = gamma * ((2 / (gamma + 1))**((gamma + 1) / (gamma - 1)))**0.5
+        self.cStars = cStarNum / cStarDenom
+        # Which tabs the special cases at either end of the pressure range in getPressureFromKn apply to
+        self.lowestTabs = self.minPressures == self.minValidPressure
+        self.highestTabs = self.maxPressures == self.maxValidPressure
+        self.tabCStars = tuple(self.cStars.tolist())
+        self.tabConstants = tuple(zip(self.cStarDenominators.tolist(), self.pressureExponents.tolist(),
+            self.minPressures.tolist(), self.maxPressures.tolist(), self.lowestTabs.tolist(), self.highestTabs.tolist()))
+
+        for array in (self.minPressures, self.maxPressures, self.ballA, self.ballN, self.gamma, self.temp,
+                      self.molarMass, self.cStarDenominators,
+                      self.pressureExponents, self.cStars, self.lowestTabs, self.highestTabs):
+            array.setflags(write=False)
+
+    def getTabIndex(self, pressure):
+        """Returns the index of the tab whose properties apply at 'pressure'. This is the tab whose range it is inside
+        of, or the tab with the closest end of its range if there isn't one."""
+        self.lookupCount += 1
+        sortedIndex = bisect_right(self.sortedMinPressures, pressure) - 1
+        if sortedIndex >= 0:
+            tabId = self.sortedTabs[sortedIndex]
+            _, _, minPressure, maxPressure, _, _ = self.tabConstants[tabId]
+            if minPressure < pressure < maxPressure:
+                return tabId
+        distances = np.minimum(np.abs(pressure - self.minPressures), np.abs(pressure - self.maxPressures))
+        return int(np.argmin(distances))
+
+    def getTabIndices(self, pressures):
+        """Returns an array of the index of the tab that applies to each pressure in the array 'pressures'."""
+        sortedIndices = np.searchsorted(self.sortedMinPressures, pressures, side='right') - 1
+        tabIds = np.asarray(self.sortedTabs)[np.maximum(sortedIndices, 0)]
+        inside = ((sortedIndices >= 0) & (self.minPressures[tabIds] < pressures)
+            & (pressures < self.maxPressures[tabIds]))
+        if not np.all(inside):
+            distances = np.minimum(np.abs(pressures[..., np.newaxis] - self.minPressures),
+                np.abs(pressures[..., np.newaxis] - self.maxPressures))
+            tabIds = np.where(inside, tabIds, np.argmin(distances, axis=-1))
+        return tabIds
+
+    def getCombustionProperties(self, pressure):
+        """Returns the propellant's a, n, gamma, combustion temp and molar mass for a given pressure"""
+        return self.combustionProperties[self.getTabIndex(pressure)]
+
+    def getThermoState(self, pressure):
+        """Returns a ThermoState with all of the propellant's properties at 'pressure', from a single tab lookup."""
+        tabId = self.getTabIndex(pressure)
+        return ThermoState(pressure, self.combustionProperties[tabId], self.tabCStars[tabId])
+
+    def getThermoStates(self, pressures):
+        """Returns a ThermoState for an array of pressures, where each property is an array with an element for each
+        pressure."""
+        tabIds = self.getTabIndices(pressures)
+        combustionProperties = tuple(values[tabIds]
+            for values in (self.ballA, self.ballN, self.gamma, self.temp, self.molarMass))
+        return ThermoState(pressures, combustionProperties, self.cStars[tabIds])
+
+    def getCStar(self, pressure):
+        """Returns the propellant's characteristic velocity."""
+        return self.tabCStars[self.getTabIndex(pressure)]
+
+    def getBurnRate(self, pressure):
+        """Returns the propellant's burn rate for the given pressure, or an array of them for an array of pressures."""
+        if not isinstance(pressure, np.ndarray):
+            ballA, ballN, _, _, _ = self.getCombustionProperties(pressure)
+            return ballA * (pressure ** ballN)
+        tabIds = self.getTabIndices(pressure)
+        return self.ballA[tabIds] * (pressure ** self.ballN[tabIds])
+
+    def getPressureFromKn(self, kn):
+        """Returns the steady state chamber pressure at a Kn, or an array of them for an array of Kn values. The tab is
+        picked the same way as in Propellant.getPressureFromKn."""
+        if not isinstance(kn, np.ndarray):
+            closestPressure = None
+            closestError = None
+            for tabId, (denom, exponent, minPressure, maxPressure, lowest, highest) in enumerate(self.tabConstants):
+                num = kn * self.density * self.combustionProperties[tabId][0]
+                tabPressure = (num / denom) ** exponent
+                if lowest and tabPressure < maxPressure:
+                    return tabPressure
+                if highest and minPressure < tabPressure:
+                    return tabPressure
+                if minPressure < tabPressure < maxPressure:
+                    return tabPressure
+                error = min(abs(minPressure - tabPressure), abs(tabPressure - maxPressure))
+                if closestError is None or error < closestError:
+                    closestPressure, closestError = tabPressure, error
+            return closestPressure
+
+        kn = kn[..., np.newaxis]
+        tabPressures = ((kn * self.density * self.ballA) / self.cStarDenominators) ** self.pressureExponents
+        valid = ((self.lowestTabs & (tabPressures < self.maxPressures))
+            | (self.highestTabs & (self.minPressures < tabPressures))
+            | ((self.minPressures < tabPressures) & (tabPressures < self.maxPressures)))
+        errors = np.minimum(np.abs(self.minPressures - tabPressures), np.abs(tabPressures - self.maxPressures))
+        # The first valid tab is used, and the one with the smallest error if none are
+        tabIds = np.where(np.any(valid, axis=-1), np.argmax(valid, axis=-1), np.argmin(errors, axis=-1))
+        return np.take_along_axis(tabPressures, tabIds[..., np.newaxis], axis=-1)[..., 0]
+
+    def getMinimumValidPressure(self):
+        """Returns the lowest pressure value with associated combustion properties"""
+        return self.minValidPressure
+
+    def getMaximumValidPressure(self):
+        """Returns the highest pressure value with associated combustion properties"""
+        return self.maxValidPressure
+
+
+class ThermoState():
+    """The combustion properties of a propellant at a single chamber pressure. A simulation step looks these up once
+    for its pressure and passes them to everything that needs them, rather than each calculation finding the right tab
+    again."""
+    def __init__(self, pressure, combustionProperties, cStar):
+        self.pressure = pressure
+        self.ballA, self.ballN, self.gamma, self.temp, self.molarMass = combustionProperties
+        self.cStar = cStar
+        self.burnRate = self.ballA * (pressure ** self.ballN)
@@ -0,0 +1,92 @@
+"""This module contains the functions that save simulation results in openMotor's binary result format and load them
+back. A result file starts with a short preamble and a JSON header that holds the motor, the alerts and a description
+of each channel, which is followed by the raw data of the channels. The data is uncompressed and aligned so readers
+can memory-map it and only read the channels that they use."""
+
+import json
+import struct
+
+import numpy as np
+
+from .motor import Motor
+from .simResult import SimulationResult, SimAlert, SimAlertLevel, SimAlertType, MappedLogChannel
+
+fileExtension = '.omres'
+
+# Identifies the file as a result file, and is followed by the length of the header as a little endian uint64
+magic = b'OMRESULT'
+# Bump this whenever the layout of the file changes in a way that old readers can't handle
+formatVersion = 1
+# The header is padded so the data and each channel in it start on a multiple of this many bytes
+alignment = 64
+
+valueTypes = {valueType.__name__: valueType for valueType in (int, float, list, tuple)}
+
+def _padding(size):
+    """Returns the number of bytes needed to pad a block of 'size' bytes to the alignment."""
+    return -size % alignment
+
+def saveResult(simRes, path):
+    """Writes a simulation result to a result file at 'path'."""
+    channels = {}
+    blocks = []
+    offset = 0
+    for chan, channel in simRes.channels.items():
+        data = np.ascontiguousarray(channel.getData(), dtype=np.dtype(channel.dtype).newbyteorder('<'))
+        channels[chan] = {
+            'name': channel.name,
+            'valueType': channel.valueType.__name__,
+            'unit': channel.unit,
+            'dtype': data.dtype.str,
+            'shape': list(data.shape),
+            'offset': offset,
+            'stats': channel.getStats()
+        }
+        blocks.append(data)
+        offset += data.nbytes + _padding(data.nbytes)
+
+    header = {
+        'formatVersion': formatVersion,
+        'motor': simRes.motor.getDict(),
+        'success': simRes.success,
+        'alerts': [{
+                'level': alert.level.name,
+                'type': alert.type.name,
+                'description': alert.description,
+                'location': alert.location
+            } for alert in simRes.alerts],
+        'channels': channels
+    }
+    headerBytes = json.dumps(header).encode('utf-8')
+    headerBytes += b' ' * _padding(len(magic) + 8 + len(headerBytes))
+
+    with open(path, 'wb') as outFile:
+        outFile.write(magic)
+        outFile.write(struct.pack('<Q', len(headerBytes)))
+        outFile.write(headerBytes)
+        for data in blocks:
+            data.tofile(outFile)
+            outFile.write(bytes(_padding(data.nbytes)))
+
+def loadResult(path):
+    """Loads the simulation result stored in the result file at 'path'. The channels' data is memory-mapped from the
+    file when it is first used, so the file must not be modified while the result is in use. The motor is rebuilt from
+    its properties, but its grains' geometry isn't generated until it is simulated again."""
+    with open(path, 'rb') as inFile:
+        if inFile.read(len(magic)) != magic:
+            raise ValueError('File is not an openMotor result file.')
+        headerLength = struct.unpack('<Q', inFile.read(8))[0]
+        header = json.loads(inFile.read(headerLength).decode('utf-8'))
+    if header['formatVersion'] > formatVersion:
+        raise ValueError("Result file is from a future version and can't be loaded.")
+    dataStart = len(magic) + 8 + headerLength
+
+    simRes = SimulationResult(Motor(header['motor']))
+    simRes.success = header['success']
+    for alert in header['alerts']:
+        simRes.addAlert(SimAlert(SimAlertLevel[alert['level']], SimAlertType[alert['type']], alert['description'],
+                                 alert['location']))
+    simRes.channels = {chan: MappedLogChannel(desc['name'], valueTypes[desc['valueType']], desc['unit'], path,
+                                              desc['dtype'], desc['shape'], dataStart + desc['offset'], desc['stats'])
+                       for chan, desc in header['channels'].items()}
+    return simRes
@@ -1,9 +1,13 @@
 """This module contains the classes that are returned from a simulation, including the main results class and
 the channels and components that it is comprised of."""
 
+import io
 import math
+from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
 from . import geometry
 from . import units
 from . import constants
@@ -48,56 +52,249 @@ class SimAlert():
 class LogChannel():
     """A log channel accepts data from a single source throughout a simulation. It has a human-readable name such as
     'Pressure' to help the user interpret the result, a value type that data passed in will be cast to, and a unit to
-    aid in conversion and display. The data type can either be a scalar (float or int) or a list (list or tuple)."""
+    aid in conversion and display. The data type can either be a scalar (float or int) or a list (list or tuple).
+
+    The data is stored in a numpy array, which is one dimensional for scalar channels and has a row per datapoint and a
+    column per value for list channels. The array starts with room for a few points and doubles in size whenever it
+    fills up, so adding a point doesn't copy the data that is already there most of the time. The arrays returned by
+    the channel are read-only views of this storage, so they can't be modified by accident. The maximum, minimum and
+    sum of the data are updated as each point is added, so the statistics the simulation checks on every step don't
+    need to look through all of the data. List channels also keep the peak of each value in the list and the point that
+    it was reached at. The channel's version counts the points that have been added to it, so anything calculated from
+    the data can tell if it is out of date."""
+
+    # The number of datapoints there is room for before the storage first has to grow
+    initialCapacity = 64
+
     def __init__(self, name, valueType, unit):
         if valueType not in (int, float, list, tuple):
             raise TypeError('Value type not in allowed set')
         self.name = name
         self.unit = unit
         self.valueType = valueType
-        self.data = []
+        self.dtype = int if valueType is int else float
+        self._storage = None
+        self._length = 0
+        self._max = None
+        self._min = None
+        self._sum = 0
+        self._maxLocation = None
+        self._peaks = None
+        self._peakIndices = None
+        self.version = 0
+
+    @property
+    def data(self):
+        """A read-only array of all of the datapoints in the channel."""
+        if self._storage is None:
+            shape = (0, 0) if self.valueType in (list, tuple) else (0,)
+            return np.zeros(shape, dtype=self.dtype)
+        view = self._storage[:self._length]
+        view.flags.writeable = False
+        return view
 
     def getData(self, unit=None):
         """Return all of the data in the channel, converting it if a type is specified."""
         if unit is None: # No conversion needed
             return self.data
-
-        if self.valueType in (list, tuple):
-            return [[units.convert(d, self.unit, unit) for d in p] for p in self.data]
-        # If the data type isn't a list, it should be a scalar
-        return [units.convert(p, self.unit, unit) for p in self.data]
+        return units.convert(self.data, self.unit, unit)
 
     def getPoint(self, i):
-        """Returns a specific datapoint by index."""
-        return self.data[i]
+        """Returns a specific datapoint by index. Scalar channels return a single value, and list channels return an
+        array with the values of the point."""
+        if self.valueType in (list, tuple):
+            return self.data[i]
+        return self.data[i].item()
 
     def getLast(self):
         """Returns the last datapoint."""
-        return self.data[-1]
+        return self.getPoint(-1)
 
     def addData(self, data):
         """Adds a new datapoint to the end."""
-        self.data.append(data)
+        if self._storage is None:
+            shape = (self.initialCapacity, ) + np.shape(data)
+            self._storage = np.zeros(shape, dtype=self.dtype)
+        elif self._length == len(self._storage):
+            grown = np.zeros((2 * len(self._storage), ) + self._storage.shape[1:], dtype=self.dtype)
+            grown[:self._length] = self._storage
+            self._storage = grown
+        self._storage[self._length] = data
+        point = self._storage[self._length]
+        self._updateStats(point)
+        self._length += 1
+        self.version += 1
+
+    def _updateStats(self, point):
+        """Updates the running statistics with a point that was just stored, before it is counted in the length. The
+        points are short, so this works on them as python values, which is quicker than numpy for so few elements."""
+        if self.valueType in (list, tuple):
+            values = point.tolist()
+            if len(values) == 0:
+                return
+            pointMax = max(values)
+            pointMin = min(values)
+            index = values.index(pointMax)
+            if self._peaks is None:
+                self._peaks = values
+                self._peakIndices = [0] * len(values)
+            else:
+                for valueIndex, value in enumerate(values):
+                    if value > self._peaks[valueIndex]:
+                        self._peaks[valueIndex] = value
+                        self._peakIndices[valueIndex] = self._length
+        else:
+            index = None
+            pointMax = pointMin = point.item()
+            self._sum += pointMax
+        # Ties keep the earliest point, so the location is where the value was first reached
+        if self._max is None or pointMax > self._max:
+            self._max = pointMax
+            self._maxLocation = (self._length, index)
+        if self._min is None or pointMin < self._min:
+            self._min = pointMin
 
     def getAverage(self):
         """Returns the average of the datapoints."""
         if self.valueType in (list, tuple):
             raise NotImplementedError('Average not supported for list types')
-        return sum(self.data) / len(self.data)
+        return self._sum / self._length
 
     def getMax(self):
         """Returns the maximum value of all datapoints. For list datatypes, this operation finds the largest single
         value in any list."""
-        if self.valueType in (list, tuple):
-            return max([max(l) for l in self.data])
-        return max(self.data)
-        
+        if self._max is None:
+            raise ValueError('Channel has no data')
+        return self._max
+
     def getMin(self):
         """Returns the minimum value of all datapoints. For list datatypes, this operation finds the smallest single
         value in any list."""
+        if self._min is None:
+            raise ValueError('Channel has no data')
+        return self._min
+
+    def getMaxLocation(self):
+        """Returns where the maximum value was first reached, or None if the channel has no data. Scalar channels return
+        the index of the datapoint, and list channels return a tuple of the index of the datapoint and the index of the
+        value in its list."""
+        if self._maxLocation is None:
+            return None
         if self.valueType in (list, tuple):
-            return min([min(l) for l in self.data])
-        return min(self.data)
+            return self._maxLocation
+        return self._maxLocation[0]
+
+    def getPeaks(self):
+        """Returns an array of the largest value reached by each element of the lists in a list channel."""
+        if self.valueType not in (list, tuple):
+            raise NotImplementedError('Peaks only supported for list types')
+        return np.array(self._peaks, dtype=self.dtype)
+
+    def getPeakIndices(self):
+        """Returns an array of the index of the datapoint where each element of the lists in a list channel first
+        reached its peak."""
+        if self.valueType not in (list, tuple):
+            raise NotImplementedError('Peaks only supported for list types')
+        return np.array(self._peakIndices, dtype=int)
+
+    def getStats(self):
+        """Returns a dictionary of the channel's running statistics, so they can be stored alongside its data."""
+        return {
+            'max': self._max,
+            'min': self._min,
+            'sum': self._sum,
+            'maxLocation': self._maxLocation,
+            'peaks': self._peaks,
+            'peakIndices': self._peakIndices
+        }
+
+class MappedLogChannel(LogChannel):
+    """A log channel whose data is stored in a file, such as a result file, rather than in memory. The data is
+    memory-mapped the first time it is accessed, so channels that are never used are never read. The file holds the
+    raw array with the given dtype and shape at byte 'offset', and the channel's statistics are passed in rather than
+    calculated from the data for the same reason. Adding data to the channel copies the existing data into memory."""
+    def __init__(self, name, valueType, unit, path, dtype, shape, offset, stats):
+        super().__init__(name, valueType, unit)
+        self.path = path
+        self._fileDtype = np.dtype(dtype)
+        self._shape = tuple(shape)
+        self._offset = offset
+        self._length = self._shape[0]
+        self.version = self._length
+        self._max = stats['max']
+        self._min = stats['min']
+        self._sum = stats['sum']
+        self._maxLocation = None if stats['maxLocation'] is None else tuple(stats['maxLocation'])
+        self._peaks = stats['peaks']
+        self._peakIndices = stats['peakIndices']
+
+    def _mapStorage(self):
+        """Maps the channel's data from the file if it hasn't been yet."""
+        if self._storage is None and self._length > 0:
+            self._storage = np.memmap(self.path, dtype=self._fileDtype, mode='r', offset=self._offset,
+                                      shape=self._shape)
+
+    @property
+    def data(self):
+        """A read-only array of all of the datapoints in the channel."""
+        self._mapStorage()
+        return super().data
+
+    def addData(self, data):
+        """Adds a new datapoint to the end."""
+        self._mapStorage()
+        super().addData(data)
+
+@dataclass(frozen=True)
+class ResultSummary():
+    """The headline numbers of a simulation, such as its impulse and designation. A simulation result calculates these
+    once from its channels rather than every time they are displayed or exported, and keeps the channel versions it used
+    in 'dataVersion' so the summary can be replaced if more data is added."""
+    dataVersion: tuple
+    burnTime: float
+    impulse: float
+    averageForce: float
+    averagePressure: float
+    maxPressure: float
+    propellantMass: float
+    isp: float
+    designation: str
+    fullDesignation: str
+    impulseClassPercentage: float
+
+    @classmethod
+    def fromResult(cls, simRes, dataVersion):
+        """Calculates the summary of a simulation result's data. The version of the data must be passed in."""
+        if len(simRes.channels['time'].getData()) == 0:
+            return cls(dataVersion, 0, 0, 0, 0, 0, 0, 0, 'N/A', '0N/A', 0)
+
+        impulse = simRes.calcImpulse()
+        averageForce = simRes.getTimeAverage('force')
+        propellantMass = float(np.sum(simRes.channels['mass'].getPoint(0)))
+        isp = 0 if propellantMass == 0 else impulse / (propellantMass * constants.standardGravity)
+
+        if impulse < 1.25: # This is to avoid a domain error finding log(0)
+            designation = 'N/A'
+            impulseClassPercentage = 0
+        else:
+            impulseClass = int(math.log(impulse / 1.25, 2))
+            designation = chr(impulseClass + 65) + str(int(averageForce))
+            minClassImpulse = 1.25 * 2 ** impulseClass
+            impulseClassPercentage = (impulse - minClassImpulse) / minClassImpulse
+
+        return cls(
+            dataVersion=dataVersion,
+            burnTime=simRes.channels['time'].getLast(),
+            impulse=impulse,
+            averageForce=averageForce,
+            averagePressure=simRes.getTimeAverage('pressure'),
+            maxPressure=simRes.channels['pressure'].getMax(),
+            propellantMass=propellantMass,
+            isp=isp,
+            designation=designation,
+            fullDesignation='{:.0f}{}'.format(impulse, designation),
+            impulseClassPercentage=impulseClassPercentage
+        )
 
 singleValueChannels = ['time', 'kn', 'pressure', 'force', 'volumeLoading', 'exitPressure', 'dThroat']
 multiValueChannels = ['mass', 'massFlow', 'massFlux', 'regression', 'web', 'machNumber']
@@ -128,6 +325,21 @@ class SimulationResult():
             'machNumber': LogChannel('Core Mach Number', tuple, ''),
         }
 
+        self._summary = None
+
+    def getDataVersion(self):
+        """Returns a tuple of the versions of all of the channels, which changes whenever data is added to any of them."""
+        return tuple(channel.version for channel in self.channels.values())
+
+    @property
+    def summary(self):
+        """The ResultSummary of the simulated data. It is calculated the first time it is needed and then reused until
+        data is added to the channels."""
+        dataVersion = self.getDataVersion()
+        if self._summary is None or self._summary.dataVersion != dataVersion:
+            self._summary = ResultSummary.fromResult(self, dataVersion)
+        return self._summary
+
     def addAlert(self, alert):
         """Add an entry to the list of alerts for the simulation."""
         self.alerts.append(alert)
@@ -145,61 +357,68 @@ class SimulationResult():
         """Returns the highest Kn that was observed during the motor's burn."""
         return self.channels['kn'].getMax()
 
+    def getTimeAverage(self, channel):
+        """Returns the average of a scalar channel over the burn. Each point is weighted by the time since the point
+        before it, the same way getImpulse integrates force, so the result doesn't depend on the timestep being
+        constant."""
+        times = self.channels['time'].getData()
+        if times[-1] == 0:
+            return self.channels[channel].getAverage()
+        weights = np.diff(times, prepend=0)
+        return float(np.sum(self.channels[channel].getData() * weights) / times[-1])
+
     def getAveragePressure(self):
         """Returns the average chamber pressure observed during the simulation."""
-        return self.channels['pressure'].getAverage()
+        return self.summary.averagePressure
 
     def getMaxPressure(self):
         """Returns the highest chamber pressure that was observed during the motor's burn."""
-        return self.channels['pressure'].getMax()
+        return self.summary.maxPressure
         
     def getMinExitPressure(self):
         """Returns the lowest exit pressure that was observed during the motor's burn, ignoring startup and shutdown transients"""
-        exit_pressures = self.channels['exitPressure'].getData()
-        return min(exit_pressures)
+        return self.channels['exitPressure'].getMin()
         
     def getPercentBelowThreshold(self, channel, threshold):
-        """Returns the total number of seconds spent below a given threshold value"""
-        count = 0
-        data = self.channels[channel].getData()
-        for point in data:
-            if point < threshold:
-                count += 1
-        return count/len(data)
+        """Returns the fraction of the burn time spent below a given threshold value. Each point accounts for the time
+        since the point before it."""
+        times = self.channels['time'].getData()
+        if times[-1] == 0:
+            return 0
+        weights = np.diff(times, prepend=0)
+        belowTime = np.sum(weights[self.channels[channel].getData() < threshold])
+        return float(belowTime / times[-1])
 
     def getImpulse(self, stop=None):
         """Returns the impulse the simulated motor produced. If 'stop' is set to a value other than None, only the
         impulse to that point in the data is returned."""
-        impulse = 0
-        lastTime = 0
-        for time, force in zip(self.channels['time'].data[:stop], self.channels['force'].data[:stop]):
-            impulse += force * (time - lastTime)
-            lastTime = time
-        return impulse
+        if stop is None:
+            return self.summary.impulse
+        return self.calcImpulse(stop)
+
+    def calcImpulse(self, stop=None):
+        """Integrates the force channel to find the impulse, optionally only up to the point 'stop'. Each point's force
+        acts for the time since the point before it."""
+        times = self.channels['time'].getData()[:stop]
+        forces = self.channels['force'].getData()[:stop]
+        return float(np.sum(forces * np.diff(times, prepend=0)))
 
     def getAverageForce(self):
-        """Returns the average force the motor produced during its burn."""
-        return self.channels['force'].getAverage()
+        """Returns the average force the motor produced during its burn, which is its impulse over its burn time."""
+        return self.summary.averageForce
 
     def getDesignation(self):
         """Returns the standard amateur rocketry designation (H128, M1297) for the motor."""
-        imp = self.getImpulse()
-        if imp < 1.25: # This is to avoid a domain error finding log(0)
-            return 'N/A'
-        return chr(int(math.log(imp / 1.25, 2)) + 65) + str(int(self.getAverageForce()))
+        return self.summary.designation
 
     def getFullDesignation(self):
         """Returns the full motor designation, which also includes the total impulse prepended on"""
-        return '{:.0f}{}'.format(self.getImpulse(), self.getDesignation())
+        return self.summary.fullDesignation
 
     def getImpulseClassPercentage(self):
         """Returns the percentage of the way between the minimum and maximum impulse for the impulse class that the
         motor is"""
-        impulse = self.getImpulse()
-        if impulse < 1.25:  # This is to avoid a domain error finding log(0)
-            return 0
-        minClassImpulse = 1.25 * 2 ** int(math.log(impulse / 1.25, 2))
-        return (impulse - minClassImpulse) / minClassImpulse
+        return self.summary.impulseClassPercentage
 
     def getPeakMassFlux(self):
         """Returns the maximum mass flux observed at any grain end."""
@@ -207,12 +426,7 @@ class SimulationResult():
 
     def getPeakMassFluxLocation(self):
         """Returns the grain number at which the peak mass flux was observed."""
-        value = self.getPeakMassFlux()
-        # Find the value to get the location
-        for frame in self.channels['massFlux'].getData():
-            if value in frame:
-                return frame.index(value)
-        return None
+        return self.getPeakLocation('massFlux')
 
     def getPeakMachNumber(self):
         """Returns the maximum core mach number observed at any grain end."""
@@ -220,19 +434,21 @@ class SimulationResult():
 
     def getPeakMachNumberLocation(self):
         """Returns the grain number at which the peak core mach number was observed."""
-        value = self.getPeakMachNumber()
-        # Find the value to get the location
-        for frame in self.channels['machNumber'].getData():
-            if value in frame:
-                return frame.index(value)
-        return None
+        return self.getPeakLocation('machNumber')
+
+    def getPeakLocation(self, channel):
+        """Returns the grain number at which the largest value of a list channel was observed, or None if the channel
+        is empty. If the value occurs more than once, the grain it was first observed at is returned."""
+        location = self.channels[channel].getMaxLocation()
+        if location is None:
+            return None
+        return location[1]
 
     def getISP(self, index=None):
         """Returns the specific impulse that the simulated motor delivered."""
         if index is None:
-            propMass = self.getPropellantMass()
-        else:
-            propMass = self.getPropellantMass() - self.getPropellantMass(index)
+            return self.summary.isp
+        propMass = self.getPropellantMass() - self.getPropellantMass(index)
         if propMass == 0:
             return 0
         return self.getImpulse(index) / (propMass * constants.standardGravity)
@@ -251,7 +467,9 @@ class SimulationResult():
     def getPropellantMass(self, index=0):
         """Returns the total mass of all propellant before the simulated burn. Optionally accepts a index that the mass
         will be sampled at."""
-        return sum(self.channels['mass'].getPoint(index))
+        if index == 0:
+            return self.summary.propellantMass
+        return float(np.sum(self.channels['mass'].getPoint(index)))
 
     def getVolumeLoading(self, index=0):
         """Returns the percentage of the motor's volume occupied by propellant. Optionally accepts a index that the
@@ -290,57 +508,56 @@ class SimulationResult():
         # Otherwise perform the comparison. 0.01 converts the threshold to a %
         return self.channels['force'].getLast() > thrustThres * 0.01 * self.channels['force'].getMax()
 
-    def getCSV(self, pref=None, exclude=[], excludeGrains=[]):
-        """Returns a string that contains a CSV of the simulated data. Preferences can be passed in to set units that
-        the values will be converted to. All log channels are included unless their names are in the include
-        argument. """
-        out = ''
-        outUnits = {}
+    def getCSVColumns(self, pref=None, exclude=[], excludeGrains=[]):
+        """Returns the layout of a CSV of the simulated data as a list with a tuple for each channel in it. The tuples
+        hold the name of the channel, the unit its values are converted to, the titles of its columns and the indices of
+        the grains that are included, which is None for scalar channels. Time is always the first channel."""
+        layout = []
         for chan in self.channels:
-            if chan in exclude:
+            if chan in exclude and chan != 'time':
                 continue
+            channel = self.channels[chan]
             # Get unit from preferences
-            if pref is not None:
-                outUnits[chan] = pref.getUnit(self.channels[chan].unit)
+            outUnit = channel.unit if pref is None else pref.getUnit(channel.unit)
+            if channel.valueType in (float, int):
+                title = channel.name
+                if outUnit != '':
+                    title += '({})'.format(outUnit)
+                columns = (chan, outUnit, [title], None)
+            else:
+                grains = [gid for gid in range(channel.data.shape[1]) if gid not in excludeGrains]
+                unitSuffix = ';{}'.format(outUnit) if outUnit != '' else ''
+                titles = ['{}(G{}{})'.format(channel.name, gid + 1, unitSuffix) for gid in grains]
+                columns = (chan, outUnit, titles, grains)
+            if chan == 'time':
+                layout.insert(0, columns)
             else:
-                outUnits[chan] = self.channels[chan].unit
-            # Add title for column
-            if self.channels[chan].valueType in (float, int):
-                out += self.channels[chan].name
-                if outUnits[chan] != '':
-                    out += '({})'.format(outUnits[chan])
-                out += ','
-            elif self.channels[chan].valueType in (list, tuple):
-                for grain in range(1, len(self.channels[chan].getLast()) + 1):
-                    if grain - 1 not in excludeGrains:
-                        out += self.channels[chan].name + '('
-                        out += 'G{}'.format(grain)
-                        if outUnits[chan] != '':
-                            out += ';{}'.format(outUnits[chan])
-                        out += '),'
-
-        out = out[:-1] # Remove the last comma
-        out += '\n'
-
-        places = 5
-        for ind, time in enumerate(self.channels['time'].getData()):
-            out += str(round(time, places)) + ','
-            for chan in self.channels:
-                if chan in exclude:
-                    continue
-                if chan != 'time':
-                    if self.channels[chan].valueType in (float, int):
-                        orig = self.channels[chan].getPoint(ind)
-                        conv = units.convert(orig, self.channels[chan].unit, outUnits[chan])
-                        rounded = round(conv, places)
-                        out += str(rounded) + ','
-                    elif self.channels[chan].valueType in (list, tuple):
-                        for gid, grainVal in enumerate(self.channels[chan].getPoint(ind)):
-                            if gid not in excludeGrains:
-                                conv = round(units.convert(grainVal, self.channels[chan].unit, outUnits[chan]), places)
-                                out += str(conv) + ','
-
-            out = out[:-1] # Remove the last comma
-            out += '\n'
+                layout.append(columns)
+        return layout
+
+    def writeCSV(self, outFile, pref=None, exclude=[], excludeGrains=[], places=5, chunkSize=4096):
+        """Writes a CSV of the simulated data to a file object. Preferences can be passed in to set units that the
+        values will be converted to. All log channels are included unless their names are in the exclude argument, and
+        values for grains with their indices in excludeGrains are left out of the list channels. The rows are converted
+        and written 'chunkSize' at a time, so the whole document is never held in memory."""
+        layout = self.getCSVColumns(pref, exclude, excludeGrains)
+        outFile.write(','.join(title for _, _, titles, _ in layout for title in titles) + '\n')
+
+        length = len(self.channels['time'].getData())
+        for start in range(0, length, chunkSize):
+            columns = []
+            for chan, outUnit, _, grains in layout:
+                channel = self.channels[chan]
+                values = np.round(units.convert(channel.data[start:start + chunkSize], channel.unit, outUnit), places)
+                if grains is None:
+                    columns.append(values.tolist())
+                else:
+                    columns.extend(values[:, grains].T.tolist())
+            outFile.write(''.join(','.join(map(repr, row)) + '\n' for row in zip(*columns)))
 
-        return out
+    def getCSV(self, pref=None, exclude=[], excludeGrains=[]):
+        """Returns a string that contains a CSV of the simulated data. This takes the same arguments as writeCSV, which
+        should be used instead when the CSV is going to a file."""
+        out = io.StringIO()
+        self.writeCSV(out, pref, exclude, excludeGrains)
+        return out.getvalue()
@@ -2,6 +2,7 @@ from setuptools import setup, find_packages, Extension
 from Cython.Build import cythonize
 import numpy
 import multiprocessing
+import sys
 
 try:
     from pyqt_distutils.build_ui import build_ui
@@ -17,12 +18,31 @@ except ImportError:
     print('App version not available, defaulting to 0.0.0')
     appVersionStr = '0.0.0'
 
+# OpenMP lets the perimeter sweep run on multiple threads. Apple's clang doesn't ship with it, so the sweep is left
+# single threaded there
+if sys.platform == 'win32':
+    openmpArgs = ['/openmp']
+elif sys.platform == 'darwin':
+    openmpArgs = []
+else:
+    openmpArgs = ['-fopenmp']
+
 extensions = [
     Extension(
         "mathlib._find_perimeter_cy",  # Full module path
         ["mathlib/_find_perimeter_cy.pyx"],  # File location
         define_macros=[('NPY_NO_DEPRECATED_API', 'NPY_1_7_API_VERSION')],
-        include_dirs=[numpy.get_include()]
+        include_dirs=[numpy.get_include()],
+        extra_compile_args=openmpArgs,
+        extra_link_args=openmpArgs if sys.platform != 'win32' else []
+    ),
+    Extension(
+        "mathlib._distance_cy",
+        ["mathlib/_distance_cy.pyx"],
+        define_macros=[('NPY_NO_DEPRECATED_API', 'NPY_1_7_API_VERSION')],
+        include_dirs=[numpy.get_include()],
+        extra_compile_args=openmpArgs,
+        extra_link_args=openmpArgs if sys.platform != 'win32' else []
     )
 ]
 
@@ -45,10 +45,11 @@ def compareStat(title, a, b):
 
 def compareStats(simRes, stats):
     print('\tBasic stats:')
-    thrustError = compareStat('Average Thrust', simRes.getAverageForce(), stats['averageThrust'])
-    btError = compareStat('Burn Time', simRes.getBurnTime(), stats['burnTime'])
-    ispError = compareStat('ISP', simRes.getISP(), stats['isp'])
-    propmassError = compareStat('Propellant Mass', simRes.getPropellantMass(), stats['propMass'])
+    summary = simRes.summary
+    thrustError = compareStat('Average Thrust', summary.averageForce, stats['averageThrust'])
+    btError = compareStat('Burn Time', summary.burnTime, stats['burnTime'])
+    ispError = compareStat('ISP', summary.isp, stats['isp'])
+    propmassError = compareStat('Propellant Mass', summary.propellantMass, stats['propMass'])
     score = 1 - ((1 - btError) * (1 - ispError) * (1 - propmassError))
     dispScore = formatPercent(score)
     print('\tOverall error: ' + dispScore)
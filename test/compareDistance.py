@@ -0,0 +1,58 @@
+"""Simulates the regression motors that have FMM grains with each of the methods that regression maps can be generated
+with, and compares the results to the stats recorded for them and the time it took to generate the maps."""
+
+import time
+import warnings
+
+import yaml
+
+import motorlib.motor
+import motorlib.mapCache
+from motorlib.grain import FmmGrain, distanceMethods
+from uilib.fileIO import loadFile, fileTypes
+
+separator = '-' * 65
+
+def compareStat(title, a, b):
+    error = abs(a - b) / b
+    print('\t\t{}: {:.3f} vs {:.3f} ({:.3f}%)'.format(title, a, b, error * 100))
+    return error
+
+def runMethod(path, method, stats):
+    motor = motorlib.motor.Motor(loadFile(path, fileTypes.MOTOR))
+    motor.config.setProperty('distanceMethod', method)
+    config = motor.config
+
+    startTime = time.perf_counter()
+    for grain in motor.grains:
+        if isinstance(grain, FmmGrain):
+            grain.initGeometry(config.getProperty('mapDim'))
+            grain.generateCoreMap()
+            grain.generateRegressionMap(method)
+    mapTime = time.perf_counter() - startTime
+
+    simRes = motor.runSimulation()
+    print("\t'{}' (maps generated in {:.3f} s):".format(method, mapTime))
+    summary = simRes.summary
+    compareStat('Average Thrust', summary.averageForce, stats['averageThrust'])
+    compareStat('Burn Time', summary.burnTime, stats['burnTime'])
+    compareStat('ISP', summary.isp, stats['isp'])
+    compareStat('Propellant Mass', summary.propellantMass, stats['propMass'])
+
+warnings.filterwarnings('ignore')
+# Every map has to be generated to be timed
+motorlib.mapCache.regressionMapCache.enabled = False
+with open('data/tests.yaml', 'r') as readLocation:
+    tests = yaml.safe_load(readLocation)['regression']
+for test in tests:
+    with open(test, 'r') as readLocation:
+        fileData = yaml.safe_load(readLocation)
+    motorData = loadFile(fileData['motor'], fileTypes.MOTOR)
+    if not any(isinstance(grain, FmmGrain) for grain in motorlib.motor.Motor(motorData).grains):
+        continue
+    print(separator)
+    stats = fileData['data']['regression'][-1]
+    print("'{}' compared to results from {}:".format(fileData['name'], stats['version']))
+    for method in distanceMethods:
+        runMethod(fileData['motor'], method, stats['stats'])
+print(separator)
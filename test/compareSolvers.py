@@ -0,0 +1,89 @@
+"""Simulates each of the regression motors with every solver, and compares the results of the regression domain solver
+to the fixed timestep solver. The impulse, burn time and peak pressure have to agree to within the tolerances below for
+the comparison to pass. The adaptive solver is compared to the fixed timestep solver with a short timestep, like the
+ones used to resolve ignition and tail-off, and has to take far fewer steps. The script exits with an error if any of
+the motors don't pass."""
+
+import sys
+import time
+import warnings
+
+import yaml
+
+import motorlib.motor
+from uilib.fileIO import loadFile, fileTypes
+
+separator = '-' * 65
+
+# The largest relative difference from the fixed timestep solver that is accepted for each stat
+tolerances = {
+    'Impulse': 0.01,
+    'Burn Time': 0.01,
+    'Peak Pressure': 0.01
+}
+
+# The timestep that the adaptive solver is compared at, and how many times fewer steps it has to take
+adaptiveTimestep = 0.001
+minStepReduction = 10
+
+def getStats(simRes):
+    return {
+        'Impulse': simRes.getImpulse(),
+        'Burn Time': simRes.getBurnTime(),
+        'Peak Pressure': simRes.getMaxPressure()
+    }
+
+def runSolver(path, solver, timestep=None):
+    motor = motorlib.motor.Motor(loadFile(path, fileTypes.MOTOR))
+    motor.config.setProperty('solver', solver)
+    if timestep is not None:
+        motor.config.setProperty('timestep', timestep)
+    motor.runSimulation() # Fills the regression map cache, so only the solver is timed
+    startTime = time.perf_counter()
+    simRes = motor.runSimulation()
+    return simRes, time.perf_counter() - startTime
+
+def compareSolvers(path):
+    results = {solver: runSolver(path, solver) for solver in motorlib.motor.MotorConfig().props['solver'].values}
+    fixed, fixedTime = results['Fixed Timestep']
+    fixedStats = getStats(fixed)
+    print("\t'Fixed Timestep': {} points in {:.3f} s".format(len(fixed.channels['time'].getData()), fixedTime))
+    passed = True
+    for solver, (simRes, runTime) in results.items():
+        if solver == 'Fixed Timestep':
+            continue
+        print("\t'{}': {} points in {:.3f} s".format(solver, len(simRes.channels['time'].getData()), runTime))
+        if solver != 'Regression Domain':
+            continue
+        for title, value in getStats(simRes).items():
+            error = abs(value - fixedStats[title]) / fixedStats[title]
+            withinTolerance = error <= tolerances[title]
+            passed &= withinTolerance
+            print('\t\t{}: {:.3f} vs {:.3f} ({:.3f}%){}'.format(title, value, fixedStats[title], error * 100,
+                '' if withinTolerance else ' - exceeds {:.1f}%'.format(tolerances[title] * 100)))
+
+    fixedPoints = len(runSolver(path, 'Fixed Timestep', adaptiveTimestep)[0].channels['time'].getData())
+    adaptivePoints = len(runSolver(path, 'Adaptive Timestep', adaptiveTimestep)[0].channels['time'].getData())
+    reduction = fixedPoints / adaptivePoints
+    passed &= reduction >= minStepReduction
+    print('\tWith a {} s timestep: {} fixed vs {} adaptive points ({:.1f}x fewer){}'.format(adaptiveTimestep,
+        fixedPoints, adaptivePoints, reduction, '' if reduction >= minStepReduction else
+        ' - less than {}x'.format(minStepReduction)))
+    return passed
+
+warnings.filterwarnings('ignore')
+with open('data/tests.yaml', 'r') as readLocation:
+    tests = yaml.safe_load(readLocation)['regression']
+failures = []
+for test in tests:
+    with open(test, 'r') as readLocation:
+        fileData = yaml.safe_load(readLocation)
+    print(separator)
+    print("'{}':".format(fileData['name']))
+    if not compareSolvers(fileData['motor']):
+        failures.append(fileData['name'])
+print(separator)
+if len(failures) > 0:
+    print('Solvers did not meet their targets for: {}'.format(', '.join(failures)))
+    sys.exit(1)
+print('Solvers met their targets for all motors')
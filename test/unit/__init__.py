@@ -1,5 +1,19 @@
+import tempfile
+
+import motorlib.mapCache
+
+# The tests use a regression map cache of their own, so they never read or write the one in the user's data directory
+cacheDirectory = tempfile.TemporaryDirectory()
+motorlib.mapCache.regressionMapCache = motorlib.mapCache.RegressionMapCache(cacheDirectory.name)
+
 from .geometry import *
 from .motor import *
+from .burnback import *
 from .nozzle import *
 from .propellant import *
+from .perimeter import *
+from .distance import *
+from .mapCache import *
+from .simResult import *
+from .resultFile import *
 from .grains import *
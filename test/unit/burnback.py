@@ -0,0 +1,92 @@
+import unittest
+import numpy as np
+import motorlib.motor
+import motorlib.grains
+import motorlib.burnback
+
+class TestBurnbackTableMethods(unittest.TestCase):
+
+    def test_batesTable(self):
+        config = motorlib.motor.MotorConfig()
+        config.setProperties({'mapDim': 500})
+
+        grain = motorlib.grains.BatesGrain()
+        grain.setProperties({
+            'diameter': 0.083058,
+            'length': 0.1397,
+            'coreDiameter': 0.05,
+            'inhibitedEnds': 'Neither'
+        })
+        grain.simulationSetup(config)
+        table = grain.burnbackTable
+
+        for reg in (0, 0.00123, 0.0075, 0.015):
+            self.assertAlmostEqual(table.getSurfaceArea(reg), grain.getSurfaceAreaAtRegression(reg), 7)
+            self.assertAlmostEqual(table.getVolume(reg), grain.getVolumeAtRegression(reg), 9)
+            self.assertAlmostEqual(table.getWebLeft(reg), grain.getWebLeft(reg), 7)
+            self.assertAlmostEqual(table.getPortArea(reg), grain.getPortArea(reg), 7)
+            self.assertAlmostEqual(table.getFaceArea(reg), grain.getFaceArea(reg), 7)
+            self.assertAlmostEqual(table.getCorePerimeter(reg), grain.getCorePerimeter(reg), 9)
+
+        # Past burnout, the table holds the values at the end of the web
+        self.assertAlmostEqual(table.getWebLeft(1), 0)
+
+    def test_endBurnerTable(self):
+        config = motorlib.motor.MotorConfig()
+        config.setProperties({'mapDim': 500})
+
+        grain = motorlib.grains.EndBurningGrain()
+        grain.setProperties({
+            'diameter': 0.01,
+            'length': 0.1
+        })
+        grain.simulationSetup(config)
+        table = grain.burnbackTable
+
+        self.assertAlmostEqual(table.getVolume(0.05), grain.getVolumeAtRegression(0.05))
+        self.assertAlmostEqual(table.getWebLeft(0.05), 0.05)
+        self.assertIsNone(table.getPortArea(0))
+        self.assertIsNone(table.getCorePerimeter(0))
+
+    def test_tableStack(self):
+        config = motorlib.motor.MotorConfig()
+        config.setProperties({'mapDim': 500})
+
+        grains = []
+        for coreDiameter in (0.02, 0.05):
+            grain = motorlib.grains.BatesGrain()
+            grain.setProperties({
+                'diameter': 0.083058,
+                'length': 0.1397,
+                'coreDiameter': coreDiameter,
+                'inhibitedEnds': 'Neither'
+            })
+            grains.append(grain)
+        endBurner = motorlib.grains.EndBurningGrain()
+        endBurner.setProperties({'diameter': 0.01, 'length': 0.1})
+        grains.append(endBurner)
+        for grain in grains:
+            grain.simulationSetup(config)
+        tables = [grain.burnbackTable for grain in grains]
+        stack = motorlib.burnback.BurnbackTableStack(tables)
+
+        # Looking up every grain at once should give exactly what each table gives, including on samples and past
+        # burnout
+        depths = [np.array([0, 0, 0]), np.array([0.00123, 0.0075, 0.05]), np.array([1, 0.015, 0.2])]
+        depths.append(np.array([table.regression[7] for table in tables]))
+        for regDist in depths:
+            for column in ('surfaceArea', 'volume', 'webLeft'):
+                expected = [table.lookup(getattr(table, column), reg) for table, reg in zip(tables, regDist)]
+                self.assertTrue(np.array_equal(stack.lookup(column, regDist), expected))
+
+        # Several depths can be looked up for each grain
+        regDist = np.linspace(0, 0.03, 5)
+        expected = [table.getVolume(regDist) for table in tables]
+        self.assertTrue(np.array_equal(stack.getVolume(np.tile(regDist, (3, 1))), expected))
+
+        # The end burner has no port
+        self.assertIsNone(stack.getPortArea(np.zeros(3)))
+        self.assertIsNotNone(motorlib.burnback.BurnbackTableStack(tables[:2]).getPortArea(np.zeros(2)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+import numpy as np
+from scipy import ndimage
+
+import mathlib
+
+
+class TestDistanceMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.image = rng.random((120, 90)) > 0.01
+
+    def test_distanceTransform(self) -> None:
+        expected = ndimage.distance_transform_edt(self.image)
+        self.assertTrue(np.array_equal(mathlib.distance_transform(self.image), expected))
+        scaled = mathlib.distance_transform(self.image, scale=0.5, dtype=np.float32)
+        self.assertEqual(scaled.dtype, np.float32)
+        self.assertTrue(np.allclose(scaled, expected * 0.5, rtol=1e-6))
+
+    def test_distanceTransformThreads(self) -> None:
+        serial = mathlib.distance_transform(self.image, num_threads=1)
+        for numThreads in [2, 3, 8]:
+            parallel = mathlib.distance_transform(self.image, num_threads=numThreads)
+            self.assertTrue(np.array_equal(serial, parallel))
+
+    def test_distanceTransformNoZeros(self) -> None:
+        self.assertTrue(np.all(np.isinf(mathlib.distance_transform(np.ones((10, 10))))))
@@ -2,3 +2,4 @@ from .conical import *
 from .bates import *
 from .conical import *
 from .endBurner import *
+from .finocyl import *
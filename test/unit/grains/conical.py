@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import motorlib.grains
 
 class ConicalGrainMethods(unittest.TestCase):
@@ -116,5 +117,34 @@ class ConicalGrainMethods(unittest.TestCase):
         self.assertAlmostEqual(testGrain.getWebLeft(0.001), 0.003)
         self.assertAlmostEqual(testGrain.getWebLeft(0.0038), 0.0002)
 
+    def test_arrayRegression(self):
+        properties = {
+            'length': 0.1,
+            'diameter': 0.01,
+            'forwardCoreDiameter': 0.0025,
+            'aftCoreDiameter': 0.002,
+            'inhibitedEnds': 'Top'
+        }
+
+        testGrain = motorlib.grains.ConicalGrain()
+        testGrain.setProperties(properties)
+
+        # The last depth is past where the large end of the core reaches the casting tube
+        regDists = np.array([0, 0.001, 0.002, 0.0036, 0.0038])
+        methods = [
+            testGrain.getSurfaceAreaAtRegression,
+            testGrain.getVolumeAtRegression,
+            testGrain.getWebLeft,
+            testGrain.getPortArea
+        ]
+        for method in methods:
+            results = method(regDists)
+            for regDist, result in zip(regDists, results):
+                self.assertAlmostEqual(result, method(regDist))
+        forward, aft = testGrain.getEndPositions(regDists)
+        for regDist, forwardPos, aftPos in zip(regDists, forward, aft):
+            self.assertAlmostEqual(forwardPos, testGrain.getEndPositions(regDist)[0])
+            self.assertAlmostEqual(aftPos, testGrain.getEndPositions(regDist)[1])
+
 if __name__ == '__main__':
     unittest.main()
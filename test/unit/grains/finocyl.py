@@ -0,0 +1,110 @@
+import unittest
+import numpy as np
+from scipy.signal import savgol_filter
+import motorlib.grain
+import motorlib.grains
+
+class FinocylGrainMethods(unittest.TestCase):
+
+    def buildGrain(self, numFins=6):
+        grain = motorlib.grains.Finocyl()
+        grain.setProperties({
+            'diameter': 0.083,
+            'length': 0.1,
+            'coreDiameter': 0.03,
+            'finWidth': 0.005,
+            'finLength': 0.02,
+            'numFins': numFins,
+            'invertedFins': False
+        })
+        return grain
+
+    def test_generateRegressionMap(self):
+        grain = self.buildGrain()
+        grain.initGeometry(201)
+        grain.generateCoreMap()
+        grain.generateRegressionMap()
+
+        # The face area at each depth should match counting the pixels that regress further than it
+        valid = np.logical_not(grain.mask)
+        faceArea = []
+        for i in range(int(np.amax(grain.regressionMap) * grain.mapDim) + 2):
+            count = np.count_nonzero(np.logical_and(grain.regressionMap > (i / grain.mapDim), valid))
+            faceArea.append(grain.mapToArea(count))
+        self.assertTrue(np.array_equal(grain.faceArea, savgol_filter(faceArea, 31, 5)))
+        self.assertAlmostEqual(grain.faceArea[0], np.pi * ((0.083 / 2) ** 2) - grain.getPortArea(0), 5)
+
+    def test_mapSymmetry(self):
+        for numFins, symmetry in [(6, (True, True)), (5, (False, True))]:
+            for mapDim in [200, 201]:
+                grain = self.buildGrain(numFins)
+                self.assertEqual(grain.getMapSymmetry(), symmetry)
+                grain.initGeometry(mapDim)
+                grain.generateCoreMap()
+                grain.generateRegressionMap()
+                symmetricMap = grain.regressionMap
+                self.assertEqual(symmetricMap.shape, (mapDim, mapDim))
+                self.assertTrue(np.array_equal(np.ma.getmaskarray(symmetricMap), grain.mask))
+                self.assertTrue(np.array_equal(symmetricMap, symmetricMap[:, ::-1]))
+
+                # Running the FMM on the whole map should give the same distances to within a pixel, which is how far
+                # off the fins can be drawn from exactly symmetric
+                grain.getMapSymmetry = lambda: (False, False)
+                grain.generateRegressionMap()
+                valid = np.logical_not(grain.mask)
+                difference = np.abs(np.ma.getdata(symmetricMap) - np.ma.getdata(grain.regressionMap))[valid]
+                self.assertLess(np.amax(difference), 2 / mapDim)
+
+    def test_distanceMethods(self):
+        # Without fins, the core is a circle and the exact distance to it is known
+        grain = self.buildGrain(0)
+        grain.initGeometry(201)
+        grain.generateCoreMap()
+        coreRadius = grain.normalize(0.03) / 2
+        exact = np.maximum(np.hypot(grain.mapX, grain.mapY) - coreRadius, 0)
+        valid = np.logical_not(grain.mask)
+        pixel = 2 / grain.mapDim
+        for method in motorlib.grain.distanceMethods:
+            grain.generateRegressionMap(method)
+            self.assertTrue(np.array_equal(np.ma.getmaskarray(grain.regressionMap), grain.mask))
+            error = (np.ma.getdata(grain.regressionMap) - exact)[valid]
+            self.assertLess(np.amax(np.abs(error)), pixel)
+            self.assertLess(abs(np.mean(error)), pixel / 2)
+            self.assertAlmostEqual(grain.wallWeb, (0.083 - 0.03) / 2, 3)
+
+    def test_singlePrecisionMap(self):
+        grain = self.buildGrain()
+        grain.initGeometry(201)
+        grain.generateCoreMap()
+        for method in motorlib.grain.distanceMethods:
+            grain.singlePrecisionMapDim = 2000
+            grain.generateRegressionMap(method)
+            grain.generateCorePerimeter()
+            doubleMap, faceArea, corePerimeter = grain.regressionMap, grain.faceArea, grain.corePerimeter
+
+            grain.singlePrecisionMapDim = 200
+            grain.generateRegressionMap(method)
+            grain.generateCorePerimeter()
+            self.assertEqual(grain.regressionMap.dtype, np.float32)
+            self.assertTrue(np.allclose(grain.regressionMap, doubleMap, rtol=1e-6, atol=1e-6))
+            self.assertLess(np.amax(np.abs(grain.faceArea - faceArea)), np.amax(faceArea) * 1e-2)
+            self.assertLess(np.amax(np.abs(grain.corePerimeter - corePerimeter)), np.amax(corePerimeter) * 1e-2)
+
+    def test_sharedMapGrid(self):
+        grains = [self.buildGrain(numFins) for numFins in [0, 5, 6]]
+        for grain in grains:
+            grain.initGeometry(202)
+            grain.generateCoreMap()
+
+        # Grains with the same map dimension should all use the same read-only coordinates and mask
+        for grain in grains[1:]:
+            self.assertIs(grain.mapGrid, grains[0].mapGrid)
+            self.assertIs(grain.mask, grains[0].mask)
+        self.assertFalse(grains[0].mask.flags.writeable)
+        self.assertFalse(grains[0].mapX.flags.writeable)
+        self.assertFalse(np.array_equal(grains[1].coreMap, grains[2].coreMap))
+
+        # Once no grain uses a grid, it should be freed
+        del grain
+        del grains
+        self.assertNotIn(202, motorlib.grain._mapGrids)
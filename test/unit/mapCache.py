@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import motorlib.grains
+import motorlib.mapCache
+import motorlib.motor
+
+class RegressionMapCacheMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempDir = tempfile.TemporaryDirectory()
+        # Room in memory for two of the test entries, which hold ten 64 bit values
+        self.cache = motorlib.mapCache.RegressionMapCache(self.tempDir.name, memoryLimit=160)
+
+    def tearDown(self) -> None:
+        self.tempDir.cleanup()
+
+    def buildFinocyl(self):
+        grain = motorlib.grains.Finocyl()
+        grain.setProperties({
+            'diameter': 0.083,
+            'length': 0.1,
+            'coreDiameter': 0.03,
+            'finWidth': 0.005,
+            'finLength': 0.02,
+            'numFins': 6,
+            'invertedFins': False
+        })
+        return grain
+
+    def test_getKey(self):
+        grain = self.buildFinocyl()
+        key = self.cache.getKey(grain, 201, 'Fast Marching')
+        grain.setProperty('length', 0.2)
+        self.assertEqual(self.cache.getKey(grain, 201, 'Fast Marching'), key)
+        self.assertNotEqual(self.cache.getKey(grain, 301, 'Fast Marching'), key)
+        self.assertNotEqual(self.cache.getKey(grain, 201, 'Distance Transform'), key)
+        grain.setProperty('numFins', 4)
+        self.assertNotEqual(self.cache.getKey(grain, 201, 'Fast Marching'), key)
+
+    def test_tiers(self):
+        for key in ['a', 'b', 'c']:
+            self.cache.put(key, {'values': np.full(10, ord(key))})
+        # Only the two most recently used entries stay in memory, but all of them are on disk
+        self.assertEqual(list(self.cache._memory.keys()), ['b', 'c'])
+        self.assertEqual(len(os.listdir(self.tempDir.name)), 3)
+        # Entries that don't fit in memory at all are only kept on disk
+        self.cache.put('e', {'values': np.zeros(30)})
+        self.assertEqual(list(self.cache._memory.keys()), [])
+        self.assertEqual(self.cache._memorySize, 0)
+
+        # Entries are shared with every grain that uses them, so they can't be changed
+        entry = self.cache.get('b')
+        self.assertIs(self.cache.get('b'), entry)
+        with self.assertRaises(ValueError):
+            entry['values'][0] = 0
+
+        reloaded = motorlib.mapCache.RegressionMapCache(self.tempDir.name)
+        self.assertTrue(np.array_equal(reloaded.get('a')['values'], np.full(10, ord('a'))))
+        self.assertIsNone(reloaded.get('d'))
+
+        reloaded.clear()
+        self.assertIsNone(reloaded.get('a'))
+        self.assertEqual(os.listdir(self.tempDir.name), [])
+
+    def test_diskLimit(self):
+        self.cache.diskLimit = 0
+        self.cache.put('a', {'values': np.zeros(10)})
+        self.assertEqual(os.listdir(self.tempDir.name), [])
+
+    def test_damagedFiles(self):
+        # Empty, garbled and half written files are misses, and are removed so they get replaced
+        self.cache.put('a', {'values': np.arange(1000)})
+        with open(self.cache._fileName('a'), 'rb') as cacheFile:
+            contents = cacheFile.read()
+        for key, data in [('empty', b''), ('garbage', b'not a cache file'), ('partial', contents[:len(contents) // 2])]:
+            with open(self.cache._fileName(key), 'wb') as cacheFile:
+                cacheFile.write(data)
+            self.assertIsNone(self.cache.get(key))
+            self.assertFalse(os.path.exists(self.cache._fileName(key)))
+
+    def test_simulationSetup(self):
+        config = motorlib.motor.MotorConfig()
+        config.setProperty('mapDim', 201)
+        original = motorlib.mapCache.regressionMapCache
+        motorlib.mapCache.regressionMapCache = self.cache
+        try:
+            generated = self.buildFinocyl()
+            generated.simulationSetup(config)
+            cached = self.buildFinocyl()
+            cached.generateRegressionMap = None # Fails the test if the map is generated again
+            cached.simulationSetup(config)
+        finally:
+            motorlib.mapCache.regressionMapCache = original
+
+        self.assertTrue(np.array_equal(generated.regressionMap, cached.regressionMap))
+
+        # An entry that is missing some of the arrays is replaced by a newly generated map
+        key = self.cache.getKey(generated, config.getProperty('mapDim'), 'Fast Marching')
+        self.cache.put(key, {'regressionMap': np.ma.getdata(generated.regressionMap)})
+        motorlib.mapCache.regressionMapCache = self.cache
+        try:
+            regenerated = self.buildFinocyl()
+            regenerated.simulationSetup(config)
+        finally:
+            motorlib.mapCache.regressionMapCache = original
+        self.assertTrue(np.array_equal(generated.regressionMap, regenerated.regressionMap))
+        self.assertIn('corePerimeter', self.cache.get(key))
+        self.assertEqual(generated.wallWeb, cached.wallWeb)
+        for reg in np.linspace(0, generated.wallWeb, 10):
+            self.assertEqual(generated.getSurfaceAreaAtRegression(reg), cached.getSurfaceAreaAtRegression(reg))
+            self.assertEqual(generated.getPortArea(reg), cached.getPortArea(reg))
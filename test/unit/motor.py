@@ -1,7 +1,9 @@
 import unittest
+import numpy as np
 import motorlib.motor
 import motorlib.grains
 import motorlib.propellant
+import motorlib.simResult
 
 class TestMotorMethods(unittest.TestCase):
 
@@ -57,5 +59,199 @@ class TestMotorMethods(unittest.TestCase):
         })
         self.assertAlmostEqual(tm.calcIdealPressure([0], 0), 4050196, 0)
 
+    def test_solvers(self):
+        results = {}
+        for solver in ['Fixed Timestep', 'Adaptive Timestep', 'Regression Domain']:
+            results[solver] = buildBatesMotor({'timestep': 0.001, 'solver': solver}).runSimulation()
+
+        fixed = results['Fixed Timestep']
+        for solver in ['Adaptive Timestep', 'Regression Domain']:
+            simRes = results[solver]
+            self.assertTrue(simRes.success)
+            self.assertAlmostEqual(simRes.getBurnTime() / fixed.getBurnTime(), 1, 2)
+            self.assertAlmostEqual(simRes.getImpulse() / fixed.getImpulse(), 1, 2)
+            self.assertAlmostEqual(simRes.getMaxPressure() / fixed.getMaxPressure(), 1, 2)
+            self.assertTrue(np.all(np.diff(simRes.channels['time'].getData()) > 0))
+            # Every solver ends on the point that reaches the last burnout
+            self.assertGreater(simRes.channels['force'].getLast(), 0)
+            self.assertEqual(list(simRes.channels['regression'].getLast()), simRes.motor.calcBurnoutDepths())
+
+        # The burn is close to neutral, so the adaptive solver should take much longer steps
+        adaptivePoints = len(results['Adaptive Timestep'].channels['time'].getData())
+        self.assertLess(adaptivePoints, len(fixed.channels['time'].getData()) / 10)
+
+    def test_regressionDomainProgress(self):
+        progress = []
+        def callback(fraction):
+            progress.append(fraction)
+            return False
+        self.assertTrue(buildBatesMotor({'solver': 'Regression Domain'}).runSimulation(callback).success)
+        # Progress is reported throughout the simulation, not just when it is done
+        self.assertGreater(len(progress), 10)
+        self.assertTrue(np.all(np.diff(progress) > 0))
+        self.assertEqual(progress[-1], 1)
+
+        # Canceling partway through stops the simulation without logging any results
+        simRes = buildBatesMotor({'solver': 'Regression Domain'}).runSimulation(lambda fraction: fraction > 0.5)
+        self.assertFalse(simRes.success)
+        self.assertEqual(len(simRes.channels['time'].getData()), 0)
+
+    def test_burnoutEvents(self):
+        fine = buildBatesMotor({'timestep': 0.001}).runSimulation()
+        coarse = buildBatesMotor({'timestep': 0.05}).runSimulation()
+
+        # Stepping exactly to burnout makes the burn time and impulse independent of the timestep
+        self.assertAlmostEqual(coarse.getBurnTime(), fine.getBurnTime(), 3)
+        self.assertAlmostEqual(coarse.getImpulse() / fine.getImpulse(), 1, 3)
+
+        # The burn ends on the step that reaches the last burnout, which holds the state from just before it, and
+        # no two points share a time
+        for simRes in (fine, coarse):
+            self.assertTrue(np.all(np.diff(simRes.channels['time'].getData()) > 0))
+            self.assertGreater(simRes.channels['force'].getLast(), 0)
+            self.assertEqual(list(simRes.channels['regression'].getLast()), simRes.motor.calcBurnoutDepths())
+
+    def test_setupGrains(self):
+        tm = buildBatesMotor({})
+        different = motorlib.grains.BatesGrain()
+        different.setProperties(tm.grains[0].getProperties())
+        different.setProperty('coreDiameter', 0.03)
+        tm.grains.append(different)
+        tm.setupGrains()
+
+        # Identical grains should share one burnback table, but keep their own properties
+        self.assertIs(tm.grains[1].burnbackTable, tm.grains[0].burnbackTable)
+        self.assertIsNot(tm.grains[1].props, tm.grains[0].props)
+        self.assertIsNot(tm.grains[2].burnbackTable, tm.grains[0].burnbackTable)
+
+        # The shared table should be the same as the one the grain would have built itself
+        tm.grains[1].simulationSetup(tm.config)
+        self.assertIsNot(tm.grains[1].burnbackTable, tm.grains[0].burnbackTable)
+        self.assertTrue(np.array_equal(tm.grains[1].burnbackTable.surfaceArea, tm.grains[0].burnbackTable.surfaceArea))
+        self.assertTrue(np.array_equal(tm.grains[1].burnbackTable.volume, tm.grains[0].burnbackTable.volume))
+
+    def test_massFluxFunctions(self):
+        tm = buildBatesMotor({})
+        for inhibitedEnds in ('Top', 'Bottom', 'Both'):
+            grain = motorlib.grains.BatesGrain()
+            grain.setProperties(tm.grains[0].getProperties())
+            grain.setProperty('inhibitedEnds', inhibitedEnds)
+            tm.grains.append(grain)
+        tm.setupGrains()
+
+        # All of the BATES grains are handled at once, and should match the mass flux of each grain on its own to within
+        # the accuracy of the burnback tables
+        self.assertEqual(len(tm.massFluxFunctions), 1)
+        massIn = np.array([0, 0.1, 0.2, 0.3, 0.4])
+        regDist = np.array([0, 0.001, 0.002, 0.003, 0.004])
+        dRegDist = np.full(5, 0.0001)
+        massFlux = tm.calcMassFluxes(massIn, 0.01, regDist, dRegDist, 1890)
+        for gid, grain in enumerate(tm.grains):
+            expected = grain.getPeakMassFlux(massIn[gid], 0.01, regDist[gid], dRegDist[gid], 1890)
+            self.assertAlmostEqual(massFlux[gid] / expected, 1, 2)
+
+    def test_thermoStateLookups(self):
+        tm = buildBatesMotor({})
+        tm.setupGrains()
+        tm.compiledPropellant = tm.propellant.compile()
+        simRes = motorlib.simResult.SimulationResult(tm)
+        burnoutDepths = np.array(tm.calcBurnoutDepths())
+        tm.logStep(simRes, tm.calcInitialState())
+
+        # Each step should only look up the propellant's properties once, for its new pressure
+        for _ in range(5):
+            lookups = tm.compiledPropellant.lookupCount
+            step = tm.calcStep(simRes, 0.01, burnoutDepths)
+            self.assertEqual(tm.compiledPropellant.lookupCount - lookups, 1)
+            tm.logStep(simRes, step)
+
+        # The shared state should give the same results as looking the properties up again
+        pressure = simRes.channels['pressure'].getLast()
+        dThroat = simRes.channels['dThroat'].getLast()
+        self.assertEqual(tm.lastThermoState.pressure, pressure)
+        self.assertEqual(simRes.channels['force'].getLast(), tm.calcForce(pressure, dThroat))
+        self.assertEqual(tm.lastThermoState.burnRate, tm.propellant.getBurnRate(pressure))
+
+    def test_calcMachNumbers(self):
+        tm = buildBatesMotor({})
+        pressure = 5e6
+        _, _, gamma, temp, molarMass = tm.propellant.getCombustionProperties(pressure)
+        flowFactor = pressure * (gamma * molarMass / (motorlib.motor.gasConstant * temp)) ** 0.5
+        exponent = -(gamma + 1) / (2 * (gamma - 1))
+
+        def massFluxAt(machNumber):
+            return flowFactor * machNumber * ((1 + ((gamma - 1) / 2) * machNumber ** 2) ** exponent)
+
+        # Mass fluxes from no flow up to just short of choking, where Newton's method has the hardest time
+        chokedMassFlux = massFluxAt(1)
+        massFlux = chokedMassFlux * np.array([0, 0.1, 0.5, 0.9, 0.999, 0.9999999])
+        machNumbers = tm.calcMachNumbers(pressure, massFlux)
+        for expected, machNumber in zip(massFlux, machNumbers):
+            self.assertLess(machNumber, 1)
+            self.assertAlmostEqual(massFluxAt(machNumber) / chokedMassFlux, expected / chokedMassFlux, 12)
+        self.assertEqual(machNumbers[2], tm.calcMachNumber(pressure, massFlux[2]))
+
+        # Grains with more flux than the core can carry are choked, and nothing flows without pressure
+        self.assertEqual(list(tm.calcMachNumbers(pressure, np.array([chokedMassFlux, 2 * chokedMassFlux]))), [1, 1])
+        self.assertEqual(list(tm.calcMachNumbers(0, massFlux)), [0] * len(massFlux))
+
+    def test_arrayPressures(self):
+        tm = buildBatesMotor({})
+        pressures = np.array([5e6, 2e6, 3e5])
+        dThroat = np.array([0, 0.001, 0.002])
+        thermoState = tm.propellant.compile().getThermoStates(pressures)
+        massFlux = np.array([[0, 100, 500], [200, 800, 50]])
+
+        # Solving for many points in time at once matches solving for each one on its own
+        forces = tm.calcForce(pressures, dThroat, None, thermoState)
+        machNumbers = tm.calcMachNumbers(pressures, massFlux, thermoState)
+        for ind, pressure in enumerate(pressures):
+            self.assertEqual(thermoState.burnRate[ind], tm.propellant.getBurnRate(pressure))
+            self.assertAlmostEqual(forces[ind] / tm.calcForce(pressure, dThroat[ind]), 1, 12)
+            expected = tm.calcMachNumbers(pressure, massFlux[:, ind])
+            for machNumber, expectedMachNumber in zip(machNumbers[:, ind], expected):
+                self.assertAlmostEqual(machNumber, expectedMachNumber, 12)
+
+
+def buildBatesMotor(config):
+    """Returns a two grain BATES motor with the simulation settings in 'config' applied over a set of defaults."""
+    tm = motorlib.motor.Motor()
+    tm.config.setProperties({
+        'burnoutWebThres': 0.00001,
+        'burnoutThrustThres': 0.1,
+        'timestep': 0.01,
+        'ambPressure': 101325,
+        'mapDim': 250
+    })
+    tm.config.setProperties(config)
+    for _ in range(2):
+        bg = motorlib.grains.BatesGrain()
+        bg.setProperties({
+            'diameter': 0.083058,
+            'length': 0.1397,
+            'coreDiameter': 0.03175,
+            'inhibitedEnds': 'Neither'
+        })
+        tm.grains.append(bg)
+
+    tm.nozzle.setProperties({'throat': 0.01428, 'exit': 0.03, 'efficiency': 1, 'divAngle': 15})
+    tm.propellant = motorlib.propellant.Propellant()
+    tm.propellant.setProperties({
+        'name': 'KNSU',
+        'density': 1890,
+        'tabs': [
+            {
+                'minPressure': 0,
+                'maxPressure': 10342500,
+                'a': 0.000101,
+                'n': 0.319,
+                't': 1720,
+                'm': 41.98,
+                'k': 1.133
+            }
+        ]
+    })
+    return tm
+
 if __name__ == '__main__':
     unittest.main()
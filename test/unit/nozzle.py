@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import motorlib.nozzle
 
 class TestNozzleMethods(unittest.TestCase):
@@ -33,5 +34,23 @@ class TestNozzleMethods(unittest.TestCase):
         self.assertAlmostEqual(nozzle.getExitPressure(1.2, 5e6), 72087.22454540983)
         self.assertAlmostEqual(nozzle.getExitPressure(1.2, 6e6), 86504.66945449157)
 
+        # Arrays of gammas and pressures match solving for each pair on its own
+        gammas = np.array([1.25, 1.2, 1.2])
+        pressures = np.array([5e6, 5e6, 6e6])
+        exitPressures = nozzle.getExitPressure(gammas, pressures)
+        for gamma, pressure, exitPressure in zip(gammas, pressures, exitPressures):
+            self.assertEqual(exitPressure, nozzle.getExitPressure(float(gamma), float(pressure)))
+
+    def test_pressureRatioFromExpansionRatio(self):
+        # The supersonic solution is found, even right next to the sonic point
+        for eRatio in (0.5, 0.1, 0.01, 1e-4, 0.9999999):
+            pRatio = motorlib.nozzle.pRatioFromERatio(1.2, eRatio)
+            self.assertLess(pRatio, motorlib.nozzle.criticalPRatio(1.2))
+            self.assertAlmostEqual(motorlib.nozzle.eRatioFromPRatio(1.2, pRatio) / eRatio, 1, 12)
+
+        # Nozzles without expansion choke at the throat
+        self.assertAlmostEqual(motorlib.nozzle.pRatioFromERatio(1.2, 1), motorlib.nozzle.criticalPRatio(1.2))
+        self.assertAlmostEqual(motorlib.nozzle.pRatioFromERatio(1.2, 1.5), motorlib.nozzle.criticalPRatio(1.2))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+import mathlib
+
+
+class TestPerimeterMethods(unittest.TestCase):
+    def setUp(self) -> None:
+        # Distance from the center of the image, so each contour is a circle
+        coords = np.linspace(-1, 1, 101)
+        mapX, mapY = np.meshgrid(coords, coords)
+        self.image = np.sqrt(mapX**2 + mapY**2)
+
+    def test_circlePerimeter(self) -> None:
+        perimeter, _ = mathlib.find_perimeter(self.image, 0.5)
+        self.assertAlmostEqual(perimeter, 2 * np.pi * 0.5 * 50, 0)
+
+    def test_findPerimeters(self) -> None:
+        levels = np.linspace(0, 1, 41)
+        expected = [mathlib.find_perimeter(self.image, level)[0] for level in levels]
+        self.assertEqual(list(mathlib.find_perimeters(self.image, levels)), expected)
+
+    def test_findPerimetersUnsorted(self) -> None:
+        with self.assertRaises(ValueError):
+            mathlib.find_perimeters(self.image, [0.5, 0.25])
+
+    def test_findPerimetersThreads(self) -> None:
+        levels = np.linspace(0, 1, 41)
+        serial = mathlib.find_perimeters(self.image, levels, num_threads=1)
+        for numThreads in [2, 3, 8]:
+            parallel = mathlib.find_perimeters(self.image, levels, num_threads=numThreads)
+            self.assertTrue(np.array_equal(serial, parallel))
+
+    def test_tileIndex(self) -> None:
+        levels = np.linspace(0, 1, 41)
+        for tileSize in [1, 7, 16, 200]:
+            tiles = mathlib.TileIndex(self.image, tileSize)
+            self.assertTrue(np.array_equal(mathlib.find_perimeters(self.image, levels),
+                                           mathlib.find_perimeters(self.image, levels, tile_index=tiles)))
+            for level in [0.1, 0.5, 0.9]:
+                perimeter, contours = mathlib.find_perimeter(self.image, level, including_contours=True)
+                tiledPerimeter, tiledContours = mathlib.find_perimeter(self.image, level, including_contours=True,
+                                                                       tile_index=tiles)
+                self.assertEqual(perimeter, tiledPerimeter)
+                self.assertEqual(len(contours), len(tiledContours))
+                for contour, tiledContour in zip(contours, tiledContours):
+                    self.assertTrue(np.array_equal(contour, tiledContour))
+
+    def test_tileIndexShape(self) -> None:
+        tiles = mathlib.TileIndex(self.image[:50])
+        with self.assertRaises(ValueError):
+            mathlib.find_perimeter(self.image, 0.5, tile_index=tiles)
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import motorlib.propellant
 
 class TestPropellantMethods(unittest.TestCase):
@@ -131,5 +132,52 @@ class TestPropellantMethods(unittest.TestCase):
         self.assertEqual(testProp.getCombustionProperties(6.9e5), (1.467e-05, 0.382, 1.25, 3500, 23.67))
         self.assertEqual(testProp.getCombustionProperties(8e10), (1e-05, 0.3, 1.25, 3500, 23.67))
 
+    def test_compiled_propellant(self):
+        # The tabs are out of order and have a gap between them
+        props = {
+            'name': 'TestProp',
+            'density': 1650,
+            'tabs': [
+                {
+                    'minPressure': 7e+06,
+                    'maxPressure': 1.379e+07,
+                    'a': 1e-05,
+                    'n': 0.3,
+                    't': 3500,
+                    'm': 23.67,
+                    'k': 1.25
+                }, {
+                    'minPressure': 0,
+                    'maxPressure': 6.895e+06,
+                    'a': 1.467e-05,
+                    'n': 0.382,
+                    't': 3200,
+                    'm': 23.67,
+                    'k': 1.21
+                }
+            ]
+        }
+        testProp = motorlib.propellant.Propellant(props)
+        compiled = testProp.compile()
+
+        pressures = [0, 1e6, 6.895e6, 6.9e6, 6.99e6, 7e6, 8e6, 1.379e7, 8e10]
+        for pressure in pressures:
+            self.assertEqual(compiled.getCombustionProperties(pressure), testProp.getCombustionProperties(pressure))
+            self.assertEqual(compiled.getBurnRate(pressure), testProp.getBurnRate(pressure))
+            self.assertEqual(compiled.getCStar(pressure), testProp.getCStar(pressure))
+        burnRates = compiled.getBurnRate(np.array(pressures))
+        for pressure, burnRate in zip(pressures, burnRates):
+            self.assertAlmostEqual(burnRate, testProp.getBurnRate(pressure), 12)
+
+        kns = [0, 50, 200, 360, 600, 2000]
+        for kn in kns:
+            self.assertEqual(compiled.getPressureFromKn(kn), testProp.getPressureFromKn(kn))
+        knPressures = compiled.getPressureFromKn(np.array(kns))
+        for kn, pressure in zip(kns, knPressures):
+            self.assertAlmostEqual(pressure, testProp.getPressureFromKn(kn), 0)
+
+        self.assertEqual(compiled.getMinimumValidPressure(), 0)
+        self.assertEqual(compiled.getMaximumValidPressure(), 1.379e7)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import motorlib.resultFile
+import motorlib.simResult
+
+from .motor import buildBatesMotor
+
+class TestResultFile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempDir.name, 'result' + motorlib.resultFile.fileExtension)
+
+    def tearDown(self) -> None:
+        self.tempDir.cleanup()
+
+    def test_roundTrip(self):
+        simRes = buildBatesMotor({'timestep': 0.01}).runSimulation()
+        simRes.addAlert(motorlib.simResult.SimAlert(motorlib.simResult.SimAlertLevel.WARNING,
+                                                    motorlib.simResult.SimAlertType.VALUE, 'Test alert', 'Nozzle'))
+        motorlib.resultFile.saveResult(simRes, self.path)
+        loaded = motorlib.resultFile.loadResult(self.path)
+
+        # Channels aren't read until they are used
+        self.assertIsNone(loaded.channels['force']._storage)
+        self.assertEqual(loaded.channels['force'].getMax(), simRes.channels['force'].getMax())
+        self.assertIsNone(loaded.channels['force']._storage)
+
+        self.assertEqual(loaded.channels.keys(), simRes.channels.keys())
+        for chan in simRes.channels:
+            np.testing.assert_array_equal(loaded.channels[chan].getData(), simRes.channels[chan].getData())
+            self.assertEqual(loaded.channels[chan].name, simRes.channels[chan].name)
+            self.assertEqual(loaded.channels[chan].unit, simRes.channels[chan].unit)
+        self.assertIsInstance(loaded.channels['force']._storage, np.memmap)
+
+        self.assertEqual(loaded.success, simRes.success)
+        self.assertEqual(loaded.motor.getDict(), simRes.motor.getDict())
+        self.assertEqual(loaded.alerts[-1].description, 'Test alert')
+        self.assertEqual(loaded.alerts[-1].level, motorlib.simResult.SimAlertLevel.WARNING)
+        self.assertEqual(loaded.summary.impulse, simRes.summary.impulse)
+        self.assertEqual(loaded.getPeakMassFluxLocation(), simRes.getPeakMassFluxLocation())
+        self.assertEqual(loaded.getCSV(), simRes.getCSV())
+
+        # Adding data to a loaded channel copies it into memory
+        loaded.channels['time'].addData(10)
+        self.assertEqual(loaded.channels['time'].getLast(), 10)
+        self.assertEqual(len(loaded.channels['time'].getData()), len(simRes.channels['time'].getData()) + 1)
+
+    def test_badFile(self):
+        with open(self.path, 'wb') as outFile:
+            outFile.write(b'time,force\n')
+        with self.assertRaises(ValueError):
+            motorlib.resultFile.loadResult(self.path)
@@ -0,0 +1,133 @@
+import io
+import unittest
+import numpy as np
+import motorlib.simResult
+
+class TestLogChannel(unittest.TestCase):
+    def test_scalarChannel(self):
+        channel = motorlib.simResult.LogChannel('Pressure', float, 'Pa')
+        # Enough points to make the storage grow a few times
+        for point in range(200):
+            channel.addData(point)
+
+        self.assertEqual(channel.getData().shape, (200, ))
+        self.assertEqual(list(channel.getData()), list(range(200)))
+        self.assertEqual(channel.getPoint(10), 10)
+        self.assertEqual(channel.getLast(), 199)
+        self.assertEqual(channel.getMax(), 199)
+        self.assertEqual(channel.getMin(), 0)
+        self.assertAlmostEqual(channel.getAverage(), 99.5)
+        self.assertAlmostEqual(channel.getData('MPa')[100], 1e-4)
+
+        # The data can't be changed through the arrays the channel returns
+        with self.assertRaises(ValueError):
+            channel.getData()[0] = 5
+
+    def test_listChannel(self):
+        channel = motorlib.simResult.LogChannel('Regression Depth', tuple, 'm')
+        for point in range(100):
+            channel.addData([point, 2 * point, -point])
+
+        self.assertEqual(channel.getData().shape, (100, 3))
+        self.assertEqual(list(channel.getPoint(5)), [5, 10, -5])
+        self.assertEqual(list(channel.getLast()), [99, 198, -99])
+        self.assertEqual(channel.getMax(), 198)
+        self.assertEqual(channel.getMin(), -99)
+        self.assertEqual(list(channel.getData('mm')[1]), [1000, 2000, -1000])
+        with self.assertRaises(NotImplementedError):
+            channel.getAverage()
+
+    def test_runningStats(self):
+        channel = motorlib.simResult.LogChannel('Mass Flux', tuple, 'kg/(m^2*s)')
+        for point in [[1, 0, 4], [3, 5, 2], [2, 5, 4], [0, 1, 1]]:
+            channel.addData(point)
+
+        # Each value's peak is found at the first point it was reached
+        self.assertEqual(list(channel.getPeaks()), [3, 5, 4])
+        self.assertEqual(list(channel.getPeakIndices()), [1, 1, 0])
+        self.assertEqual(channel.getMaxLocation(), (1, 1))
+        self.assertEqual(channel.getMax(), np.max(channel.getData()))
+        self.assertEqual(channel.getMin(), np.min(channel.getData()))
+
+        channel = motorlib.simResult.LogChannel('Thrust', float, 'N')
+        self.assertIsNone(channel.getMaxLocation())
+        for point in [0, 10, 30, 30, 5]:
+            channel.addData(point)
+        self.assertEqual(channel.getMax(), 30)
+        self.assertEqual(channel.getMaxLocation(), 2)
+        self.assertEqual(channel.getMin(), 0)
+        self.assertEqual(channel.getAverage(), 15)
+
+    def test_peakLocation(self):
+        simRes = motorlib.simResult.SimulationResult(None)
+        for time, massFlux in enumerate([[0, 0, 0], [1, 3, 2], [2, 1, 3], [1, 0, 0.5]]):
+            simRes.channels['time'].addData(time)
+            simRes.channels['massFlux'].addData(massFlux)
+
+        # The first grain that reaches the peak is reported
+        self.assertEqual(simRes.getPeakMassFlux(), 3)
+        self.assertEqual(simRes.getPeakMassFluxLocation(), 1)
+        self.assertEqual(simRes.getPeakMachNumberLocation(), None)
+
+class TestResultSummary(unittest.TestCase):
+    def test_summary(self):
+        simRes = motorlib.simResult.SimulationResult(None)
+        self.assertEqual(simRes.summary.designation, 'N/A')
+
+        for time, force, mass in [(0, 0, 1), (1, 100, 0.5), (2, 100, 0)]:
+            simRes.channels['time'].addData(time)
+            simRes.channels['force'].addData(force)
+            simRes.channels['pressure'].addData(force * 1e4)
+            simRes.channels['mass'].addData([mass, mass])
+
+        summary = simRes.summary
+        self.assertEqual(summary.impulse, 200)
+        self.assertEqual(summary.averageForce, 100)
+        self.assertEqual(summary.burnTime, 2)
+        self.assertEqual(summary.maxPressure, 1e6)
+        self.assertEqual(summary.propellantMass, 2)
+        self.assertEqual(summary.designation, 'H100')
+        self.assertEqual(summary.fullDesignation, '200H100')
+        self.assertAlmostEqual(summary.impulseClassPercentage, 0.25)
+        self.assertAlmostEqual(summary.isp, 200 / (2 * 9.80665))
+        self.assertEqual(simRes.getImpulse(2), 100)
+
+        # The summary is only recalculated after more data is added
+        self.assertIs(simRes.summary, summary)
+        with self.assertRaises(AttributeError):
+            summary.impulse = 0
+        simRes.channels['time'].addData(3)
+        simRes.channels['force'].addData(300)
+        simRes.channels['pressure'].addData(3e6)
+        simRes.channels['mass'].addData([0, 0])
+        self.assertIsNot(simRes.summary, summary)
+        self.assertEqual(simRes.getImpulse(), 500)
+
+class TestCSV(unittest.TestCase):
+    def test_writeCSV(self):
+        simRes = motorlib.simResult.SimulationResult(None)
+        for point in range(10):
+            for name, channel in simRes.channels.items():
+                if channel.valueType in (list, tuple):
+                    channel.addData([point / 3, 2 * point])
+                else:
+                    channel.addData(point / 3)
+
+        exclude = ['kn', 'mass', 'massFlow', 'massFlux', 'regression', 'machNumber']
+        csv = simRes.getCSV(exclude=exclude, excludeGrains=[0])
+        lines = csv.splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['Time(s)', 'Chamber Pressure(Pa)', 'Thrust(N)'])
+        self.assertIn('Web(G2;m)', lines[0])
+        self.assertNotIn('Web(G1;m)', lines[0])
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(lines[4].split(',')[:3], ['1.0', '1.0', '1.0'])
+        self.assertEqual(lines[5].split(',')[0], '1.33333')
+        self.assertTrue(all(len(line.split(',')) == 7 for line in lines))
+
+        # Writing the rows a few at a time gives the same output
+        out = io.StringIO()
+        simRes.writeCSV(out, exclude=exclude, excludeGrains=[0], chunkSize=3)
+        self.assertEqual(out.getvalue(), csv)
+
+if __name__ == '__main__':
+    unittest.main()
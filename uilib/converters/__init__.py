@@ -4,3 +4,4 @@ from .engExporter import EngExporter
 from .burnsimExporter import BurnSimExporter
 from .csvExporter import CsvExporter
 from .imageExporter import ImageExporter
+from .resultExporter import ResultExporter
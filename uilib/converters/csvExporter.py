@@ -33,7 +33,7 @@ class CsvExporter(Exporter):
 
     def doConversion(self, path, config):
         with open(path, 'w') as outFile:
-            outFile.write(self.manager.simRes.getCSV(self.manager.preferences, config[0], config[1]))
+            self.manager.simRes.writeCSV(outFile, self.manager.preferences, config[0], config[1])
 
     def checkRequirements(self):
         return self.manager.simRes is not None
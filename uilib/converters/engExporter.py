@@ -1,3 +1,4 @@
+import numpy as np
 from PyQt6.QtWidgets import QDialog, QApplication
 
 from motorlib.properties import PropertyCollection, FloatProperty, StringProperty, EnumProperty
@@ -28,7 +29,7 @@ class EngExportMenu(QDialog):
 
     def exec(self):
         newSettings = EngSettings()
-        designation = self.exporter.manager.simRes.getDesignation()
+        designation = self.exporter.manager.simRes.summary.designation
         newSettings.setProperties({'designation': designation})
         self.ui.motorStats.setPreferences(self.exporter.manager.preferences)
         self.ui.motorStats.loadProperties(newSettings)
@@ -47,7 +48,8 @@ class EngExporter(Exporter):
     def doConversion(self, path, config):
         mode = 'a' if config['append'] == 'Append' else 'w'
         with open(path, mode) as outFile:
-            propMass = self.manager.simRes.getPropellantMass()
+            summary = self.manager.simRes.summary
+            propMass = summary.propellantMass
             contents = ' '.join([config['designation'],
                                  str(round(config['diameter'] * 1000, 6)),
                                  str(round(config['length'] * 1000, 6)),
@@ -59,10 +61,11 @@ class EngExporter(Exporter):
 
             timeData = self.manager.simRes.channels['time'].getData()
             forceData = self.manager.simRes.channels['force'].getData()
-            # Add on a 0-thrust datapoint right after the burn to satisfy RAS Aero
+            # Add on a 0-thrust datapoint right after the burn to satisfy RAS Aero. The channels' data is read-only, so
+            # this makes new arrays rather than adding the point to the simulation results.
             if forceData[-1] != 0:
-                timeData.append(self.manager.simRes.getBurnTime() + 0.01)
-                forceData.append(0)
+                timeData = np.append(timeData, summary.burnTime + 0.01)
+                forceData = np.append(forceData, 0)
             for time, force in zip(timeData, forceData):
                 if time == 0: # Increase the first point so it isn't 0 thrust
                     force += 0.01
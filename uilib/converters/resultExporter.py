@@ -0,0 +1,16 @@
+import motorlib.resultFile
+
+from ..converter import Exporter
+
+class ResultExporter(Exporter):
+    def __init__(self, manager):
+        super().__init__(manager, 'Result File',
+            'Exports all data from a simulation in a binary format that can be loaded quickly',
+            {motorlib.resultFile.fileExtension: 'openMotor Result Files'})
+        self.reqNotMet = "Must have run a simulation to export a result file."
+
+    def doConversion(self, path, config):
+        motorlib.resultFile.saveResult(self.manager.simRes, path)
+
+    def checkRequirements(self):
+        return self.manager.simRes is not None
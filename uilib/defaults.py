@@ -13,7 +13,11 @@ DEFAULT_PREFERENCES = {
         'igniterPressure': 150 * 6895, # Deprecated, but needed for migration
         'mapDim': 750,
         'sepPressureRatio' : 0.4, # This is a good default value known as the Summerfield Criteria https://ntrs.nasa.gov/api/citations/19840011402/downloads/19840011402.pdf
-        'flowSeparationWarnPercent': 0.05
+        'flowSeparationWarnPercent': 0.05,
+        'solver': 'Fixed Timestep',
+        'maxTimestep': 0.1,
+        'stepTolerance': 0.01,
+        'distanceMethod': 'Fast Marching'
     },
     'units': {
         'm': 'in',
@@ -8,7 +8,7 @@ import platformdirs
 from .defaults import DEFAULT_PREFERENCES, DEFAULT_PROPELLANTS, KNSU_PROPS
 from .logger import logger
 
-appVersion = (0, 6, 1)
+appVersion = (0, 7, 0)
 appVersionStr = '.'.join(map(str, appVersion))
 
 class fileTypes(Enum):
@@ -66,6 +66,17 @@ def getConfigPath():
 
 def passthrough(data):
     return data
+
+#0.6.1 to 0.7.0
+def migrateMotor_0_6_1_to_0_7_0(data):
+    for prop in ('solver', 'maxTimestep', 'stepTolerance', 'distanceMethod'):
+        data['config'][prop] = DEFAULT_PREFERENCES['general'][prop]
+    return data
+
+def migratePref_0_6_1_to_0_7_0(data):
+    for prop in ('solver', 'maxTimestep', 'stepTolerance', 'distanceMethod'):
+        data['general'][prop] = DEFAULT_PREFERENCES['general'][prop]
+    return data
     
 #0.6.0 to 0.6.1
 def migrateMotor_0_6_0_to_0_6_1(data):
@@ -170,6 +181,13 @@ def migrateMotor_0_2_0_to_0_3_0(data):
     return data
 
 migrations = {
+    (0, 6, 1): {
+        'to': (0, 7, 0),
+        fileTypes.PREFERENCES: migratePref_0_6_1_to_0_7_0,
+        fileTypes.PROPELLANTS: passthrough,
+        fileTypes.MOTOR: migrateMotor_0_6_1_to_0_7_0,
+        fileTypes.RECENT_FILES: passthrough
+    },
     (0, 6, 0): {
         'to': (0, 6, 1),
         fileTypes.PREFERENCES: passthrough,
@@ -2,7 +2,7 @@ from PyQt6.QtCore import pyqtSignal, QObject
 from PyQt6.QtGui import QAction
 
 from .converter import Importer
-from .converters import BurnSimImporter, BurnSimExporter, EngExporter, CsvExporter, ImageExporter
+from .converters import BurnSimImporter, BurnSimExporter, EngExporter, CsvExporter, ImageExporter, ResultExporter
 
 class ImportExportManager(QObject):
 
@@ -13,7 +13,8 @@ class ImportExportManager(QObject):
         super().__init__()
         self.app = app
         self.conversions = [BurnSimImporter(self),
-                            BurnSimExporter(self), EngExporter(self), CsvExporter(self), ImageExporter(self)]
+                            BurnSimExporter(self), EngExporter(self), CsvExporter(self), ImageExporter(self),
+                            ResultExporter(self)]
         self.preferences = None # TODO: change?
 
         self.simRes = None
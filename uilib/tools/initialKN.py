@@ -14,7 +14,7 @@ class InitialKNTool(Tool):
 
     def applyChanges(self, inp, motor, simulation):
         for grain in motor.grains:
-            grain.simulationSetup(self.preferences)
+            grain.simulationSetup(self.preferences.general)
         surfArea = motor.calcBurningSurfaceArea([0 for grain in motor.grains])
         throatArea = surfArea / inp['Kn']
         motor.nozzle.props['throat'].setValue(motorlib.geometry.circleDiameterFromArea(throatArea))
@@ -28,7 +28,7 @@ class NeutralBatesTool(Tool):
             newMotor.grains.append(newGrain)
 
         for grain in motor.grains:
-            grain.simulationSetup(self.preferences) # Just in case this does something for BATES grains eventually
+            grain.simulationSetup(self.preferences.general) # Just in case this does something for BATES grains eventually
 
         surfArea = sum([g.getSurfaceAreaAtRegression(0) for g in newMotor.grains])
         throatArea = surfArea / inp['Kn']
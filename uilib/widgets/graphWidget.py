@@ -2,13 +2,8 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
 def selectGrains(data, grains):
-    # Returns the data corresponding to specific grains from data structured like [[G1, G2], [G1, G2], [G1, G2]...]
-    out = []
-    for frame in data:
-        out.append([])
-        for grain in grains:
-            out[-1].append(frame[grain])
-    return out
+    # Returns the columns corresponding to specific grains from an array with a row per point and a column per grain
+    return data[:, grains]
 
 class GraphWidget(FigureCanvas):
     def __init__(self, parent):
@@ -67,7 +62,7 @@ class GraphWidget(FigureCanvas):
 
     def saveImage(self, simResult, xChannel, yChannels, grains, path):
         self.plotData(simResult, xChannel, yChannels, grains)
-        self.plot.set_title(simResult.getFullDesignation())
+        self.plot.set_title(simResult.summary.fullDesignation)
         self.figure.savefig(path, bbox_inches="tight")
         # Clear, but don't draw to not wipe away the graph in the UI
         self.plot.clear()
@@ -294,19 +294,20 @@ class Window(QMainWindow):
         return '{:.2f} {}'.format(motorlib.units.convert(quantity, inUnit, convUnit), convUnit)
 
     def updateMotorStats(self, simResult):
-        self.ui.labelMotorDesignation.setText('{} ({:.0%})'.format(simResult.getDesignation(), simResult.getImpulseClassPercentage()))
-        self.ui.labelImpulse.setText(self.formatMotorStat(simResult.getImpulse(), 'Ns'))
-        self.ui.labelDeliveredISP.setText(self.formatMotorStat(simResult.getISP(), 's'))
-        self.ui.labelBurnTime.setText(self.formatMotorStat(simResult.getBurnTime(), 's'))
+        summary = simResult.summary
+        self.ui.labelMotorDesignation.setText('{} ({:.0%})'.format(summary.designation, summary.impulseClassPercentage))
+        self.ui.labelImpulse.setText(self.formatMotorStat(summary.impulse, 'Ns'))
+        self.ui.labelDeliveredISP.setText(self.formatMotorStat(summary.isp, 's'))
+        self.ui.labelBurnTime.setText(self.formatMotorStat(summary.burnTime, 's'))
         self.ui.labelVolumeLoading.setText('{:.2f}%'.format(simResult.getVolumeLoading()))
 
-        self.ui.labelAveragePressure.setText(self.formatMotorStat(simResult.getAveragePressure(), 'Pa'))
-        self.ui.labelPeakPressure.setText(self.formatMotorStat(simResult.getMaxPressure(), 'Pa'))
+        self.ui.labelAveragePressure.setText(self.formatMotorStat(summary.averagePressure, 'Pa'))
+        self.ui.labelPeakPressure.setText(self.formatMotorStat(summary.maxPressure, 'Pa'))
         self.ui.labelInitialKN.setText(self.formatMotorStat(simResult.getInitialKN(), ''))
         self.ui.labelPeakKN.setText(self.formatMotorStat(simResult.getPeakKN(), ''))
         self.ui.labelIdealThrustCoefficient.setText(self.formatMotorStat(simResult.getIdealThrustCoefficient(), ''))
 
-        self.ui.labelPropellantMass.setText(self.formatMotorStat(simResult.getPropellantMass(), 'kg'))
+        self.ui.labelPropellantMass.setText(self.formatMotorStat(summary.propellantMass, 'kg'))
         self.ui.labelPropellantLength.setText(self.formatMotorStat(simResult.getPropellantLength(), 'm'))
 
         # These only make sense for grains with cores, so blank them out for endburners
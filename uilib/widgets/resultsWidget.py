@@ -131,13 +131,13 @@ class ResultsWidget(QWidget):
             self.ui.labelTimeRemaining.setText('{:.3f} s'.format(remainingTime))
 
             currentImpulse = self.simResult.getImpulse(index)
-            remainingImpulse = self.simResult.getImpulse() - currentImpulse
+            remainingImpulse = self.simResult.summary.impulse - currentImpulse
             impUnit = self.preferences.getUnit('Ns')
             self.ui.labelImpulseProgress.setText(motorlib.units.convFormat(currentImpulse, 'Ns', impUnit))
             self.ui.labelImpulseRemaining.setText(motorlib.units.convFormat(remainingImpulse, 'Ns', impUnit))
 
             currentMass = self.simResult.getPropellantMass(index)
-            remainingMass = self.simResult.getPropellantMass() - currentMass
+            remainingMass = self.simResult.summary.propellantMass - currentMass
             massUnit = self.preferences.getUnit('kg')
             self.ui.labelMassProgress.setText(motorlib.units.convFormat(remainingMass, 'kg', massUnit))
             self.ui.labelMassRemaining.setText(motorlib.units.convFormat(currentMass, 'kg', massUnit))